@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
-from .models import Admin, AdminToken, UserProfile, FloodAlert, CitizenReport, OTP, ResponseTeam, CompletedTask
+from .models import Admin, AdminToken, UserProfile, FloodAlert, CitizenReport, OTP, ResponseTeam, CompletedTask, MediaBlob
+from .search import search_reports
 
 
 class UserProfileInline(admin.StackedInline):
@@ -80,6 +81,12 @@ class CitizenReportAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at', 'updated_at']
     fields = ['reporter_name', 'reporter_email', 'location', 'description', 'latitude', 'longitude', 'image', 'audio', 'status', 'assigned_team', 'created_at', 'updated_at']
 
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text index instead of LIKE scans over search_fields
+        if not search_term.strip():
+            return queryset, False
+        return search_reports(queryset, search_term), False
+
 
 @admin.register(OTP)
 class OTPAdmin(admin.ModelAdmin):
@@ -107,3 +114,14 @@ class CompletedTaskAdmin(admin.ModelAdmin):
     search_fields = ['report__reporter_name', 'report__location']
     readonly_fields = ['completed_at']
 
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'size', 'ref_count', 'updated_at']
+    list_filter = ['created_at']
+    search_fields = ['digest', 'name']
+    readonly_fields = ['digest', 'name', 'size', 'ref_count', 'created_at', 'updated_at']
+
+    def has_add_permission(self, request):
+        # Blobs are created by the storage backend when files are uploaded
+        return False
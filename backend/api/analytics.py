@@ -0,0 +1,95 @@
+"""
+Time-to-resolution analytics. Every completed report is counted once in the
+ResolutionRollup row of its team and completion day, whose t-digest
+(api/tdigest.py) sketches the distribution of resolution times. Percentiles
+for any team/date range come from merging those rows, so their cost depends
+on the number of days and teams asked for, not on the number of reports.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CompletedTask, ResolutionRollup, TableVersion
+from .tdigest import TDigest
+
+QUANTILES = (('p50', 0.5), ('p90', 0.9), ('p99', 0.99))
+
+
+def resolution_seconds(report, completed_at):
+    return max((completed_at - report.created_at).total_seconds(), 0.0)
+
+
+def record_resolution(report, completed_at):
+    """
+    Count a completed report in its team/day rollup. Call inside the
+    transaction that completes it, after the report row was written: on
+    SQLite that write lock serialises concurrent read-modify-writes here.
+    """
+    rollup, _ = ResolutionRollup.objects.get_or_create(
+        team_id=report.assigned_team_id, day=timezone.localdate(completed_at)
+    )
+    seconds = resolution_seconds(report, completed_at)
+    digest = TDigest.from_dict(rollup.digest)
+    digest.add(seconds)
+    rollup.count += 1
+    rollup.total_seconds += seconds
+    rollup.digest = digest.to_dict()
+    rollup.save()
+    return rollup
+
+
+def fold_team_rollups(team_id):
+    """
+    Move a team's rollups into the team-less rollups of the same days, where
+    ``rebuild_rollups`` counts its reports once the team is gone. Called
+    before a team is deleted, so its completions stay in the overall figures.
+    """
+    with transaction.atomic():
+        for rollup in ResolutionRollup.objects.filter(team_id=team_id):
+            target, _ = ResolutionRollup.objects.get_or_create(team_id=None, day=rollup.day)
+            digest = TDigest.from_dict(target.digest)
+            digest.merge(TDigest.from_dict(rollup.digest))
+            target.count += rollup.count
+            target.total_seconds += rollup.total_seconds
+            target.digest = digest.to_dict()
+            target.save()
+            rollup.delete()
+
+
+def summarize(rollups):
+    """Count, mean and p50/p90/p99 resolution seconds of a set of rollups merged."""
+    digest = TDigest()
+    count = 0
+    total_seconds = 0.0
+    for rollup in rollups:
+        digest.merge(TDigest.from_dict(rollup.digest))
+        count += rollup.count
+        total_seconds += rollup.total_seconds
+    summary = {'count': count, 'mean_seconds': round(total_seconds / count, 1) if count else None}
+    for name, q in QUANTILES:
+        value = digest.quantile(q)
+        summary[f'{name}_seconds'] = round(value, 1) if value is not None else None
+    return summary
+
+
+def rebuild_rollups(batch_size=2000):
+    """Recompute every rollup from CompletedTask history. Returns the number of rollups."""
+    rollups = {}
+    tasks = CompletedTask.objects.select_related('report').order_by('id')
+    for task in tasks.iterator(chunk_size=batch_size):
+        key = (task.report.assigned_team_id, timezone.localdate(task.completed_at))
+        rollup = rollups.get(key)
+        if rollup is None:
+            rollup = rollups[key] = [0, 0.0, TDigest()]
+        seconds = resolution_seconds(task.report, task.completed_at)
+        rollup[0] += 1
+        rollup[1] += seconds
+        rollup[2].add(seconds)
+    with transaction.atomic():
+        ResolutionRollup.objects.all().delete()
+        ResolutionRollup.objects.bulk_create([
+            ResolutionRollup(team_id=team_id, day=day, count=count, total_seconds=total, digest=digest.to_dict())
+            for (team_id, day), (count, total, digest) in rollups.items()
+        ], batch_size=500)
+        # bulk_create sends no post_save signals
+        TableVersion.bump('resolution_rollups')
+    return len(rollups)
@@ -5,19 +5,15 @@ class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_migrate
+
+        from . import signals  # noqa: F401
+        from .db import configure_connection
+        from .querylog import install_wrapper
+        from .search import ensure_index_after_migrate
+
+        connection_created.connect(configure_connection, dispatch_uid='api.db.configure_connection')
+        connection_created.connect(install_wrapper, dispatch_uid='api.querylog.install_wrapper')
+        post_migrate.connect(ensure_index_after_migrate, sender=self, dispatch_uid='api.search.ensure_index')
@@ -0,0 +1,55 @@
+"""
+Report change feed: every report create/assign/complete/delete is appended to
+ReportEvent, in the same transaction as the change itself. Dashboards follow
+the feed over SSE (api/sse.py) or poll GET /api/reports/events/.
+"""
+from django.conf import settings
+
+from .models import ReportEvent
+
+
+def event_payload(report):
+    """Summary of a report carried by its events (enough to update a dashboard row)."""
+    return {
+        'id': report.id,
+        'reporter_name': report.reporter_name,
+        'location': report.location,
+        'latitude': report.latitude,
+        'longitude': report.longitude,
+        'status': report.status,
+        'assigned_team_id': report.assigned_team_id,
+        'created_at': report.created_at,
+        'updated_at': report.updated_at,
+    }
+
+
+def record_report_event(kind, report):
+    return ReportEvent.objects.create(report_id=report.id, kind=kind, payload=event_payload(report))
+
+
+def record_report_events(kind, reports):
+    """Append one event per report with a single INSERT (used by bulk creation)."""
+    return ReportEvent.objects.bulk_create([
+        ReportEvent(report_id=report.id, kind=kind, payload=event_payload(report))
+        for report in reports
+    ])
+
+
+def events_after(seq, limit=None):
+    """Events with a sequence number greater than ``seq``, oldest first."""
+    limit = limit or getattr(settings, 'REPORT_EVENT_BATCH_SIZE', 500)
+    return list(ReportEvent.objects.filter(id__gt=seq).order_by('id')[:limit])
+
+
+def latest_seq():
+    return ReportEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def serialize_event(event):
+    return {
+        'seq': event.id,
+        'kind': event.kind,
+        'report_id': event.report_id,
+        'report': event.payload,
+        'created_at': event.created_at,
+    }
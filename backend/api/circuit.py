@@ -0,0 +1,194 @@
+"""
+Fail fast when an upstream service is down, and keep answering from the last
+good response while it is.
+
+``CircuitBreaker`` counts consecutive failures of calls made under
+``guard()``. After ``failure_threshold`` of them it opens: calls raise
+``CircuitOpen`` at once instead of waiting out a timeout. After
+``reset_timeout`` seconds it lets a single trial call through (half-open);
+success closes it again, failure re-opens it. The state is published as the
+``blueguard_circuit_breaker_state`` gauge.
+
+``StaleWhileRevalidate`` keeps the last good value per key. Values younger
+than ``fresh_for`` are served as they are. Older ones, up to ``max_stale``,
+are served marked stale while a background thread fetches a new one, so a
+slow or failing upstream never holds up the caller once a value is cached.
+A ``keep`` predicate can refuse to cache incomplete values: they are still
+returned to the caller, and the next call loads again. Both are per process.
+"""
+import logging
+import re
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from .metrics import inc, set_gauge
+
+logger = logging.getLogger(__name__)
+
+CLOSED, HALF_OPEN, OPEN = 'closed', 'half_open', 'open'
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=3, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.last_error = None
+        self._state = CLOSED
+        self._lock = threading.Lock()
+        self._publish()
+
+    def _publish(self):
+        set_gauge('blueguard_circuit_breaker_state', (('breaker', self.name),), STATE_VALUES[self._state])
+
+    def _set_state(self, state):
+        if state != self._state:
+            logger.warning("Circuit breaker %s: %s -> %s", self.name, self._state, state)
+            self._state = state
+            self._publish()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._set_state(HALF_OPEN)
+            return self._state
+
+    def allow(self):
+        """Whether a call may go out now; in half-open state only one trial at a time."""
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._set_state(HALF_OPEN)
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.trial_running = False
+            self._set_state(CLOSED)
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self.failures += 1
+            # Without query strings: upstream URLs carry API keys
+            self.last_error = re.sub(r'\?\S*', '', f'{type(error).__name__}: {error}') if error is not None else None
+            if self._state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self.trial_running = False
+                self._set_state(OPEN)
+
+    @contextmanager
+    def guard(self):
+        """Run the block as a call to the upstream; any exception counts as a failure."""
+        if not self.allow():
+            inc('blueguard_upstream_requests_total', (('service', self.name), ('outcome', 'short_circuit')))
+            raise CircuitOpen(f'{self.name} circuit is open')
+        try:
+            yield
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+
+    def status(self):
+        state = self.state
+        return {
+            'state': state,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'retry_in': (
+                max(0.0, round(self.opened_at + self.reset_timeout - time.monotonic(), 1))
+                if state == OPEN else None
+            ),
+        }
+
+
+Cached = namedtuple('Cached', 'value fetched_at stale')
+
+
+class StaleWhileRevalidate:
+    def __init__(self, name, fresh_for, max_stale):
+        self.name = name
+        self.fresh_for = fresh_for
+        self.max_stale = max_stale
+        # key -> (value, fetched_at wall clock time)
+        self._entries = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def _count(self, result):
+        inc('blueguard_upstream_cache_total', (('cache', self.name), ('result', result)))
+
+    def _load(self, key, load, keep=None):
+        """Call ``load()`` and cache its result unless it is None, raises or fails ``keep``."""
+        try:
+            value = load()
+        except CircuitOpen:
+            value = None
+        except Exception:
+            logger.exception("Loading %s %s failed", self.name, key)
+            value = None
+        if value is not None and (keep is None or keep(value)):
+            with self._lock:
+                self._entries[key] = (value, time.time())
+        return value
+
+    def _revalidate(self, key, load, keep):
+        try:
+            self._load(key, load, keep)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get(self, key, load, keep=None):
+        """
+        The cached value for ``key`` as ``Cached(value, fetched_at, stale)``,
+        loading it with ``load()`` on a miss. None if there is no usable value.
+        Loaded values for which ``keep(value)`` is false are returned uncached.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            value, fetched_at = entry
+            age = now - fetched_at
+            if age < self.fresh_for:
+                self._count('fresh')
+                return Cached(value, fetched_at, False)
+            if age < self.max_stale:
+                self._count('stale')
+                with self._lock:
+                    start = key not in self._refreshing
+                    self._refreshing.add(key)
+                if start:
+                    threading.Thread(
+                        target=self._revalidate, args=(key, load, keep), name=f'revalidate-{self.name}', daemon=True,
+                    ).start()
+                return Cached(value, fetched_at, True)
+        self._count('miss')
+        loaded_at = time.time()
+        value = self._load(key, load, keep)
+        if value is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+        return Cached(value, entry[1] if entry is not None and entry[0] is value else loaded_at, False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,129 @@
+"""
+SQLite tuning for concurrent writers.
+
+``configure_connection`` runs the ``SQLITE_PRAGMAS`` from settings on every new
+connection (WAL, busy timeout, page cache, mmap...). ``run_write`` funnels a
+write through the optional single-writer queue: one thread owns all writes and
+commits several small ones in a shared transaction, so request threads never
+fight over SQLite's database-wide write lock.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from . import routers
+
+logger = logging.getLogger(__name__)
+
+
+def configure_connection(sender, connection, **kwargs):
+    """``connection_created`` receiver applying ``settings.SQLITE_PRAGMAS``."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+class WriteQueue:
+    """
+    Run database writes on a single background thread, in batches.
+
+    Callables submitted together (up to ``max_batch`` of them, waiting at most
+    ``max_delay`` seconds for the batch to fill) share one transaction; each
+    runs inside its own savepoint so a failing write only rolls back itself.
+    Futures are resolved after the shared transaction commits.
+    """
+
+    def __init__(self, max_batch=64, max_delay=0.002):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs):
+        future = Future()
+        if threading.current_thread() is self._thread:
+            # A queued write that writes again must not wait on itself.
+            future.set_result(func(*args, **kwargs))
+            return future
+        self._ensure_started()
+        self._queue.put((future, func, args, kwargs))
+        return future
+
+    def run(self, func, *args, **kwargs):
+        return self.submit(func, *args, **kwargs).result()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name='sqlite-writer', daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(block=timeout > 0, timeout=max(timeout, 0)))
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker(self):
+        while True:
+            # Claim the futures first: a cancelled one is dropped, and the
+            # rest can no longer be cancelled before they are resolved
+            batch = [job for job in self._next_batch() if job[0].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            close_old_connections()
+            outcomes = []
+            try:
+                with transaction.atomic():
+                    for future, func, args, kwargs in batch:
+                        try:
+                            with transaction.atomic():
+                                outcomes.append((True, func(*args, **kwargs)))
+                        except Exception as e:
+                            outcomes.append((False, e))
+            except Exception as e:
+                logger.error(f"Write batch of {len(batch)} failed to commit: {str(e)}")
+                outcomes = [(False, e)] * len(batch)
+            for (future, *_), outcome in zip(batch, outcomes):
+                ok, value = outcome
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+
+write_queue = WriteQueue(
+    max_batch=getattr(settings, 'SQLITE_WRITE_QUEUE_MAX_BATCH', 64),
+    max_delay=getattr(settings, 'SQLITE_WRITE_QUEUE_MAX_DELAY', 0.002),
+)
+
+
+def run_write(func, *args, **kwargs):
+    """
+    Call ``func`` in a transaction, through the write queue when
+    ``SQLITE_WRITE_QUEUE`` is enabled, and return its result.
+    """
+    if getattr(settings, 'SQLITE_WRITE_QUEUE', False):
+        # The writer thread routes the write, out of this request's context
+        routers.mark_written()
+        return write_queue.run(func, *args, **kwargs)
+    with transaction.atomic():
+        return func(*args, **kwargs)
@@ -0,0 +1,141 @@
+"""
+Incremental near-duplicate detection for citizen reports.
+
+Each new report is matched against the incident clusters active around it:
+clusters in the lat/lon grid cells within ``INCIDENT_RADIUS_METERS`` of it
+(or with the same normalised location text when it has no coordinates) that
+received a report within ``INCIDENT_WINDOW_HOURS``. That is one indexed lookup on
+(cell, last_reported_at), so the cost does not grow with the number of
+reports. Candidates within ``INCIDENT_RADIUS_METERS`` are compared by the
+MinHash estimate of the Jaccard similarity of their descriptions' shingles;
+the report joins the best cluster above ``INCIDENT_SIMILARITY`` or starts a
+new one.
+"""
+import hashlib
+import math
+import random
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import IncidentCluster
+
+MERSENNE_PRIME = (1 << 61) - 1
+SHINGLE_SIZE = 4
+EARTH_RADIUS_METERS = 6371000.0
+
+_rng = random.Random(20240601)
+_PERMUTATIONS = [
+    (_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME))
+    for _ in range(getattr(settings, 'INCIDENT_MINHASH_PERMUTATIONS', 64))
+]
+_NON_WORD_RE = re.compile(r'[\W_]+', re.UNICODE)
+
+
+def normalize(text):
+    return _NON_WORD_RE.sub(' ', (text or '').lower()).strip()
+
+
+def shingles(text):
+    """Character shingles of the normalised text (robust to typos and word order)."""
+    text = normalize(text)
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text):
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'big')
+        for shingle in shingles(text)
+    ]
+    if not hashes:
+        return []
+    return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def similarity(signature, other):
+    """MinHash estimate of the Jaccard similarity of two descriptions."""
+    if not signature or len(signature) != len(other):
+        return 0.0
+    return sum(1 for x, y in zip(signature, other) if x == y) / len(signature)
+
+
+def distance_meters(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * math.asin(math.sqrt(a))
+
+
+def _cell_size():
+    return getattr(settings, 'INCIDENT_CELL_DEGREES', 0.005)
+
+
+def cell_for(latitude, longitude):
+    size = _cell_size()
+    return f'{math.floor(latitude / size)}:{math.floor(longitude / size)}'
+
+
+def neighbour_cells(latitude, longitude, radius):
+    """Cells that may hold a point within ``radius`` meters of (latitude, longitude)."""
+    size = _cell_size()
+    row, col = math.floor(latitude / size), math.floor(longitude / size)
+    meters_per_degree = math.pi * EARTH_RADIUS_METERS / 180
+    rows = math.ceil(radius / (size * meters_per_degree))
+    cols = math.ceil(radius / (size * meters_per_degree * max(math.cos(math.radians(latitude)), 0.01)))
+    return [f'{row + dr}:{col + dc}' for dr in range(-rows, rows + 1) for dc in range(-cols, cols + 1)]
+
+
+def match_cluster(location, description, latitude=None, longitude=None, reported_at=None):
+    """
+    Return the incident cluster a new report belongs to, creating one if none
+    matches, and count the report in it. Call inside the transaction that
+    inserts the report.
+    """
+    reported_at = reported_at or timezone.now()
+    signature = minhash(description)
+    radius = getattr(settings, 'INCIDENT_RADIUS_METERS', 500)
+    has_point = latitude is not None and longitude is not None
+    if has_point:
+        latitude, longitude = float(latitude), float(longitude)
+        cells = neighbour_cells(latitude, longitude, radius)
+        own_cell = cell_for(latitude, longitude)
+    else:
+        own_cell = f'loc:{normalize(location)[:250]}'
+        cells = [own_cell]
+
+    window = timedelta(hours=getattr(settings, 'INCIDENT_WINDOW_HOURS', 6))
+    candidates = IncidentCluster.objects.filter(
+        cell__in=cells, last_reported_at__gte=reported_at - window
+    ).only('id', 'latitude', 'longitude', 'signature')
+
+    threshold = getattr(settings, 'INCIDENT_SIMILARITY', 0.3)
+    best, best_score = None, threshold
+    for cluster in candidates:
+        if has_point and cluster.latitude is not None:
+            if distance_meters(latitude, longitude, cluster.latitude, cluster.longitude) > radius:
+                continue
+        score = similarity(signature, cluster.signature)
+        if score >= best_score:
+            best, best_score = cluster, score
+
+    if best is None:
+        return IncidentCluster.objects.create(
+            cell=own_cell,
+            latitude=latitude if has_point else None,
+            longitude=longitude if has_point else None,
+            location=location,
+            description=description,
+            signature=signature,
+            report_count=1,
+            first_reported_at=reported_at,
+            last_reported_at=reported_at,
+        )
+
+    IncidentCluster.objects.filter(pk=best.pk).update(
+        report_count=F('report_count') + 1, last_reported_at=reported_at
+    )
+    return best
@@ -0,0 +1,246 @@
+"""
+Nearest-team dispatch: assign open reports to Active/Standby response teams
+so that the total travel distance from team bases is minimal, without giving
+any team more open reports than its capacity.
+
+The assignment is a min-cost flow (report -> team -> sink, team edges capped
+at the team's free capacity), solved by successive shortest paths with
+Dijkstra and node potentials. Reports enter one at a time, oldest first, and
+each augmenting path may move already planned reports to other teams, so the
+plan stays optimal for the reports admitted so far. When capacity runs out,
+the oldest reports are the ones served.
+
+The candidate set is pruned spatially: each report is only connected to its
+``DISPATCH_CANDIDATE_TEAMS`` nearest teams within ``DISPATCH_MAX_DISTANCE_KM``,
+found through a grid over the team bases. The plan is optimal over that
+candidate graph.
+"""
+import heapq
+import math
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .changefeed import record_report_events
+from .dedup import EARTH_RADIUS_METERS, distance_meters
+from .models import CitizenReport, ResponseTeam, TableVersion
+
+DISPATCH_TEAM_STATUSES = ('Active', 'Standby')
+OPEN_REPORT_STATUSES = ('pending', 'reviewed')
+
+
+class TeamIndex:
+    """Grid of team bases answering k-nearest-team queries."""
+
+    def __init__(self, bases, cell_degrees=None):
+        # ``bases`` is a list of (latitude, longitude), one per team index
+        self.bases = bases
+        self.cell_degrees = cell_degrees or getattr(settings, 'DISPATCH_CELL_DEGREES', 0.05)
+        self.cells = {}
+        for index, (latitude, longitude) in enumerate(bases):
+            self.cells.setdefault(self._cell(latitude, longitude), []).append(index)
+
+    def _cell(self, latitude, longitude):
+        return math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees)
+
+    def nearest(self, latitude, longitude, k, max_distance):
+        """Up to ``k`` (distance in meters, team index) pairs, nearest first."""
+        row, col = self._cell(latitude, longitude)
+        meters_per_degree = math.pi * EARTH_RADIUS_METERS / 180
+        # Anything outside ring r of cells is at least this far per ring
+        ring_meters = self.cell_degrees * meters_per_degree * max(math.cos(math.radians(latitude)), 0.01)
+        found = []
+        seen = 0
+        ring = 0
+        while True:
+            if ring == 0:
+                cells = [(row, col)]
+            else:
+                cells = [(row + dr, col + dc) for dr in (-ring, ring) for dc in range(-ring, ring + 1)]
+                cells += [(row + dr, col + dc) for dr in range(-ring + 1, ring) for dc in (-ring, ring)]
+            for cell in cells:
+                for index in self.cells.get(cell, ()):
+                    seen += 1
+                    distance = distance_meters(latitude, longitude, *self.bases[index])
+                    if distance <= max_distance:
+                        found.append((distance, index))
+            reach = ring * ring_meters
+            # Stop once every base has been looked at, too: with fewer teams
+            # than ``k`` the nearest-k test alone never ends the search
+            if (reach > max_distance or seen == len(self.bases)
+                    or (len(found) >= k and sorted(found)[k - 1][0] <= reach)):
+                break
+            ring += 1
+        found.sort()
+        return found[:k]
+
+
+def plan_dispatch(reports, teams, candidates=None, max_distance_km=None):
+    """
+    Optimal assignment of ``reports`` to ``teams``.
+
+    ``reports`` is a sequence of (report_id, latitude, longitude) in priority
+    order and ``teams`` a sequence of (team_id, latitude, longitude,
+    free_capacity). Returns a dict with ``assignments`` (list of (report_id,
+    team_id, meters)), ``unassigned`` report ids and ``total_meters``.
+    """
+    candidates = candidates or getattr(settings, 'DISPATCH_CANDIDATE_TEAMS', 8)
+    max_distance = (max_distance_km or getattr(settings, 'DISPATCH_MAX_DISTANCE_KM', 25)) * 1000
+    teams = [team for team in teams if team[3] > 0]
+    index = TeamIndex([(float(lat), float(lon)) for _, lat, lon, _ in teams])
+
+    capacity = [team[3] for team in teams]
+    load = [0] * len(teams)
+    # Dijkstra potentials (relative to the sink's); reduced costs stay >= 0
+    potential = [0] * len(teams)
+    # A path team -> planned report -> other team moves that report; report
+    # potentials cancel out along it, so the search runs over teams only.
+    # moves[team][other] is a lazy heap of (extra meters, report) for the
+    # reports planned at ``team`` that could go to ``other`` instead.
+    moves = [{} for _ in teams]
+    report_ids, costs, assigned = [], [], []
+    unassigned = []
+    free = sum(capacity)
+
+    for report_id, latitude, longitude in reports:
+        if not free:
+            unassigned.append(report_id)
+            continue
+        near = index.nearest(float(latitude), float(longitude), candidates, max_distance)
+        if not near:
+            unassigned.append(report_id)
+            continue
+        source = len(report_ids)
+        report_ids.append(report_id)
+        # Integer meters keep the potentials exact
+        costs.append({team: round(distance) for distance, team in near})
+        assigned.append(-1)
+
+        offset = max(potential[team] - cost for team, cost in costs[source].items())
+        dist = {}
+        came_from = {}  # team -> (team the moved report leaves, report)
+        heap = []
+        for team, cost in costs[source].items():
+            dist[team] = cost + offset - potential[team]
+            came_from[team] = (-1, source)
+            heap.append((dist[team], team))
+        heapq.heapify(heap)
+        settled = []
+        sink_dist = sink_team = None
+        while heap:
+            team_dist, team = heapq.heappop(heap)
+            if team_dist > dist[team]:
+                continue
+            if sink_dist is not None and team_dist >= sink_dist:
+                break
+            settled.append(team)
+            base = team_dist + potential[team]
+            if load[team] < capacity[team] and (sink_dist is None or base < sink_dist):
+                sink_dist, sink_team = base, team
+            for other, options in moves[team].items():
+                while options and assigned[options[0][1]] != team:
+                    heapq.heappop(options)
+                if not options:
+                    continue
+                reduced = base + options[0][0] - potential[other]
+                if reduced < dist.get(other, reduced + 1):
+                    dist[other] = reduced
+                    came_from[other] = (team, options[0][1])
+                    heapq.heappush(heap, (reduced, other))
+        if sink_dist is None:
+            # No free team within reach, even by moving planned reports
+            unassigned.append(report_id)
+            continue
+
+        for team in settled:
+            if dist[team] < sink_dist:
+                potential[team] += dist[team] - sink_dist
+
+        # Augment: every report on the path moves to the next team
+        team = sink_team
+        load[team] += 1
+        free -= 1
+        while True:
+            previous, report = came_from[team]
+            assigned[report] = team
+            cost = costs[report][team]
+            for other, other_cost in costs[report].items():
+                if other != team:
+                    heapq.heappush(moves[team].setdefault(other, []), (other_cost - cost, report))
+            if previous == -1:
+                break
+            team = previous
+
+    assignments = sorted(
+        (report_ids[report], teams[team][0], costs[report][team])
+        for report, team in enumerate(assigned) if team != -1
+    )
+    return {
+        'assignments': assignments,
+        'unassigned': unassigned,
+        'total_meters': sum(cost for _, _, cost in assignments),
+    }
+
+
+def dispatch_inputs(team_ids=None):
+    """
+    Load the open, unassigned reports (oldest first) and the Active/Standby
+    teams with a base location and their free capacity.
+    """
+    reports = list(
+        CitizenReport.objects.filter(
+            assigned_team__isnull=True, status__in=OPEN_REPORT_STATUSES,
+            latitude__isnull=False, longitude__isnull=False,
+        ).order_by('created_at', 'id').values_list('id', 'latitude', 'longitude')
+    )
+    teams = ResponseTeam.objects.filter(
+        status__in=DISPATCH_TEAM_STATUSES, base_latitude__isnull=False, base_longitude__isnull=False,
+    ).annotate(
+        open_reports=Count('reports', filter=Q(reports__status__in=OPEN_REPORT_STATUSES))
+    )
+    if team_ids:
+        teams = teams.filter(id__in=team_ids)
+    teams = [
+        (team.id, team.base_latitude, team.base_longitude, max(team.capacity - team.open_reports, 0))
+        for team in teams
+    ]
+    return reports, teams
+
+
+def apply_plan(assignments):
+    """
+    Assign the planned teams in one transaction. Reports that were assigned
+    or closed since the plan was computed are skipped. Returns the updated
+    reports.
+    """
+    planned = {report_id: team_id for report_id, team_id, _ in assignments}
+    with transaction.atomic():
+        reports = list(
+            CitizenReport.objects.select_for_update().filter(
+                id__in=planned, assigned_team__isnull=True, status__in=OPEN_REPORT_STATUSES
+            )
+        )
+        if not reports:
+            return []
+        now = timezone.now()
+        # Allocate a change_seq block spanning the ids so each row gets
+        # id + offset: unique, and set by one plain UPDATE per team instead
+        # of a per-row CASE (queryset updates bypass save() and its signals)
+        low, high = min(report.id for report in reports), max(report.id for report in reports)
+        offset = TableVersion.allocate(CitizenReport.CHANGE_SEQ_COUNTER, count=high - low + 1) - high
+        by_team = {}
+        for report in reports:
+            report.assigned_team_id = planned[report.id]
+            report.status = 'reviewed'
+            report.updated_at = now
+            report.change_seq = report.id + offset
+            by_team.setdefault(report.assigned_team_id, []).append(report.id)
+        for team_id, report_ids in by_team.items():
+            CitizenReport.objects.filter(id__in=report_ids).update(
+                assigned_team_id=team_id, status='reviewed', updated_at=now, change_seq=F('id') + offset
+            )
+        TableVersion.bump('reports')
+        record_report_events('assigned', reports)
+    return reports
@@ -0,0 +1,136 @@
+"""
+Structured, non-blocking logging (wired up by ``LOGGING`` in settings).
+
+``BackgroundHandler`` only puts records on a queue; a ``QueueListener``
+thread formats and writes them, so a request never waits on string
+formatting or stderr. Log with ``%s`` arguments, not f-strings: a record that
+is filtered out (by level or by ``SamplingFilter``) is then never formatted at
+all, and the one that is kept is formatted off the request thread.
+
+``JsonFormatter`` writes one JSON object per line, with any ``extra=``
+fields, after passing the arguments and extras through ``redact`` so
+passwords, tokens, OTP codes and Aadhaar uploads never reach the log.
+"""
+import json
+import logging
+import queue
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from itertools import count
+from logging.handlers import QueueHandler, QueueListener
+
+REDACTED = '[redacted]'
+# Keys whose values are dropped, matched case-insensitively as substrings
+SENSITIVE_KEYS = ('password', 'token', 'secret', 'otp', 'authorization', 'cookie', 'csrf', 'aadhaar', 'api_key')
+
+# Attributes every LogRecord has; anything else was passed with ``extra=``
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+
+def _is_sensitive(key):
+    key = str(key).lower()
+    return any(word in key for word in SENSITIVE_KEYS)
+
+
+def redact(value, depth=0):
+    """Copy of ``value`` with the values of sensitive keys replaced, recursively."""
+    if depth > 5:
+        return value
+    if isinstance(value, Mapping):
+        # dicts, QueryDicts and request.headers
+        return {key: REDACTED if _is_sensitive(key) else redact(item, depth + 1) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(redact(item, depth + 1) for item in value)
+    return value
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep one in N records below WARNING from the loggers in ``rates``
+    (``{'api.views': 10}``); a rate applies to the logger's children too.
+    WARNING and above are always kept.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self.counters = {}
+
+    def _rate(self, name):
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition('.')[0]
+        return 1
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate <= 1:
+            return True
+        counter = self.counters.get(record.name)
+        if counter is None:
+            counter = self.counters.setdefault(record.name, count())
+        return next(counter) % rate == 0
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message and extras, redacted."""
+
+    def format(self, record):
+        if record.args:
+            record.args = redact(record.args)
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = REDACTED if _is_sensitive(key) else redact(value)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class BackgroundHandler(QueueHandler):
+    """
+    Queue records for a listener thread that formats and writes them to
+    ``stream`` (stderr by default). When ``maxsize`` records are waiting, new
+    ones are dropped and counted in ``blueguard_log_records_dropped_total``
+    rather than blocking the request.
+    """
+
+    def __init__(self, stream=None, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.target = logging.StreamHandler(stream)
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # The stock prepare formats the message here, on the caller's
+        # thread; the listener's handler formats it instead
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            from .metrics import inc
+
+            inc('blueguard_log_records_dropped_total', ())
+
+    def close(self):
+        # Drains the queue; logging.shutdown() calls this at exit
+        if self.listener._thread is not None:
+            self.listener.stop()
+        self.target.close()
+        super().close()
@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import MediaBlob
+from api.signals import MEDIA_FIELDS
+
+
+def count_references(names):
+    """Return {name: number of model fields currently pointing at it}."""
+    counts = dict.fromkeys(names, 0)
+    for model, field in MEDIA_FIELDS:
+        for name in model.objects.filter(**{f'{field}__in': names}).values_list(field, flat=True):
+            counts[name] += 1
+    return counts
+
+
+class Command(BaseCommand):
+    help = 'Delete media blobs that are no longer referenced by any report or profile.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours', type=float, default=1.0,
+            help='Only collect blobs whose last reference was dropped at least this long ago.',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be deleted.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        collected = repaired = freed_bytes = 0
+        last_id = 0
+        while True:
+            # Blobs whose references have not changed for the grace period
+            batch = list(
+                MediaBlob.objects.filter(updated_at__lt=cutoff, id__gt=last_id).order_by('id')[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+            references = count_references([blob.name for blob in batch])
+
+            for blob in batch:
+                actual = references[blob.name]
+                if actual != blob.ref_count:
+                    # The refcount drifted (e.g. a crash between save and
+                    # commit, or a release that never ran); trust the tables.
+                    # A blob set to 0 here is collected once its grace period
+                    # has passed again.
+                    repaired += 1
+                    if not dry_run:
+                        MediaBlob.objects.filter(
+                            pk=blob.pk, ref_count=blob.ref_count, updated_at=blob.updated_at
+                        ).update(ref_count=actual, updated_at=timezone.now())
+                    continue
+                if actual:
+                    continue
+
+                if dry_run:
+                    collected += 1
+                    freed_bytes += blob.size
+                    continue
+
+                # Only remove the row if nobody re-referenced it in the meantime,
+                # and unlink the file before committing: the delete holds the
+                # write lock, so an upload of the same bytes cannot create a new
+                # row until the file is gone, and then writes the file again.
+                with transaction.atomic():
+                    deleted, _ = MediaBlob.objects.filter(pk=blob.pk, ref_count=0).delete()
+                    if deleted != 1 or MediaBlob.objects.filter(name=blob.name).exists():
+                        continue
+                    default_storage.purge(blob.name)
+                collected += 1
+                freed_bytes += blob.size
+
+        verb = 'Would delete' if dry_run else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {collected} blob(s), {freed_bytes} bytes; repaired {repaired} refcount(s)."
+        ))
@@ -0,0 +1,42 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api import resumable
+from api.models import UploadSession
+
+
+class Command(BaseCommand):
+    help = 'Delete expired resumable upload sessions and their partial files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be deleted.')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+
+        expired = list(UploadSession.objects.filter(expires_at__lt=timezone.now()))
+        for session in expired:
+            if not dry_run:
+                resumable.discard(session)
+                session.delete()
+
+        # Part files whose session row is gone (e.g. deleted while a chunk was
+        # still being written) and that nobody has touched for a full TTL.
+        orphans = 0
+        root = resumable.upload_root()
+        if os.path.isdir(root):
+            live = {f'{pk}.part' for pk in UploadSession.objects.values_list('id', flat=True)}
+            cutoff = time.time() - resumable.session_ttl().total_seconds()
+            for entry in os.scandir(root):
+                if entry.name.endswith('.part') and entry.name not in live and entry.stat().st_mtime < cutoff:
+                    orphans += 1
+                    if not dry_run:
+                        os.remove(entry.path)
+
+        verb = 'Would delete' if dry_run else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {len(expired)} expired upload(s) and {orphans} orphaned part file(s)."
+        ))
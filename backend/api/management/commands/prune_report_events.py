@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import ReportEvent
+
+
+class Command(BaseCommand):
+    help = 'Delete report change-feed events older than the retention window.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=float, default=30, help='Keep events from the last this many days.')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be deleted.')
+
+    def handle(self, *args, **options):
+        old = ReportEvent.objects.filter(created_at__lt=timezone.now() - timedelta(days=options['days']))
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f"Would delete {old.count()} event(s)."))
+            return
+        deleted, _ = old.delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} event(s)."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.analytics import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the resolution-time rollups from CompletedTask history.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        count = rebuild_rollups(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} rollup(s)."))
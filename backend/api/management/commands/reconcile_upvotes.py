@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from api.models import CitizenReport, TableVersion
+from api.ranking import hot_score
+
+
+class Command(BaseCommand):
+    help = 'Recount CitizenReport.upvote_count from ReportUpvote and fix drifted hot scores.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--rescore', action='store_true',
+            help='Recompute every hot_score (e.g. after changing REPORT_HOT_DECAY_SECONDS).',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it.')
+
+    def handle(self, *args, **options):
+        checked = fixed = 0
+        last_id = 0
+        while True:
+            batch = list(
+                CitizenReport.objects.filter(id__gt=last_id).order_by('id')
+                .annotate(votes=Count('upvotes'))
+                .only('id', 'created_at', 'upvote_count', 'hot_score')[:options['batch_size']]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+            checked += len(batch)
+
+            drifted = []
+            for report in batch:
+                score = hot_score(report.votes, report.created_at)
+                if report.upvote_count != report.votes or (options['rescore'] and report.hot_score != score):
+                    report.upvote_count, report.hot_score = report.votes, score
+                    drifted.append(report)
+            fixed += len(drifted)
+            if not drifted or options['dry_run']:
+                continue
+
+            with transaction.atomic():
+                # bulk_update bypasses save(), so allocate change_seq and bump the
+                # list version here for delta sync and conditional GETs
+                last_seq = TableVersion.allocate(CitizenReport.CHANGE_SEQ_COUNTER, count=len(drifted))
+                for seq, report in enumerate(drifted, start=last_seq - len(drifted) + 1):
+                    report.change_seq = seq
+                CitizenReport.objects.bulk_update(drifted, ['upvote_count', 'hot_score', 'change_seq'])
+                TableVersion.bump('reports')
+
+        verb = 'Would fix' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} report(s). {verb} {fixed}."))
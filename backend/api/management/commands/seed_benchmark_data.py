@@ -0,0 +1,261 @@
+import math
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from api.analytics import rebuild_rollups
+from api.changefeed import record_report_events
+from api.models import (
+    Admin, CitizenReport, CompletedTask, ReportUpvote, ResponseTeam, TableVersion, UserProfile,
+)
+from api.ranking import hot_score
+
+# Flood-prone cities: (name, latitude, longitude, share of reports, spread in km)
+HOTSPOTS = [
+    ('Mumbai', 19.0760, 72.8777, 0.22, 12),
+    ('Chennai', 13.0827, 80.2707, 0.16, 10),
+    ('Kolkata', 22.5726, 88.3639, 0.14, 9),
+    ('Guwahati', 26.1445, 91.7362, 0.12, 7),
+    ('Patna', 25.5941, 85.1376, 0.10, 7),
+    ('Delhi', 28.7041, 77.1025, 0.10, 14),
+    ('Kochi', 9.9312, 76.2673, 0.08, 6),
+    ('Srinagar', 34.0837, 74.7973, 0.04, 5),
+    ('Bhubaneswar', 20.2961, 85.8245, 0.04, 6),
+]
+WARDS = ['Market Road', 'Station Area', 'Riverside Colony', 'Old Town', 'Ring Road', 'Bus Depot',
+         'Canal Street', 'Sector 4', 'Low Lying Basti', 'Bridge Approach', 'School Lane', 'Main Bazaar']
+DESCRIPTIONS = [
+    'Water logging about {depth} cm deep, two-wheelers stalled',
+    'Drain overflowing onto the road after {hours} hours of rain',
+    'Houses in the lane flooded, families need to move to higher ground',
+    'Underpass submerged, traffic diverted',
+    'River level rising fast near the embankment',
+    'Sewage backing up into homes, {depth} cm of water inside',
+    'Tree fell and blocked the storm drain, water collecting',
+    'Road caved in next to the flooded culvert',
+]
+FIRST_NAMES = ['Aarav', 'Priya', 'Rahul', 'Ananya', 'Vikram', 'Sneha', 'Arjun', 'Kavya', 'Rohan', 'Meera',
+               'Karan', 'Isha', 'Aditya', 'Diya', 'Sanjay', 'Pooja', 'Nikhil', 'Lakshmi', 'Imran', 'Fatima']
+LAST_NAMES = ['Sharma', 'Iyer', 'Das', 'Patel', 'Reddy', 'Nair', 'Singh', 'Bora', 'Khan', 'Menon',
+              'Ghosh', 'Rao', 'Kumar', 'Mishra', 'Joshi']
+KM_PER_DEGREE = 111.32
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Let bulk_create keep the given auto_now/auto_now_add values instead of now()."""
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field, _, _ in saved:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed users, admins, teams, reports, upvotes and completed tasks clustered around '
+        'flood-prone cities, for load tests and benchmarks.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--admins', type=int, default=5)
+        parser.add_argument('--teams', type=int, default=40)
+        parser.add_argument('--reports', type=int, default=5000)
+        parser.add_argument('--upvotes', type=float, default=3.0, help='Mean upvotes per report.')
+        parser.add_argument('--resolved', type=float, default=0.3, help='Share of reports completed.')
+        parser.add_argument('--days', type=int, default=90, help='Spread reports over this many past days.')
+        parser.add_argument('--prefix', default='loadtest', help='Prefix of seeded usernames and team names.')
+        parser.add_argument('--password', default='loadtest123', help='Password of every seeded account.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--clear', action='store_true', help='Delete data seeded earlier with this prefix first.')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        if options['clear']:
+            self.clear(prefix)
+        elif User.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(f"Data with prefix '{prefix}' already exists; pass --clear to replace it.")
+
+        # One hash for every account: hashing per user would dominate seeding
+        password = make_password(options['password'])
+        users = self.seed_users(prefix, options['users'], password)
+        self.seed_admins(prefix, options['admins'], password)
+        teams = self.seed_teams(prefix, options['teams'])
+        reports = self.seed_reports(users, options)
+        upvotes = self.seed_upvotes(reports, users, options['upvotes'])
+        completed = self.seed_completed(reports, teams, options['resolved'])
+        rollups = rebuild_rollups()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(users)} user(s), {options['admins']} admin(s), {len(teams)} team(s), "
+            f"{len(reports)} report(s), {upvotes} upvote(s), {completed} completed task(s) "
+            f"and {rollups} rollup(s). Password: {options['password']}"
+        ))
+
+    def clear(self, prefix):
+        with transaction.atomic():
+            emails = User.objects.filter(username__startswith=f'{prefix}_').values('email')
+            CitizenReport.objects.filter(reporter_email__in=emails).delete()
+            User.objects.filter(username__startswith=f'{prefix}_').delete()
+            Admin.objects.filter(username__startswith=f'{prefix}_').delete()
+            ResponseTeam.objects.filter(name__startswith=f'{prefix} ').delete()
+            for table in ('reports', 'teams', 'completed_tasks'):
+                TableVersion.bump(table)
+
+    def point_near(self, latitude, longitude, spread_km):
+        dlat = self.rng.gauss(0, spread_km) / KM_PER_DEGREE
+        dlon = self.rng.gauss(0, spread_km) / (KM_PER_DEGREE * math.cos(math.radians(latitude)))
+        return (Decimal(f'{latitude + dlat:.6f}'), Decimal(f'{longitude + dlon:.6f}'))
+
+    def hotspot(self):
+        return self.rng.choices(HOTSPOTS, weights=[spot[3] for spot in HOTSPOTS])[0]
+
+    def seed_users(self, prefix, count, password):
+        users = [
+            User(
+                username=f'{prefix}_citizen_{i}', email=f'{prefix}_citizen_{i}@example.com', password=password,
+                first_name=self.rng.choice(FIRST_NAMES), last_name=self.rng.choice(LAST_NAMES),
+            )
+            for i in range(count)
+        ]
+        with transaction.atomic():
+            users = User.objects.bulk_create(users, batch_size=self.batch_size)
+            UserProfile.objects.bulk_create(
+                [UserProfile(user=user, user_type='citizen') for user in users], batch_size=self.batch_size
+            )
+        return users
+
+    def seed_admins(self, prefix, count, password):
+        Admin.objects.bulk_create([
+            Admin(
+                username=f'{prefix}_admin_{i}', email=f'{prefix}_admin_{i}@example.com', password=password,
+                first_name=self.rng.choice(FIRST_NAMES), last_name=self.rng.choice(LAST_NAMES),
+            )
+            for i in range(count)
+        ])
+
+    def seed_teams(self, prefix, count):
+        teams = []
+        self.teams_by_city = {}
+        for i in range(count):
+            city, latitude, longitude, _, spread = self.hotspot()
+            base_latitude, base_longitude = self.point_near(latitude, longitude, spread / 2)
+            team = ResponseTeam(
+                name=f'{prefix} {city} Team {i}', base_latitude=base_latitude, base_longitude=base_longitude,
+                capacity=self.rng.randint(3, 8),
+            )
+            teams.append(team)
+            self.teams_by_city.setdefault(city, []).append(team)
+        with transaction.atomic():
+            ResponseTeam.objects.bulk_create(teams)
+            TableVersion.bump('teams')
+        return teams
+
+    def seed_reports(self, users, options):
+        if not users:
+            return []
+        now = timezone.now()
+        span = options['days'] * 86400
+        # Recent days busier than old ones
+        times = sorted(now - timedelta(seconds=span * self.rng.random() ** 1.5) for _ in range(options['reports']))
+        reports = []
+        for created_at in times:
+            city, latitude, longitude, _, spread = self.hotspot()
+            user = self.rng.choice(users)
+            report_latitude, report_longitude = self.point_near(latitude, longitude, spread)
+            city_teams = self.teams_by_city.get(city)
+            reviewed = city_teams and self.rng.random() < 0.2
+            reports.append(CitizenReport(
+                reporter_name=f'{user.first_name} {user.last_name}', reporter_email=user.email,
+                location=f'{self.rng.choice(WARDS)}, {city}',
+                description=self.rng.choice(DESCRIPTIONS).format(
+                    depth=self.rng.randint(10, 120), hours=self.rng.randint(2, 30)
+                ),
+                latitude=report_latitude, longitude=report_longitude,
+                status='reviewed' if reviewed else 'pending',
+                assigned_team=self.rng.choice(city_teams) if reviewed else None,
+                created_at=created_at, updated_at=created_at,
+                hot_score=hot_score(0, created_at),
+            ))
+
+        created = []
+        fields = CitizenReport._meta.get_field('created_at'), CitizenReport._meta.get_field('updated_at')
+        for start in range(0, len(reports), self.batch_size):
+            batch = reports[start:start + self.batch_size]
+            with transaction.atomic(), explicit_timestamps(*fields):
+                # bulk_create bypasses CitizenReport.save(), so allocate the block here
+                last_seq = TableVersion.allocate(CitizenReport.CHANGE_SEQ_COUNTER, count=len(batch))
+                for seq, report in enumerate(batch, start=last_seq - len(batch) + 1):
+                    report.change_seq = seq
+                batch = CitizenReport.objects.bulk_create(batch)
+                TableVersion.bump('reports')
+                record_report_events('created', batch)
+            created.extend(batch)
+        return created
+
+    def seed_upvotes(self, reports, users, mean):
+        if not reports or not users or mean <= 0:
+            return 0
+        total = 0
+        for start in range(0, len(reports), self.batch_size):
+            batch = reports[start:start + self.batch_size]
+            upvotes = []
+            for report in batch:
+                # Heavy-tailed: most reports get a few votes, some get many
+                count = min(int(self.rng.expovariate(1 / mean)), len(users))
+                for user in self.rng.sample(users, count):
+                    upvotes.append(ReportUpvote(report=report, user=user))
+                report.upvote_count = count
+                report.hot_score = hot_score(count, report.created_at)
+            with transaction.atomic():
+                ReportUpvote.objects.bulk_create(upvotes)
+                last_seq = TableVersion.allocate(CitizenReport.CHANGE_SEQ_COUNTER, count=len(batch))
+                for seq, report in enumerate(batch, start=last_seq - len(batch) + 1):
+                    report.change_seq = seq
+                CitizenReport.objects.bulk_update(batch, ['upvote_count', 'hot_score', 'change_seq'])
+                TableVersion.bump('reports')
+            total += len(upvotes)
+        return total
+
+    def seed_completed(self, reports, teams, share):
+        if not teams or share <= 0:
+            return 0
+        now = timezone.now()
+        resolved, tasks = [], []
+        for report in reports:
+            if self.rng.random() >= share:
+                continue
+            # Median about six hours, with a long tail
+            completed_at = min(report.created_at + timedelta(hours=self.rng.lognormvariate(1.8, 1.0)), now)
+            report.status = 'resolved'
+            report.assigned_team = report.assigned_team or self.rng.choice(teams)
+            report.updated_at = completed_at
+            resolved.append(report)
+            tasks.append(CompletedTask(report=report, notes='Cleared by the response team', completed_at=completed_at))
+
+        fields = CompletedTask._meta.get_field('completed_at'), CitizenReport._meta.get_field('updated_at')
+        for start in range(0, len(resolved), self.batch_size):
+            batch = resolved[start:start + self.batch_size]
+            with transaction.atomic(), explicit_timestamps(*fields):
+                last_seq = TableVersion.allocate(CitizenReport.CHANGE_SEQ_COUNTER, count=len(batch))
+                for seq, report in enumerate(batch, start=last_seq - len(batch) + 1):
+                    report.change_seq = seq
+                CitizenReport.objects.bulk_update(batch, ['status', 'assigned_team', 'updated_at', 'change_seq'])
+                CompletedTask.objects.bulk_create(tasks[start:start + self.batch_size])
+                TableVersion.bump('reports')
+                TableVersion.bump('completed_tasks')
+        return len(tasks)
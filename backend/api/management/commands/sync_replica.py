@@ -0,0 +1,46 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.routers import replica_alias
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the primary SQLite database onto the read replica with the online '
+        'backup API. A stand-in for real replication in development and tests.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Keep syncing every this many seconds (default: sync once and exit).',
+        )
+        parser.add_argument('--pages', type=int, default=256, help='Pages copied per backup step.')
+
+    def handle(self, *args, **options):
+        alias = replica_alias()
+        if alias is None:
+            raise CommandError('No replica database configured (set BLUEGUARD_REPLICA_DB_PATH).')
+        primary, replica = settings.DATABASES['default'], settings.DATABASES[alias]
+        if 'sqlite3' not in primary['ENGINE'] or 'sqlite3' not in replica['ENGINE']:
+            raise CommandError('sync_replica only copies SQLite databases; use real replication otherwise.')
+
+        while True:
+            started = time.perf_counter()
+            source = sqlite3.connect(str(primary['NAME']))
+            target = sqlite3.connect(str(replica['NAME']), timeout=30)
+            try:
+                # Copies in steps, so readers of the replica are only blocked briefly
+                source.backup(target, pages=options['pages'])
+            finally:
+                target.close()
+                source.close()
+            self.stdout.write(self.style.SUCCESS(
+                f"Replica synced in {(time.perf_counter() - started) * 1000:.0f} ms."
+            ))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
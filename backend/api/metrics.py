@@ -0,0 +1,226 @@
+"""
+In-process request metrics, exposed in the Prometheus text format at /metrics.
+
+Every thread records into its own shard (plain dicts, no locks), so the
+request path only pays for a few dict updates. A scrape sums the shards of
+all threads that ever recorded. Metrics are per process: with several worker
+processes, scrape each one (or run one worker per metrics port).
+
+``MetricsMiddleware`` records per-route latency, status codes and the number
+and duration of database queries; ``track_upstream`` times outbound calls
+(weather and location services) and charges them to the current request too.
+Gauges (``set_gauge``) hold a single process-wide value and are not sharded.
+"""
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+# name -> (type, help, buckets or None)
+METRICS = {
+    'blueguard_http_requests_total': (
+        'counter', 'HTTP requests by route, method and status code.', None),
+    'blueguard_http_request_duration_seconds': (
+        'histogram', 'HTTP request latency by route and method.', LATENCY_BUCKETS),
+    'blueguard_http_request_db_queries': (
+        'histogram', 'Database queries per HTTP request, by route.', QUERY_COUNT_BUCKETS),
+    'blueguard_http_request_db_seconds': (
+        'histogram', 'Time spent in database queries per HTTP request, by route.', LATENCY_BUCKETS),
+    'blueguard_http_request_upstream_seconds': (
+        'histogram', 'Time spent in outbound calls per HTTP request, by route.', LATENCY_BUCKETS),
+    'blueguard_upstream_requests_total': (
+        'counter', 'Outbound calls by service and outcome.', None),
+    'blueguard_upstream_request_duration_seconds': (
+        'histogram', 'Outbound call latency by service.', LATENCY_BUCKETS),
+    'blueguard_rate_limited_total': (
+        'counter', 'Requests rejected with 429, by scope and reason (rate or concurrency).', None),
+    'blueguard_log_records_dropped_total': (
+        'counter', 'Log records dropped because the background log queue was full.', None),
+    'blueguard_circuit_breaker_state': (
+        'gauge', 'Circuit breaker state by breaker: 0 closed, 1 half-open, 2 open.', None),
+    'blueguard_upstream_cache_total': (
+        'counter', 'Cached upstream lookups by cache and result (fresh, stale or miss).', None),
+}
+
+_shards = []
+_shards_lock = threading.Lock()
+_local = threading.local()
+_gauges = {}
+# Per-request accumulator of [db queries, db seconds, upstream seconds]
+_request_stats = ContextVar('metrics_request_stats', default=None)
+
+
+def _shard():
+    shard = getattr(_local, 'shard', None)
+    if shard is None:
+        shard = _local.shard = {}
+        # Only taken once per thread
+        with _shards_lock:
+            _shards.append(shard)
+    return shard
+
+
+def inc(name, labels, value=1):
+    """Add ``value`` to a counter; ``labels`` is a tuple of (name, value) pairs."""
+    shard = _shard()
+    key = (name, labels)
+    shard[key] = shard.get(key, 0) + value
+
+
+def observe(name, labels, value):
+    """Record ``value`` in a histogram; ``labels`` is a tuple of (name, value) pairs."""
+    shard = _shard()
+    key = (name, labels)
+    series = shard.get(key)
+    buckets = METRICS[name][2]
+    if series is None:
+        # Per-bucket (non-cumulative) counts, then count and sum
+        series = shard[key] = [0] * (len(buckets) + 2)
+    for index, bound in enumerate(buckets):
+        if value <= bound:
+            series[index] += 1
+            break
+    series[-2] += 1
+    series[-1] += value
+
+
+def set_gauge(name, labels, value):
+    """Set a gauge; the last value set by any thread wins."""
+    _gauges[(name, labels)] = value
+
+
+@contextmanager
+def track_upstream(service):
+    """Time an outbound call to ``service``; an exception counts as an error."""
+    start = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'ok'
+    finally:
+        elapsed = time.perf_counter() - start
+        inc('blueguard_upstream_requests_total', (('service', service), ('outcome', outcome)))
+        observe('blueguard_upstream_request_duration_seconds', (('service', service),), elapsed)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats[2] += elapsed
+
+
+def _time_query(execute, sql, params, many, context):
+    stats = _request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats[0] += 1
+        stats[1] += time.perf_counter() - start
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_number(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def render():
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    with _shards_lock:
+        shards = list(_shards)
+    totals = {}
+    for shard in shards:
+        # Copy first: the owning thread may add keys while we iterate
+        for key, value in list(shard.items()):
+            if isinstance(value, list):
+                total = totals.get(key)
+                if total is None:
+                    totals[key] = list(value)
+                else:
+                    for index, count in enumerate(value):
+                        total[index] += count
+            else:
+                totals[key] = totals.get(key, 0) + value
+    totals.update(_gauges)
+
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        series = sorted((labels, value) for (metric, labels), value in totals.items() if metric == name)
+        if not series:
+            continue
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in series:
+            if kind in ('counter', 'gauge'):
+                lines.append(f'{name}{_format_labels(labels)} {_format_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, value):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", bound),))} {cumulative}')
+            lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {value[-2]}')
+            lines.append(f'{name}_count{_format_labels(labels)} {value[-2]}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_number(value[-1])}')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """
+    Record latency, status, DB queries and upstream time of every request,
+    labelled by its URL route pattern (not the raw path, to bound the number
+    of series). Put it first in MIDDLEWARE so the timing covers the others.
+    """
+
+    def __init__(self, get_response):
+        from django.db import connections
+
+        self.get_response = get_response
+        self.connections = connections
+
+    def __call__(self, request):
+        stats = [0, 0.0, 0.0]
+        token = _request_stats.set(stats)
+        start = time.perf_counter()
+        status = 500
+        try:
+            with ExitStack() as stack:
+                for connection in self.connections.all():
+                    stack.enter_context(connection.execute_wrapper(_time_query))
+                response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_stats.reset(token)
+            match = getattr(request, 'resolver_match', None)
+            route = ('route', f'/{match.route}' if match and match.route else 'unmatched')
+            inc('blueguard_http_requests_total', (route, ('method', request.method), ('status', str(status))))
+            observe('blueguard_http_request_duration_seconds', (route, ('method', request.method)), elapsed)
+            observe('blueguard_http_request_db_queries', (route,), stats[0])
+            observe('blueguard_http_request_db_seconds', (route,), stats[1])
+            if stats[2]:
+                observe('blueguard_http_request_upstream_seconds', (route,), stats[2])
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint. Requires ``Authorization: Bearer <METRICS_TOKEN>`` when that is set."""
+    from django.conf import settings
+    from django.http import HttpResponse
+
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token and request.headers.get('Authorization', '') != f'Bearer {token}':
+        return HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+    return HttpResponse(render(), content_type='text/plain; version=0.0.4; charset=utf-8')
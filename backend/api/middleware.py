@@ -0,0 +1,168 @@
+import hashlib
+import json
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, JsonResponse
+
+from . import routers
+
+UNSAFE_METHODS = {'POST', 'PUT', 'PATCH', 'DELETE'}
+# Transient outcomes a client should be able to retry with the same key
+NON_REPLAYABLE_STATUSES = {408, 409, 425, 429}
+SKIPPED_RESPONSE_HEADERS = {'set-cookie', 'vary', 'content-length'}
+
+
+class IdempotencyMiddleware:
+    """
+    Replay the stored response when a mutating request is retried with the same
+    ``Idempotency-Key`` header, instead of running the view again.
+
+    Keys are scoped to the caller's Authorization header, or to the client
+    address for anonymous callers. The first request
+    takes a per-key lock (an atomic ``cache.add``); concurrent duplicates wait
+    for it to finish and then get its response. Records live in the
+    ``IDEMPOTENCY_CACHE_ALIAS`` cache, which bounds their number and age. Use a
+    shared cache backend there when running several worker processes.
+    """
+    header = 'Idempotency-Key'
+    poll_interval = 0.05
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        key = request.headers.get(self.header)
+        if not key or request.method not in UNSAFE_METHODS:
+            return self.get_response(request)
+        if len(key) > 255:
+            return JsonResponse({'detail': f'{self.header} must be at most 255 characters'}, status=400)
+
+        cache = caches[getattr(settings, 'IDEMPOTENCY_CACHE_ALIAS', 'default')]
+        lock_timeout = getattr(settings, 'IDEMPOTENCY_LOCK_TIMEOUT', 60)
+        caller = request.headers.get('Authorization') or f"ip:{request.META.get('REMOTE_ADDR', '')}"
+        scope = hashlib.sha256(f"{caller}\0{key}".encode()).hexdigest()
+        record_key = f'idempotency:{scope}'
+        lock_key = f'{record_key}:lock'
+        fingerprint = self.fingerprint(request)
+
+        owner = uuid.uuid4().hex
+        deadline = time.monotonic() + lock_timeout
+        while True:
+            record = cache.get(record_key)
+            if record is not None:
+                if record['fingerprint'] != fingerprint:
+                    return JsonResponse({
+                        'detail': f'{self.header} was already used for a different request'
+                    }, status=422)
+                return self.replay(record)
+            if cache.add(lock_key, owner, timeout=lock_timeout):
+                break
+            if time.monotonic() >= deadline:
+                response = JsonResponse({
+                    'detail': f'A request with this {self.header} is still being processed'
+                }, status=409)
+                response['Retry-After'] = '1'
+                return response
+            time.sleep(self.poll_interval)
+
+        try:
+            response = self.get_response(request)
+            if self.is_replayable(response):
+                cache.set(record_key, {
+                    'fingerprint': fingerprint,
+                    'status': response.status_code,
+                    'headers': [
+                        (name, value) for name, value in response.items()
+                        if name.lower() not in SKIPPED_RESPONSE_HEADERS
+                    ],
+                    'content': response.content,
+                })
+        finally:
+            if cache.get(lock_key) == owner:
+                cache.delete(lock_key)
+        return response
+
+    def fingerprint(self, request):
+        """
+        Identify the request payload so a reused key with a different body is refused.
+
+        Multipart bodies are fingerprinted from their parsed fields and the
+        upload digests computed by HashingUploadHandler, so large files are
+        never read into memory (and retries with a new boundary still match).
+        Resumable upload chunks (an ``Upload-Offset`` header) and other raw
+        bodies too large to buffer are fingerprinted from their offset, length
+        and type, plus the client's ``Content-Digest`` if it sends one, so the
+        view can still stream them.
+        """
+        hasher = hashlib.sha256(f'{request.method}\0{request.path}\0'.encode())
+        if request.method == 'POST' and request.content_type == 'multipart/form-data':
+            fields = sorted((name, request.POST.getlist(name)) for name in request.POST)
+            files = sorted(
+                (name, [getattr(upload, 'content_digest', None) or upload.size for upload in request.FILES.getlist(name)])
+                for name in request.FILES
+            )
+            hasher.update(json.dumps([fields, files], default=str).encode())
+        elif 'Upload-Offset' in request.headers or self.too_large_to_buffer(request):
+            hasher.update('\0'.join(
+                request.headers.get(name, '')
+                for name in ('Upload-Offset', 'Content-Length', 'Content-Type', 'Content-Digest')
+            ).encode())
+        else:
+            hasher.update(request.body)
+        return hasher.hexdigest()
+
+    def too_large_to_buffer(self, request):
+        limit = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        try:
+            return limit is not None and int(request.META.get('CONTENT_LENGTH') or 0) > limit
+        except ValueError:
+            return False
+
+    def is_replayable(self, response):
+        if getattr(response, 'streaming', False):
+            return False
+        if not 200 <= response.status_code < 500 or response.status_code in NON_REPLAYABLE_STATUSES:
+            return False
+        max_bytes = getattr(settings, 'IDEMPOTENCY_MAX_RESPONSE_BYTES', 1024 * 1024)
+        return len(response.content) <= max_bytes
+
+    def replay(self, record):
+        response = HttpResponse(record['content'], status=record['status'])
+        for name, value in record['headers']:
+            response[name] = value
+        response['Idempotent-Replayed'] = 'true'
+        return response
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Read-your-writes for the replica router (api/routers.py).
+
+    A caller (identified by their Authorization header) whose request wrote to
+    the primary is pinned to the primary for ``REPLICA_STICKY_SECONDS``, so the
+    next dashboard read sees their change even if the replica lags behind.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        authorization = request.headers.get('Authorization')
+        if not authorization or routers.replica_alias() is None:
+            return self.get_response(request)
+
+        cache = caches[getattr(settings, 'REPLICA_STICKY_CACHE_ALIAS', 'default')]
+        sticky_key = 'replica-sticky:' + hashlib.sha256(authorization.encode()).hexdigest()
+        pin_token = routers.pin_to_primary(cache.get(sticky_key) is not None)
+        write_token = routers.track_writes()
+        try:
+            response = self.get_response(request)
+            if routers.wrote():
+                cache.set(sticky_key, True, timeout=getattr(settings, 'REPLICA_STICKY_SECONDS', 5))
+        finally:
+            routers.reset(write_token)
+            routers.reset(pin_token)
+        return response
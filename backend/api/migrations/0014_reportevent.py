@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:41
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_tableversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report_id', models.BigIntegerField(db_index=True)),
+                ('kind', models.CharField(choices=[('created', 'Created'), ('assigned', 'Assigned'), ('completed', 'Completed'), ('deleted', 'Deleted')], max_length=20)),
+                ('payload', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:43
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_change_seq(apps, schema_editor):
+    """Number existing reports in updated_at order and start the counter after them"""
+    CitizenReport = apps.get_model('api', 'CitizenReport')
+    TableVersion = apps.get_model('api', 'TableVersion')
+    reports = list(CitizenReport.objects.order_by('updated_at', 'id').only('id'))
+    for seq, report in enumerate(reports, start=1):
+        report.change_seq = seq
+    CitizenReport.objects.bulk_update(reports, ['change_seq'], batch_size=500)
+    TableVersion.objects.update_or_create(
+        name='report_changes', defaults={'version': len(reports), 'updated_at': timezone.now()}
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_reportevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report_id', models.BigIntegerField()),
+                ('reporter_email', models.EmailField(max_length=254)),
+                ('change_seq', models.BigIntegerField(db_index=True)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='citizenreport',
+            name='change_seq',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_change_seq, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='citizenreport',
+            index=models.Index(fields=['reporter_email', 'change_seq'], name='api_citizen_reporte_016f23_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reporttombstone',
+            index=models.Index(fields=['reporter_email', 'change_seq'], name='api_reportt_reporte_bf1f67_idx'),
+        ),
+    ]
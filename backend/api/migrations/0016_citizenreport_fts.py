@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:46
+
+from django.db import migrations
+
+from api import search
+
+
+def create_fts_index(apps, schema_editor):
+    # Other databases fall back to LIKE search in api/search.py
+    if schema_editor.connection.vendor == 'sqlite':
+        search.create_index(schema_editor.connection)
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        search.drop_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_report_change_seq'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:54
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_citizenreport_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IncidentCluster',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cell', models.CharField(max_length=255)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('location', models.CharField(max_length=255)),
+                ('description', models.TextField()),
+                ('signature', models.JSONField(default=list)),
+                ('report_count', models.PositiveIntegerField(default=0)),
+                ('first_reported_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_reported_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-last_reported_at'],
+                'indexes': [models.Index(fields=['cell', 'last_reported_at'], name='api_inciden_cell_28378e_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='citizenreport',
+            name='cluster',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reports', to='api.incidentcluster'),
+        ),
+    ]
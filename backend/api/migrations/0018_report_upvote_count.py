@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:56
+
+import math
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_upvotes(apps, schema_editor):
+    """Count existing upvotes and score every report (same formula as api.ranking.hot_score)"""
+    CitizenReport = apps.get_model('api', 'CitizenReport')
+    epoch = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    decay = getattr(settings, 'REPORT_HOT_DECAY_SECONDS', 45000)
+    reports = list(CitizenReport.objects.annotate(votes=Count('upvotes')).only('id', 'created_at'))
+    for report in reports:
+        report.upvote_count = report.votes
+        report.hot_score = round(
+            math.log10(1 + report.votes) + (report.created_at - epoch).total_seconds() / decay, 7
+        )
+    CitizenReport.objects.bulk_update(reports, ['upvote_count', 'hot_score'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_incidentcluster'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='citizenreport',
+            name='hot_score',
+            field=models.FloatField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='citizenreport',
+            name='upvote_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_upvotes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_report_upvote_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='responseteam',
+            name='base_latitude',
+            field=models.DecimalField(blank=True, decimal_places=8, max_digits=11, null=True),
+        ),
+        migrations.AddField(
+            model_name='responseteam',
+            name='base_longitude',
+            field=models.DecimalField(blank=True, decimal_places=8, max_digits=11, null=True),
+        ),
+        migrations.AddField(
+            model_name='responseteam',
+            name='capacity',
+            field=models.PositiveIntegerField(default=5),
+        ),
+    ]
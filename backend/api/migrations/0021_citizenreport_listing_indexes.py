@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_resolutionrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='citizenreport',
+            index=models.Index(fields=['-created_at'], name='api_citizen_created_292d33_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='citizenreport',
+            index=models.Index(fields=['status', '-created_at'], name='api_citizen_status_a51ace_idx'),
+        ),
+    ]
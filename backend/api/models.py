@@ -1,8 +1,10 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser, User
 from django.contrib.auth.hashers import make_password, check_password
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 import secrets
+import uuid
 
 
 # Add your models here
@@ -138,15 +140,59 @@ class CitizenReport(models.Model):
         ('resolved', 'Resolved'),
     ], default='pending')
     assigned_team = models.ForeignKey('ResponseTeam', on_delete=models.SET_NULL, null=True, blank=True, related_name='reports')
+    # Incident this report was deduplicated into when it was filed (api/dedup.py)
+    cluster = models.ForeignKey('IncidentCluster', on_delete=models.SET_NULL, null=True, blank=True, related_name='reports')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Position in the delta-sync stream; a fresh value is allocated on every write
+    change_seq = models.BigIntegerField(default=0, db_index=True, editable=False)
+    # Denormalised ReportUpvote count and the time-decayed ranking derived from
+    # it (api/ranking.py); kept in step by the upvote endpoints
+    upvote_count = models.PositiveIntegerField(default=0, editable=False)
+    hot_score = models.FloatField(default=0, db_index=True, editable=False)
+
+    # TableVersion counter that change_seq values are allocated from
+    CHANGE_SEQ_COUNTER = 'report_changes'
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['reporter_email', 'change_seq']),
+            # The newest-first report lists, unfiltered and by status
+            models.Index(fields=['-created_at']),
+            models.Index(fields=['status', '-created_at']),
+        ]
 
     def __str__(self):
         return f"Report from {self.reporter_name} at {self.location}"
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.hot_score:
+            from .ranking import hot_score
+            self.hot_score = hot_score(self.upvote_count, self.created_at or timezone.now())
+        with transaction.atomic():
+            self.change_seq = TableVersion.allocate(self.CHANGE_SEQ_COUNTER)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'change_seq'}
+            super().save(*args, **kwargs)
+
+
+class ReportTombstone(models.Model):
+    """Marks a deleted report for delta sync (GET /api/reports/changes/)"""
+    report_id = models.BigIntegerField()
+    reporter_email = models.EmailField()
+    change_seq = models.BigIntegerField(db_index=True)
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['reporter_email', 'change_seq']),
+        ]
+
+    def __str__(self):
+        return f"Tombstone for report #{self.report_id}"
+
 
 class CompletedTask(models.Model):
     """Tracks reports that have been completed"""
@@ -161,6 +207,32 @@ class CompletedTask(models.Model):
         return f"Completed task for report #{self.report_id}"
 
 
+class ResolutionRollup(models.Model):
+    """
+    Time-to-resolution of the reports a team completed on one day: a count,
+    sum and t-digest of the seconds from report creation to completion
+    (api/analytics.py). Updated as reports are completed; team is null for
+    reports completed without a team, or whose team was deleted (its rows are
+    folded into the team-less ones first, see api/signals.py).
+    """
+    team = models.ForeignKey('ResponseTeam', on_delete=models.CASCADE, null=True, blank=True, related_name='resolution_rollups')
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+    total_seconds = models.FloatField(default=0)
+    digest = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-day']
+        unique_together = ('team', 'day')
+        indexes = [
+            models.Index(fields=['day']),
+        ]
+
+    def __str__(self):
+        return f"Resolutions for team #{self.team_id} on {self.day} ({self.count})"
+
+
 class ReportUpvote(models.Model):
     """Track which users upvoted which reports"""
     report = models.ForeignKey(CitizenReport, on_delete=models.CASCADE, related_name='upvotes')
@@ -207,6 +279,10 @@ class ResponseTeam(models.Model):
     ]
     name = models.CharField(max_length=100, unique=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Active')
+    # Where the team is dispatched from, and how many open reports it can hold
+    base_latitude = models.DecimalField(max_digits=11, decimal_places=8, null=True, blank=True)
+    base_longitude = models.DecimalField(max_digits=11, decimal_places=8, null=True, blank=True)
+    capacity = models.PositiveIntegerField(default=5)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -215,3 +291,151 @@ class ResponseTeam(models.Model):
     def __str__(self):
         return f"{self.name} - {self.status}"
 
+
+
+class MediaBlob(models.Model):
+    """A stored media file, shared by every report/profile field holding the same bytes"""
+    digest = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['ref_count', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+
+
+class UploadSession(models.Model):
+    """A resumable upload of a report image/audio file, assembled chunk by chunk on disk"""
+    FIELD_CHOICES = [
+        ('image', 'Image'),
+        ('audio', 'Audio'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.CharField(max_length=64, db_index=True)  # "admin:<id>" or "user:<id>"
+    field = models.CharField(max_length=20, choices=FIELD_CHOICES)
+    file_name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    total_size = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Upload {self.id} ({self.field}, {self.total_size} bytes)"
+
+    def is_expired(self):
+        return timezone.now() > self.expires_at
+
+
+class UploadChunk(models.Model):
+    """A byte range received for an UploadSession; chunks may arrive in any order"""
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='chunks')
+    offset = models.BigIntegerField()
+    size = models.PositiveIntegerField()
+    received_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['offset']
+        unique_together = ('session', 'offset')
+
+    def __str__(self):
+        return f"Chunk {self.offset}+{self.size} of upload {self.session_id}"
+
+
+class TableVersion(models.Model):
+    """
+    Change counter per table, bumped on every write (see api/signals.py).
+    List endpoints derive their ETag/Last-Modified from it without touching
+    the rows themselves.
+    """
+    name = models.CharField(max_length=64, primary_key=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+    @classmethod
+    def bump(cls, *names, by=1):
+        now = timezone.now()
+        for name in names:
+            updated = cls.objects.filter(name=name).update(version=models.F('version') + by, updated_at=now)
+            if not updated:
+                _, created = cls.objects.get_or_create(name=name, defaults={'version': by, 'updated_at': now})
+                if not created:
+                    cls.objects.filter(name=name).update(version=models.F('version') + by, updated_at=now)
+
+    @classmethod
+    def allocate(cls, name, count=1):
+        """
+        Reserve ``count`` consecutive values of the ``name`` counter and return
+        the last one. The row stays write-locked until the caller's
+        transaction commits, so values become visible in allocation order.
+        """
+        with transaction.atomic():
+            cls.bump(name, by=count)
+            # select_for_update routes the read to the primary
+            return cls.objects.select_for_update().filter(name=name).values_list('version', flat=True).get()
+
+
+class ReportEvent(models.Model):
+    """
+    Append-only change feed of citizen reports. The auto-increment id is the
+    event's sequence number, which SSE clients resume from (Last-Event-ID).
+    """
+    KIND_CHOICES = [
+        ('created', 'Created'),
+        ('assigned', 'Assigned'),
+        ('completed', 'Completed'),
+        ('deleted', 'Deleted'),
+    ]
+
+    # Not a foreign key: events outlive the reports they describe
+    report_id = models.BigIntegerField(db_index=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    payload = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"#{self.id} {self.kind} report {self.report_id}"
+
+
+class IncidentCluster(models.Model):
+    """
+    Group of near-duplicate citizen reports about the same incident: close
+    together, filed within a time window and with similar descriptions.
+    """
+    # Grid cell (or normalised location text for reports without coordinates)
+    cell = models.CharField(max_length=255)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    location = models.CharField(max_length=255)
+    description = models.TextField()
+    # MinHash signature of the first report's description
+    signature = models.JSONField(default=list)
+    report_count = models.PositiveIntegerField(default=0)
+    first_reported_at = models.DateTimeField(default=timezone.now)
+    last_reported_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-last_reported_at']
+        indexes = [
+            models.Index(fields=['cell', 'last_reported_at']),
+        ]
+
+    def __str__(self):
+        return f"Incident at {self.location} ({self.report_count} reports)"
@@ -0,0 +1,222 @@
+"""
+On-demand request profiling.
+
+An admin can profile one request by sending ``X-Profile: cprofile`` (or
+``sample``) or adding ``?profile=cprofile`` to the URL, with their admin token
+in ``Authorization``. Requests without a valid admin token are served
+normally. ``cprofile`` records every call with cProfile and stores a pstats
+file; ``sample`` captures the request thread's stack every
+``PROFILE_SAMPLE_INTERVAL`` seconds and stores collapsed stacks, ready for
+flamegraph.pl or speedscope, at much lower overhead.
+
+With ``PROFILE_SAMPLE_RATE = N`` one in N of all requests is profiled in
+``sample`` mode without being asked. Profiles go to ``PROFILE_DIR``, which
+keeps the newest ``PROFILE_KEEP``. The response of a profiled request carries
+``X-Profile-Id`` and ``X-Profile-Mode``; admins fetch the profile from
+/api/debug/profiles/<id>/. Only one cProfile run can be active in a process
+(Python 3.12+), so a ``cprofile`` request arriving during another one is
+sampled instead.
+"""
+import cProfile
+import itertools
+import json
+import logging
+import marshal
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+MODES = ('cprofile', 'sample')
+EXTENSIONS = {'cprofile': '.prof', 'sample': '.collapsed'}
+PROFILE_ID_RE = re.compile(r'^\d{13}-[0-9a-f]{8}$')
+
+
+def profile_dir():
+    return str(getattr(settings, 'PROFILE_DIR', os.path.join(settings.BASE_DIR, 'profiles')))
+
+
+class StackSampler:
+    """Count the stacks of one thread, sampled from a background thread."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if frames:
+                self.stacks[';'.join(reversed(frames))] += 1
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+def _admin_for(request):
+    from .models import AdminToken
+
+    authorization = request.headers.get('Authorization', '')
+    if not authorization.startswith('Token '):
+        return None
+    admin_token = AdminToken.objects.select_related('admin').filter(key=authorization[len('Token '):].strip()).first()
+    if admin_token is None or not admin_token.admin.is_active:
+        return None
+    return admin_token.admin
+
+
+def _write_atomic(path, data):
+    temporary = f'{path}.tmp'
+    with open(temporary, 'wb' if isinstance(data, bytes) else 'w') as handle:
+        handle.write(data)
+    os.replace(temporary, path)
+
+
+def _prune(directory, keep):
+    names = sorted(name[:-len('.json')] for name in os.listdir(directory) if name.endswith('.json'))
+    for profile_id in names[:max(len(names) - keep, 0)]:
+        for extension in ('.json', *EXTENSIONS.values()):
+            try:
+                os.remove(os.path.join(directory, profile_id + extension))
+            except FileNotFoundError:
+                pass
+
+
+def save_profile(mode, data, metadata):
+    """Store a profile and its metadata; returns the profile id."""
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    profile_id = f'{int(time.time() * 1000):013d}-{uuid.uuid4().hex[:8]}'
+    _write_atomic(os.path.join(directory, profile_id + EXTENSIONS[mode]), data)
+    _write_atomic(os.path.join(directory, profile_id + '.json'), json.dumps({'id': profile_id, 'mode': mode, **metadata}))
+    _prune(directory, getattr(settings, 'PROFILE_KEEP', 200))
+    return profile_id
+
+
+def list_profiles():
+    """Metadata of the stored profiles, newest first."""
+    directory = profile_dir()
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as handle:
+                profiles.append(json.load(handle))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+def load_profile(profile_id):
+    """(metadata, path of the profile data) for a stored profile, or None."""
+    if not PROFILE_ID_RE.match(profile_id):
+        return None
+    directory = profile_dir()
+    try:
+        with open(os.path.join(directory, profile_id + '.json')) as handle:
+            metadata = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    path = os.path.join(directory, profile_id + EXTENSIONS.get(metadata.get('mode'), ''))
+    if not os.path.exists(path):
+        return None
+    return metadata, path
+
+
+class ProfilingMiddleware:
+    """Profile admin-requested and sampled requests (see the module docstring)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.requests = itertools.count(1)
+
+    def __call__(self, request):
+        mode = request.headers.get('X-Profile') or request.GET.get('profile')
+        trigger = 'requested'
+        if mode:
+            if mode not in MODES or _admin_for(request) is None:
+                return self.get_response(request)
+        else:
+            rate = getattr(settings, 'PROFILE_SAMPLE_RATE', 0)
+            if not rate or next(self.requests) % rate:
+                return self.get_response(request)
+            mode, trigger = 'sample', 'sampled'
+        return self.profile(request, mode, trigger)
+
+    def profile(self, request, mode, trigger):
+        metadata = {}
+        start = time.perf_counter()
+        if mode == 'cprofile':
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another request holds the profiler
+                logger.info("cProfile is busy; sampling %s instead", request.path)
+                mode, metadata['requested_mode'] = 'sample', 'cprofile'
+        if mode == 'cprofile':
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        else:
+            sampler = StackSampler(threading.get_ident(), getattr(settings, 'PROFILE_SAMPLE_INTERVAL', 0.005))
+            sampler.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                sampler.stop()
+        duration = time.perf_counter() - start
+
+        if mode == 'cprofile':
+            profiler.create_stats()
+            # Same format as Profile.dump_stats, readable by pstats.Stats
+            data = marshal.dumps(profiler.stats)
+        else:
+            data = sampler.collapsed()
+        match = getattr(request, 'resolver_match', None)
+        try:
+            profile_id = save_profile(mode, data, {
+                'trigger': trigger,
+                'method': request.method,
+                'path': request.path,
+                'route': f'/{match.route}' if match and match.route else None,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 3),
+                'created_at': timezone.now().isoformat(),
+                **metadata,
+            })
+        except OSError as e:
+            # Never fail the request because its profile could not be stored
+            logger.error(f"Saving profile failed: {str(e)}")
+            return response
+        if trigger == 'requested':
+            response['X-Profile-Id'] = profile_id
+            response['X-Profile-Mode'] = mode
+        return response
@@ -0,0 +1,164 @@
+"""
+Slow query log.
+
+Every database connection gets an execute wrapper (installed on
+``connection_created``) that times each query. Queries slower than
+``SLOW_QUERY_THRESHOLD_MS`` are kept in an in-process ring buffer of the last
+``SLOW_QUERY_LOG_SIZE`` with their normalised SQL, the view and project code
+that issued them and, on SQLite, their ``EXPLAIN QUERY PLAN``. Query
+parameters are never stored: they hold emails, OTP codes and tokens.
+
+Admins read the buffer at /api/debug/slow-queries/, grouped by statement,
+with plans that scan a whole table flagged as ``full_scan``.
+"""
+import logging
+import re
+import sys
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_IN_LIST_RE = re.compile(r"IN \((?:\s*(?:%s|\?|\d+|'[^']*')\s*,?)+\)", re.IGNORECASE)
+_SPACE_RE = re.compile(r'\s+')
+EXPLAINED_STATEMENTS = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+
+_entries = deque(maxlen=getattr(settings, 'SLOW_QUERY_LOG_SIZE', 500))
+# Plans by normalised SQL, so a statement that is slow again is not re-explained
+_plans = {}
+_plans_lock = threading.Lock()
+_PROJECT_DIR = str(settings.BASE_DIR)
+# Instrumentation frames are not the caller
+_SKIPPED_MODULES = {'api.querylog', 'api.metrics'}
+
+
+def normalize_sql(sql):
+    """Collapse literals and IN lists so the same statement groups together."""
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    return _SPACE_RE.sub(' ', sql).replace('%s', '?').strip()
+
+
+def _project_frames(limit=6):
+    """Innermost project frames (module.function:line) of the current stack."""
+    frames = []
+    frame = sys._getframe(2)
+    while frame is not None and len(frames) < limit:
+        filename = frame.f_code.co_filename
+        module = frame.f_globals.get('__name__', '?')
+        if filename.startswith(_PROJECT_DIR) and 'site-packages' not in filename and module not in _SKIPPED_MODULES:
+            frames.append(f'{module}.{frame.f_code.co_name}:{frame.f_lineno}')
+        frame = frame.f_back
+    return frames
+
+
+def _explain(connection, sql, params):
+    if connection.vendor != 'sqlite' or not sql.lstrip().upper().startswith(EXPLAINED_STATEMENTS):
+        return None
+    # A fresh backend cursor: the query's own cursor still holds its rows,
+    # and Django's cursor wrapper would run this through the wrappers again
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+    except Exception as e:
+        return [f'EXPLAIN failed: {e}']
+    finally:
+        cursor.close()
+
+
+def is_full_scan(plan):
+    """True if a plan reads some table without an index."""
+    return any(
+        step.startswith('SCAN ') and 'USING' not in step and 'VIRTUAL TABLE' not in step
+        and not step.startswith('SCAN CONSTANT ROW')
+        for step in plan or ()
+    )
+
+
+def record_query(connection, sql, params, many, duration):
+    normalized = normalize_sql(sql)
+    plan = _plans.get(normalized)
+    if plan is None and not many:
+        plan = _explain(connection, sql, params)
+        with _plans_lock:
+            if len(_plans) >= 1000:
+                _plans.clear()
+            _plans[normalized] = plan
+    frames = _project_frames()
+    _entries.append({
+        'at': timezone.now().isoformat(),
+        'duration_ms': round(duration * 1000, 3),
+        'database': connection.alias,
+        'sql': normalized,
+        'many': many,
+        'view': next((frame for frame in frames if '.views.' in frame), None),
+        'stack': frames,
+        'plan': plan,
+        'full_scan': is_full_scan(plan),
+    })
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    threshold = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', None)
+    if threshold is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        if duration * 1000 >= threshold:
+            try:
+                record_query(context['connection'], sql, params, many, duration)
+            except Exception as e:
+                logger.warning(f"Recording slow query failed: {str(e)}")
+
+
+def install_wrapper(sender, connection, **kwargs):
+    """``connection_created`` receiver; wrappers outlive reconnections, so add it once."""
+    if slow_query_wrapper not in connection.execute_wrappers:
+        # First, not last: connections open mid-request, inside the
+        # ``execute_wrapper()`` blocks of MetricsMiddleware, which pop the
+        # last wrapper when they exit
+        connection.execute_wrappers.insert(0, slow_query_wrapper)
+
+
+def entries():
+    """Recorded slow queries, newest first."""
+    return list(reversed(list(_entries)))
+
+
+def clear():
+    _entries.clear()
+    with _plans_lock:
+        _plans.clear()
+
+
+def summary(records):
+    """Slow queries grouped by normalised SQL, the most total time first."""
+    groups = {}
+    for record in records:
+        group = groups.get(record['sql'])
+        if group is None:
+            group = groups[record['sql']] = {
+                'sql': record['sql'], 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                'views': set(), 'plan': record['plan'], 'full_scan': record['full_scan'],
+            }
+        group['count'] += 1
+        group['total_ms'] += record['duration_ms']
+        group['max_ms'] = max(group['max_ms'], record['duration_ms'])
+        if record['view']:
+            group['views'].add(record['view'].rsplit(':', 1)[0])
+    result = sorted(groups.values(), key=lambda group: group['total_ms'], reverse=True)
+    for group in result:
+        group['total_ms'] = round(group['total_ms'], 3)
+        group['views'] = sorted(group['views'])
+    return result
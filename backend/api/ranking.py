@@ -0,0 +1,54 @@
+"""
+Upvote counters and the "hot" ranking of reports.
+
+``CitizenReport.upvote_count`` mirrors the number of ReportUpvote rows and is
+changed with F() expressions in the same transaction as the upvote row, so
+concurrent votes never lose updates. ``hot_score`` is
+log10(1 + upvotes) + age bonus: every ``REPORT_HOT_DECAY_SECONDS`` of recency is
+worth ten times the upvotes. The score of a report only changes when it is
+voted on, so ranking is a plain ORDER BY on an indexed column.
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .models import CitizenReport, ReportUpvote
+
+HOT_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def hot_score(upvotes, created_at):
+    decay = getattr(settings, 'REPORT_HOT_DECAY_SECONDS', 45000)
+    return round(math.log10(1 + upvotes) + (created_at - HOT_EPOCH).total_seconds() / decay, 7)
+
+
+def _apply_delta(report, delta):
+    CitizenReport.objects.filter(pk=report.pk).update(upvote_count=F('upvote_count') + delta)
+    # select_for_update reads back from the primary, inside this transaction
+    report.upvote_count = CitizenReport.objects.select_for_update().values_list(
+        'upvote_count', flat=True
+    ).get(pk=report.pk)
+    report.hot_score = hot_score(report.upvote_count, report.created_at)
+    # Through save() so the change reaches delta sync and the list ETags
+    report.save(update_fields=['upvote_count', 'hot_score'])
+
+
+def add_upvote(report, user):
+    """Upvote ``report`` as ``user``; returns False if they had already upvoted it."""
+    with transaction.atomic():
+        _, created = ReportUpvote.objects.get_or_create(report=report, user=user)
+        if created:
+            _apply_delta(report, 1)
+    return created
+
+
+def remove_upvote(report, user):
+    """Withdraw ``user``'s upvote; returns False if there was none."""
+    with transaction.atomic():
+        deleted, _ = ReportUpvote.objects.filter(report=report, user=user).delete()
+        if deleted:
+            _apply_delta(report, -1)
+    return bool(deleted)
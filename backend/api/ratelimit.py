@@ -0,0 +1,188 @@
+"""
+Rate limiting and admission control for the public endpoints.
+
+Rate limits are token buckets, one per client and scope: a client is the
+authenticated user or admin, or the IP address of an anonymous caller. Each
+scope in ``RATE_LIMITS`` allows a sustained rate (tokens per second) and a
+burst. A bucket is stored as the single time at which it will be full again
+(GCRA, which behaves exactly like a token bucket), either in this process
+(the default) or, with ``RATE_LIMIT_CACHE_ALIAS``, in a cache shared by all
+the workers. Put the throttles on a view with DRF's ``@throttle_classes``;
+a rejected request gets a 429 with ``Retry-After`` before the view runs.
+
+``admission_limit(name)`` caps how many requests of an expensive view run at
+once in a process (``ADMISSION_LIMITS``), so slow upstream calls cannot take
+every worker thread. Requests over the cap get a 429 straight away instead of
+queueing.
+"""
+import functools
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.throttling import BaseThrottle
+
+from .metrics import inc
+
+
+def _take(tat, now, rate, burst):
+    """
+    Spend one token from a bucket that is full again at ``tat``.
+    Returns (new tat, 0) if allowed, else (``tat``, seconds until a token is free).
+    """
+    interval = 1.0 / rate
+    new_tat = max(tat, now) + interval
+    allowed_at = new_tat - burst * interval
+    if now < allowed_at:
+        return tat, allowed_at - now
+    return new_tat, 0.0
+
+
+class LocalBuckets:
+    """Buckets of this process; past ``max_keys``, the least recently used one is forgotten."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key, rate, burst, now):
+        with self.lock:
+            tat, retry_after = _take(self.buckets.get(key, now), now, rate, burst)
+            self.buckets[key] = tat
+            self.buckets.move_to_end(key)
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        return retry_after
+
+
+class CacheBuckets:
+    """
+    Buckets in a Django cache shared by the workers. The read and write are
+    not atomic, so concurrent requests from one client can overspend a
+    bucket slightly; entries expire once their bucket is full.
+    """
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def take(self, key, rate, burst, now):
+        key = f'ratelimit:{key}'
+        tat, retry_after = _take(self.cache.get(key, now), now, rate, burst)
+        if not retry_after:
+            self.cache.set(key, tat, timeout=math.ceil(tat - now) + 1)
+        return retry_after
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def bucket_store():
+    global _store
+    alias = getattr(settings, 'RATE_LIMIT_CACHE_ALIAS', None)
+    with _store_lock:
+        if _store is None or getattr(_store, 'alias', None) != alias:
+            _store = CacheBuckets(alias) if alias else LocalBuckets(getattr(settings, 'RATE_LIMIT_MAX_KEYS', 100000))
+            _store.alias = alias
+    return _store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Token bucket per client for ``scope``; scopes missing from ``RATE_LIMITS`` are unlimited."""
+
+    scope = None
+
+    def client_key(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            # Admins and users have separate id sequences
+            return f'{type(user).__name__.lower()}:{user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        limit = getattr(settings, 'RATE_LIMITS', {}).get(self.scope)
+        if not limit:
+            return True
+        rate, burst = limit
+        self.retry_after = bucket_store().take(f'{self.scope}:{self.client_key(request)}', rate, burst, time.time())
+        if self.retry_after:
+            inc('blueguard_rate_limited_total', (('scope', self.scope), ('reason', 'rate')))
+            return False
+        return True
+
+    def wait(self):
+        return self.retry_after
+
+
+class ChatbotThrottle(TokenBucketThrottle):
+    scope = 'chatbot'
+
+
+class OTPThrottle(TokenBucketThrottle):
+    scope = 'otp'
+
+
+class OTPVerifyThrottle(TokenBucketThrottle):
+    """OTP guesses, per client and email, so one code cannot be brute-forced."""
+
+    scope = 'otp_verify'
+
+    def client_key(self, request):
+        email = str(request.data.get('email') or '').strip().lower()
+        return f'{super().client_key(request)}:{email}'
+
+
+class PublicWriteThrottle(TokenBucketThrottle):
+    scope = 'public_writes'
+
+
+class PublicReadThrottle(TokenBucketThrottle):
+    scope = 'public_reads'
+
+
+_semaphores = {}
+_semaphores_lock = threading.Lock()
+
+
+def _semaphore(name):
+    limit = getattr(settings, 'ADMISSION_LIMITS', {}).get(name)
+    if not limit:
+        return None
+    with _semaphores_lock:
+        semaphore = _semaphores.get((name, limit))
+        if semaphore is None:
+            semaphore = _semaphores[(name, limit)] = threading.BoundedSemaphore(limit)
+    return semaphore
+
+
+def admission_limit(name):
+    """
+    Run at most ``ADMISSION_LIMITS[name]`` calls of the view at once in this
+    process and answer the rest with 429 without waiting. Put it directly
+    above the view function (below ``@api_view``), so throttled requests are
+    turned away before they take a slot.
+    """
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            semaphore = _semaphore(name)
+            if semaphore is None:
+                return view_func(request, *args, **kwargs)
+            if not semaphore.acquire(blocking=False):
+                inc('blueguard_rate_limited_total', (('scope', name), ('reason', 'concurrency')))
+                retry_after = getattr(settings, 'ADMISSION_RETRY_AFTER', 1)
+                return Response({
+                    'detail': f'Too many requests in progress. Try again in {retry_after} seconds.'
+                }, status=status.HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': str(retry_after)})
+            try:
+                return view_func(request, *args, **kwargs)
+            finally:
+                semaphore.release()
+        return wrapper
+    return decorator
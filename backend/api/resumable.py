@@ -0,0 +1,145 @@
+"""
+Resumable uploads: chunks are written straight into a preallocated part file at
+their offset, so clients can retry or upload chunks in parallel; the file is
+handed to the normal report serializer once every byte has arrived.
+"""
+import hashlib
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.utils import timezone
+
+from .upload_handlers import SNIFF_BYTES, is_allowed_type, sniff_content_type
+
+COPY_BUFFER_SIZE = 64 * 1024
+
+
+class ChunkError(Exception):
+    """Raised when a chunk cannot be accepted (bad offset/length, wrong type...)"""
+
+
+def upload_root():
+    return str(getattr(settings, 'RESUMABLE_UPLOAD_ROOT', os.path.join(settings.MEDIA_ROOT, '.resumable')))
+
+
+def session_ttl():
+    return timedelta(hours=getattr(settings, 'RESUMABLE_UPLOAD_TTL_HOURS', 24))
+
+
+def chunk_size():
+    return getattr(settings, 'RESUMABLE_UPLOAD_CHUNK_SIZE', 1024 * 1024)
+
+
+def max_chunk_size():
+    return getattr(settings, 'RESUMABLE_UPLOAD_MAX_CHUNK_SIZE', 8 * 1024 * 1024)
+
+
+def part_path(session):
+    return os.path.join(upload_root(), f'{session.id}.part')
+
+
+def allocate(session):
+    """Create the sparse part file that chunks are written into."""
+    os.makedirs(upload_root(), exist_ok=True)
+    with open(part_path(session), 'wb') as part:
+        part.truncate(session.total_size)
+
+
+def write_chunk(session, offset, stream, length):
+    """
+    Copy ``length`` bytes from ``stream`` into the part file at ``offset``.
+
+    Each request writes through its own file handle into a disjoint region
+    of the preallocated file, so chunks of the same upload can be sent in
+    parallel.
+    """
+    if offset < 0 or length <= 0 or offset + length > session.total_size:
+        raise ChunkError('Chunk does not fit inside the declared upload size.')
+    if length > max_chunk_size():
+        raise ChunkError(f'Chunks may be at most {max_chunk_size()} bytes.')
+
+    with open(part_path(session), 'r+b') as part:
+        part.seek(offset)
+        remaining = length
+        while remaining:
+            data = stream.read(min(COPY_BUFFER_SIZE, remaining))
+            if not data:
+                raise ChunkError('Request body is shorter than Content-Length.')
+            if part.tell() == 0 and len(data) >= min(SNIFF_BYTES, session.total_size):
+                _check_type(session, data[:SNIFF_BYTES])
+            part.write(data)
+            remaining -= len(data)
+
+
+def missing_ranges(session, chunks):
+    """Return the ``[start, end)`` byte ranges not covered by ``chunks`` yet."""
+    missing = []
+    covered = 0
+    for offset, size in sorted(chunks):
+        if offset > covered:
+            missing.append((covered, offset))
+        covered = max(covered, offset + size)
+    if covered < session.total_size:
+        missing.append((covered, session.total_size))
+    return missing
+
+
+def assemble(session):
+    """
+    Hash and sniff the completed part file and wrap it as an uploaded file.
+
+    The returned object carries the same ``content_digest``/``sniffed_type``
+    attributes as files from HashingUploadHandler, so the serializer and the
+    content-addressed storage treat both upload paths the same way.
+    """
+    path = part_path(session)
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as part:
+        head = part.read(SNIFF_BYTES)
+        hasher.update(head)
+        for data in iter(lambda: part.read(COPY_BUFFER_SIZE), b''):
+            hasher.update(data)
+    sniffed_type = _check_type(session, head)
+
+    upload = AssembledUpload(
+        file=open(path, 'rb'),
+        name=session.file_name,
+        content_type=sniffed_type or session.content_type,
+        size=session.total_size,
+    )
+    upload.content_digest = hasher.hexdigest()
+    upload.sniffed_type = sniffed_type
+    return upload
+
+
+def discard(session):
+    try:
+        os.remove(part_path(session))
+    except FileNotFoundError:
+        pass
+
+
+def expiry_from_now():
+    return timezone.now() + session_ttl()
+
+
+def _check_type(session, head):
+    sniffed_type = sniff_content_type(head) or ''
+    if not is_allowed_type(session.field, sniffed_type):
+        raise ChunkError(f'Unsupported {session.field} file type.')
+    return sniffed_type
+
+
+class AssembledUpload(UploadedFile):
+    """A finished resumable upload, backed by its part file on disk."""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+    def close(self):
+        try:
+            return self.file.close()
+        except FileNotFoundError:
+            pass
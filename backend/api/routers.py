@@ -0,0 +1,84 @@
+"""
+Primary/replica database routing.
+
+Writes always go to ``default``. Reads go to the ``REPLICA_DATABASE`` alias only
+inside views decorated with ``read_replica``, and never for a caller who wrote
+something in the last ``REPLICA_STICKY_SECONDS`` (read-your-writes): the
+``ReplicaStickinessMiddleware`` pins such callers to the primary.
+"""
+import functools
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_use_replica = ContextVar('use_replica', default=False)
+_pinned_to_primary = ContextVar('pinned_to_primary', default=False)
+_wrote = ContextVar('wrote', default=False)
+
+
+def replica_alias():
+    alias = getattr(settings, 'REPLICA_DATABASE', 'replica')
+    return alias if alias in settings.DATABASES else None
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and not _pinned_to_primary.get():
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == replica_alias():
+            # The replica is a copy of the primary, never migrated directly
+            return False
+        return None
+
+
+def read_replica(view_func):
+    """
+    Serve the view's queries from the replica.
+
+    Put it directly above the view function (below ``@api_view``) so that
+    authentication still runs against the primary.
+    """
+    @functools.wraps(view_func)
+    def wrapper(*args, **kwargs):
+        token = _use_replica.set(True)
+        try:
+            return view_func(*args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+    return wrapper
+
+
+def pin_to_primary(pinned=True):
+    """Force reads in the current context to the primary; returns a reset token."""
+    return _pinned_to_primary.set(pinned)
+
+
+def track_writes():
+    """Start recording whether a write is routed in the current context."""
+    return _wrote.set(False)
+
+
+def wrote():
+    return _wrote.get()
+
+
+def mark_written():
+    """Record a write in the current context that is routed from another thread."""
+    _wrote.set(True)
+
+
+def reset(token):
+    """Undo a ``pin_to_primary``/``track_writes`` call."""
+    token.var.reset(token)
@@ -0,0 +1,154 @@
+"""
+Full-text search over citizen reports.
+
+On SQLite, reports are indexed in an external-content FTS5 table
+(``api_citizenreport_fts``) kept in sync by triggers, so bulk inserts and
+``QuerySet.update()`` are indexed too. Queries are ranked with bm25 and every
+term is matched as a prefix ("flood nea" finds "flooding near ..."). Searches
+with more than ``REPORT_SEARCH_RANK_WINDOW`` matches (after the caller's
+filters) return only the newest that many. Other databases fall back to
+``icontains`` lookups.
+"""
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'api_citizenreport_fts'
+REPORT_TABLE = 'api_citizenreport'
+# Indexed columns and their bm25 weights
+FTS_COLUMNS = [('location', 4.0), ('description', 1.0), ('reporter_name', 2.0)]
+
+_COLUMNS = ', '.join(column for column, _ in FTS_COLUMNS)
+_NEW = ', '.join(f'new.{column}' for column, _ in FTS_COLUMNS)
+_OLD = ', '.join(f'old.{column}' for column, _ in FTS_COLUMNS)
+
+CREATE_TABLE_SQL = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {_COLUMNS},
+        content='{REPORT_TABLE}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+"""
+TRIGGERS = {
+    f'{FTS_TABLE}_ai': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {REPORT_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, {_COLUMNS}) VALUES (new.id, {_NEW});
+        END
+    """,
+    f'{FTS_TABLE}_ad': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {REPORT_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_COLUMNS}) VALUES ('delete', old.id, {_OLD});
+        END
+    """,
+    f'{FTS_TABLE}_au': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {_COLUMNS} ON {REPORT_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_COLUMNS}) VALUES ('delete', old.id, {_OLD});
+            INSERT INTO {FTS_TABLE}(rowid, {_COLUMNS}) VALUES (new.id, {_NEW});
+        END
+    """,
+}
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_enabled(using='default'):
+    return connections[using].vendor == 'sqlite'
+
+
+def create_index(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_TABLE_SQL)
+        for sql in TRIGGERS.values():
+            cursor.execute(sql)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def drop_index(connection):
+    with connection.cursor() as cursor:
+        for name in TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def ensure_index(connection):
+    """
+    Recreate the sync triggers (and rebuild the index) if they are missing.
+
+    SQLite migrations that rebuild ``api_citizenreport`` (e.g. adding a foreign
+    key) drop its triggers with the old table; this runs after every migrate.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name LIKE %s",
+            [f'{FTS_TABLE}%'],
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+    if FTS_TABLE not in existing:
+        # Not migrated this far yet
+        return False
+    if set(TRIGGERS) <= existing:
+        return False
+    create_index(connection)
+    return True
+
+
+def match_expression(text):
+    """
+    Turn free text into an FTS5 query: every word must match, as a prefix.
+
+    Words are quoted, so FTS5 operators and punctuation typed by users are
+    searched for literally instead of raising syntax errors.
+    """
+    tokens = TOKEN_RE.findall(text or '')
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search_reports(queryset, text):
+    """
+    Restrict a CitizenReport queryset to reports matching ``text``, best first.
+
+    The result is still a queryset, so further filters, ``select_related`` and
+    slicing compose with the search.
+    """
+    expression = match_expression(text)
+    if not expression:
+        return queryset.none()
+    if not fts_enabled(queryset.db):
+        condition = Q()
+        for token in TOKEN_RE.findall(text):
+            condition &= (
+                Q(location__icontains=token) | Q(description__icontains=token) | Q(reporter_name__icontains=token)
+            )
+        return queryset.filter(condition)
+
+    weights = ', '.join(str(weight) for _, weight in FTS_COLUMNS)
+    where = [f'{FTS_TABLE}.rowid = {REPORT_TABLE}.id', f'{FTS_TABLE} MATCH %s']
+    params = [expression]
+    window = getattr(settings, 'REPORT_SEARCH_RANK_WINDOW', None)
+    if window:
+        # bm25 has to score every match before sorting, which is what makes
+        # very common terms slow. Only score the newest ``window`` matches
+        # that also pass the queryset's own filters (finding them needs no
+        # scoring): the cutoff is the id of the window-th newest such match.
+        # It constrains the FTS rowid, so older matches are never scored.
+        matches = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [expression])
+        newest = queryset.filter(id__in=matches).order_by('-id').values('id')[window - 1:window]
+        newest_sql, newest_params = newest.query.sql_with_params()
+        where.append(f'{FTS_TABLE}.rowid >= coalesce(({newest_sql}), 0)')
+        params += list(newest_params)
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=where,
+        params=params,
+        select={'search_rank': f'bm25({FTS_TABLE}, {weights})'},
+        order_by=['search_rank'],
+    )
+
+
+def ensure_index_after_migrate(sender, using='default', **kwargs):
+    """``post_migrate`` receiver wrapping ``ensure_index``."""
+    if fts_enabled(using):
+        ensure_index(connections[using])
@@ -1,7 +1,45 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
-from .models import Admin, AdminToken, UserProfile, FloodAlert, CitizenReport, ResponseTeam, CompletedTask
+from django.db import transaction
+from django.utils import timezone
+from .models import (
+    Admin, AdminToken, UserProfile, FloodAlert, CitizenReport, ResponseTeam, CompletedTask, TableVersion,
+    IncidentCluster,
+)
+from .changefeed import record_report_event, record_report_events
+from .dedup import match_cluster
+from .ranking import hot_score
+from .upload_handlers import IMAGE_TYPES, sniff_file
+
+
+class HeaderImageField(serializers.FileField):
+    """
+    Image field validated from the file header only.
+
+    DRF's ImageField runs Pillow's verify() over the whole file; this field
+    trusts the magic bytes sniffed by HashingUploadHandler and lets Pillow
+    parse just the header to reject corrupt or oversized (decompression bomb)
+    images without decoding any pixel data.
+    """
+    default_error_messages = {
+        'invalid_image': 'Upload a valid image. The file you uploaded was either not an image or a corrupted image.',
+    }
+
+    def to_internal_value(self, data):
+        file_object = super().to_internal_value(data)
+        if sniff_file(file_object) not in IMAGE_TYPES:
+            self.fail('invalid_image')
+        try:
+            from PIL import Image
+            file_object.seek(0)
+            with Image.open(file_object) as image:
+                file_object.content_type = Image.MIME.get(image.format, file_object.content_type)
+        except Exception:
+            self.fail('invalid_image')
+        finally:
+            file_object.seek(0)
+        return file_object
 
 
 class UserProfileSerializer(serializers.ModelSerializer):
@@ -38,7 +76,7 @@ class AdminSignupSerializer(serializers.Serializer):
     last_name = serializers.CharField(required=False, allow_blank=True)
     phone_number = serializers.CharField(required=False, allow_blank=True)
     address = serializers.CharField(required=False, allow_blank=True)
-    aadhaar_card = serializers.ImageField(required=False, allow_null=True)
+    aadhaar_card = HeaderImageField(required=False, allow_null=True)
     otp_verified = serializers.BooleanField(required=False, default=False)
     
     def validate_username(self, value):
@@ -109,7 +147,7 @@ class CitizenSignupSerializer(serializers.Serializer):
     last_name = serializers.CharField(required=False, allow_blank=True)
     phone_number = serializers.CharField(required=False, allow_blank=True)
     address = serializers.CharField(required=False, allow_blank=True)
-    aadhaar_card = serializers.ImageField(required=False, allow_null=True)
+    aadhaar_card = HeaderImageField(required=False, allow_null=True)
     otp_verified = serializers.BooleanField(required=False, default=False)
     
     def validate_username(self, value):
@@ -264,6 +302,16 @@ class ResponseTeamSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at']
 
 
+class IncidentClusterSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = IncidentCluster
+        fields = [
+            'id', 'location', 'description', 'latitude', 'longitude',
+            'report_count', 'first_reported_at', 'last_reported_at'
+        ]
+        read_only_fields = fields
+
+
 class CompletedTaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = CompletedTask
@@ -271,8 +319,30 @@ class CompletedTaskSerializer(serializers.ModelSerializer):
         read_only_fields = ['completed_at']
 
 
+class CitizenReportListSerializer(serializers.ListSerializer):
+    """Creates all validated reports with a single bulk INSERT in one transaction"""
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            reports = [
+                CitizenReport(**self.child.creation_attrs(attrs))
+                for attrs in validated_data
+            ]
+            # bulk_create bypasses CitizenReport.save(), so allocate the block here
+            last_seq = TableVersion.allocate(CitizenReport.CHANGE_SEQ_COUNTER, count=len(reports))
+            now = timezone.now()
+            for seq, report in enumerate(reports, start=last_seq - len(reports) + 1):
+                report.change_seq = seq
+                report.hot_score = hot_score(0, now)
+            reports = CitizenReport.objects.bulk_create(reports)
+            # bulk_create sends no post_save signals
+            TableVersion.bump('reports')
+            record_report_events('created', reports)
+            return reports
+
+
 class CitizenReportSerializer(serializers.ModelSerializer):
-    image = serializers.ImageField(required=False, allow_null=True)
+    image = HeaderImageField(required=False, allow_null=True)
     audio = serializers.FileField(required=False, allow_null=True)
     assigned_team = ResponseTeamSerializer(read_only=True)
     assigned_team_id = serializers.IntegerField(write_only=True, required=False, allow_null=True)
@@ -283,10 +353,13 @@ class CitizenReportSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'reporter_name', 'reporter_email', 'location', 'description',
             'latitude', 'longitude', 'image', 'audio', 'status',
-            'assigned_team', 'assigned_team_id', 'completed_task',
+            'assigned_team', 'assigned_team_id', 'completed_task', 'cluster', 'upvote_count',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at', 'assigned_team', 'completed_task']
+        read_only_fields = [
+            'id', 'created_at', 'updated_at', 'assigned_team', 'completed_task', 'cluster', 'upvote_count'
+        ]
+        list_serializer_class = CitizenReportListSerializer
     
     def validate_latitude(self, value):
         """Round latitude to 8 decimal places to fit the field constraint"""
@@ -304,7 +377,11 @@ class CitizenReportSerializer(serializers.ModelSerializer):
             value = Decimal(str(value)).quantize(Decimal('0.00000001'), rounding=ROUND_HALF_UP)
         return value
     
-    def create(self, validated_data):
+    def creation_attrs(self, validated_data):
+        """
+        Model field values for a new report; shared by single and bulk creation.
+        Must run inside the transaction that inserts the report.
+        """
         # Set status to pending by default (only when creating)
         validated_data['status'] = 'pending'
         # Handle assigned_team_id
@@ -312,7 +389,20 @@ class CitizenReportSerializer(serializers.ModelSerializer):
             team_id = validated_data.pop('assigned_team_id')
             if team_id:
                 validated_data['assigned_team_id'] = team_id
-        return super().create(validated_data)
+        # Attach the report to the incident it duplicates (or a new one)
+        validated_data['cluster'] = match_cluster(
+            validated_data.get('location'),
+            validated_data.get('description'),
+            validated_data.get('latitude'),
+            validated_data.get('longitude'),
+        )
+        return validated_data
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            report = super().create(self.creation_attrs(validated_data))
+            record_report_event('created', report)
+        return report
     
     def update(self, instance, validated_data):
         # Handle assigned_team_id
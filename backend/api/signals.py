@@ -0,0 +1,116 @@
+"""
+Bump the TableVersion counters whenever a versioned model is saved or deleted.
+When a report is deleted, leave a tombstone for delta sync and uncount it from
+its incident cluster. When a team is deleted, its resolution rollups are
+folded into the team-less ones. When a media file is replaced or its row is
+deleted, its reference in the content-addressed store is released once the
+transaction commits.
+
+Writes that skip model signals (``bulk_create``, ``QuerySet.update``) must call
+``TableVersion.bump`` themselves.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+
+from .analytics import fold_team_rollups
+from .models import (
+    Admin, CitizenReport, CompletedTask, IncidentCluster, ReportTombstone, ResolutionRollup, ResponseTeam,
+    TableVersion, UserProfile,
+)
+from .storage import release_media
+
+# Model -> TableVersion name
+VERSIONED_MODELS = {
+    CitizenReport: 'reports',
+    ResponseTeam: 'teams',
+    CompletedTask: 'completed_tasks',
+    IncidentCluster: 'incidents',
+    ResolutionRollup: 'resolution_rollups',
+}
+
+
+def bump_table_version(sender, **kwargs):
+    TableVersion.bump(VERSIONED_MODELS[sender])
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(bump_table_version, sender=model, dispatch_uid=f'bump_table_version_{model.__name__}')
+    post_delete.connect(bump_table_version, sender=model, dispatch_uid=f'bump_table_version_{model.__name__}')
+
+
+def create_report_tombstone(sender, instance, **kwargs):
+    ReportTombstone.objects.create(
+        report_id=instance.pk,
+        reporter_email=instance.reporter_email,
+        change_seq=TableVersion.allocate(CitizenReport.CHANGE_SEQ_COUNTER),
+    )
+
+
+post_delete.connect(create_report_tombstone, sender=CitizenReport, dispatch_uid='create_report_tombstone')
+
+
+def uncount_clustered_report(sender, instance, **kwargs):
+    if instance.cluster_id:
+        IncidentCluster.objects.filter(pk=instance.cluster_id, report_count__gt=0).update(
+            report_count=F('report_count') - 1
+        )
+
+
+post_delete.connect(uncount_clustered_report, sender=CitizenReport, dispatch_uid='uncount_clustered_report')
+
+
+def fold_deleted_team_rollups(sender, instance, **kwargs):
+    fold_team_rollups(instance.pk)
+
+
+pre_delete.connect(fold_deleted_team_rollups, sender=ResponseTeam, dispatch_uid='fold_deleted_team_rollups')
+
+
+# Every model field whose files live in the content-addressed store
+MEDIA_FIELDS = [
+    (CitizenReport, 'image'),
+    (CitizenReport, 'audio'),
+    (Admin, 'aadhaar_card'),
+    (UserProfile, 'aadhaar_card'),
+]
+_media_fields = {}
+for model, field in MEDIA_FIELDS:
+    _media_fields.setdefault(model, []).append(field)
+
+
+def _media_names(instance):
+    """{field: stored name or None} of the media fields loaded on ``instance``."""
+    names = {}
+    for field in _media_fields[type(instance)]:
+        # Read the raw attribute: the descriptor would wrap it in a FieldFile
+        if field in instance.__dict__:
+            value = instance.__dict__[field]
+            names[field] = getattr(value, 'name', value) or None
+    return names
+
+
+def remember_media(sender, instance, **kwargs):
+    instance._stored_media = _media_names(instance)
+
+
+def release_replaced_media(sender, instance, created, **kwargs):
+    stored = getattr(instance, '_stored_media', {})
+    current = _media_names(instance)
+    if not created:
+        replaced = [name for field, name in stored.items() if name and current.get(field, name) != name]
+        if replaced:
+            transaction.on_commit(lambda: release_media(*replaced))
+    instance._stored_media = {**stored, **current}
+
+
+def release_deleted_media(sender, instance, **kwargs):
+    names = [name for name in _media_names(instance).values() if name]
+    if names:
+        transaction.on_commit(lambda: release_media(*names))
+
+
+for model in _media_fields:
+    post_init.connect(remember_media, sender=model, dispatch_uid=f'remember_media_{model.__name__}')
+    post_save.connect(release_replaced_media, sender=model, dispatch_uid=f'release_replaced_media_{model.__name__}')
+    post_delete.connect(release_deleted_media, sender=model, dispatch_uid=f'release_deleted_media_{model.__name__}')
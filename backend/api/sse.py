@@ -0,0 +1,224 @@
+"""
+Server-Sent Events stream of the report change feed, served straight from the
+ASGI application (see blueguard_backend/asgi.py).
+
+One ``ChangeFeedHub`` per process polls ReportEvent and fans new events out to
+every connected dashboard, so the database sees one small query per poll
+interval however many admins are watching. Clients reconnect with
+``Last-Event-ID`` (sent automatically by EventSource) and first receive the
+events they missed from the table.
+
+SQLite commits one writer at a time, so event ids become visible in order and
+a cursor on the last seen id never skips an event.
+"""
+import asyncio
+import json
+import logging
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from . import changefeed
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    def __init__(self, max_pending):
+        self.queue = asyncio.Queue(maxsize=max_pending)
+        # Set when the client fell too far behind; its stream is then closed
+        # and EventSource resumes from the table with Last-Event-ID.
+        self.overflowed = False
+
+
+class ChangeFeedHub:
+    """Single poller per event loop, fanning ReportEvents out to subscribers."""
+
+    def __init__(self):
+        self.subscribers = set()
+        self.last_seq = 0
+        self._task = None
+        self._loop = None
+
+    async def subscribe(self):
+        subscription = Subscription(getattr(settings, 'REPORT_EVENT_MAX_PENDING', 1000))
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            seq = await sync_to_async(changefeed.latest_seq)()
+            # Another subscriber may have started the poller while we waited
+            if self._task is None or self._task.done() or self._loop is not loop:
+                self.subscribers = set()
+                self.last_seq = seq
+                self._loop = loop
+                self._task = loop.create_task(self._poll())
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscribers.discard(subscription)
+
+    async def _poll(self):
+        interval = getattr(settings, 'REPORT_EVENT_POLL_INTERVAL', 1.0)
+        batch_size = getattr(settings, 'REPORT_EVENT_BATCH_SIZE', 500)
+        while True:
+            await asyncio.sleep(interval)
+            if not self.subscribers:
+                return
+            try:
+                events = await sync_to_async(changefeed.events_after)(self.last_seq, batch_size)
+            except Exception as e:
+                logger.error(f"Change feed poll failed: {str(e)}")
+                continue
+            while events:
+                for subscription in list(self.subscribers):
+                    for event in events:
+                        try:
+                            subscription.queue.put_nowait(event)
+                        except asyncio.QueueFull:
+                            subscription.overflowed = True
+                            self.subscribers.discard(subscription)
+                            break
+                self.last_seq = events[-1].id
+                if len(events) < batch_size:
+                    break
+                events = await sync_to_async(changefeed.events_after)(self.last_seq, batch_size)
+
+
+hub = ChangeFeedHub()
+
+
+def format_event(event):
+    data = json.dumps(changefeed.serialize_event(event), cls=DjangoJSONEncoder)
+    return f'id: {event.id}\nevent: {event.kind}\ndata: {data}\n\n'.encode()
+
+
+def _authenticate_admin(token_key):
+    from .models import AdminToken
+
+    if not token_key:
+        return None
+    admin_token = AdminToken.objects.select_related('admin').filter(key=token_key).first()
+    if admin_token is None or not admin_token.admin.is_active:
+        return None
+    return admin_token.admin
+
+
+def _request_token(headers, query):
+    authorization = headers.get(b'authorization', b'').decode('latin-1')
+    if authorization.startswith('Token '):
+        return authorization[len('Token '):].strip()
+    # EventSource cannot set headers, so browsers pass the token in the URL
+    return (query.get('token') or [''])[0]
+
+
+def _cors_headers(headers):
+    origin = headers.get(b'origin')
+    if not origin:
+        return []
+    allowed = getattr(settings, 'CORS_ALLOW_ALL_ORIGINS', False) or (
+        origin.decode('latin-1') in getattr(settings, 'CORS_ALLOWED_ORIGINS', [])
+    )
+    if not allowed:
+        return []
+    return [(b'access-control-allow-origin', origin), (b'access-control-allow-credentials', b'true')]
+
+
+async def _send_json(send, status, body, extra_headers=()):
+    payload = json.dumps(body).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), *extra_headers],
+    })
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+async def report_event_stream(scope, receive, send):
+    headers = dict(scope['headers'])
+    cors = _cors_headers(headers)
+    if scope['method'] != 'GET':
+        await _send_json(send, 405, {'detail': f"Method \"{scope['method']}\" not allowed."}, cors)
+        return
+
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    admin = await sync_to_async(_authenticate_admin)(_request_token(headers, query))
+    if admin is None:
+        await _send_json(send, 401, {'detail': 'Admin authentication required.'}, cors)
+        return
+
+    last_event_id = headers.get(b'last-event-id', b'').decode('latin-1') or (query.get('last_event_id') or [''])[0]
+    try:
+        cursor = int(last_event_id) if last_event_id else None
+    except ValueError:
+        cursor = None
+
+    subscription = await hub.subscribe()
+    disconnected = asyncio.Event()
+
+    async def watch_disconnect():
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                disconnected.set()
+                return
+
+    watcher = asyncio.ensure_future(watch_disconnect())
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+                *cors,
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n', 'more_body': True})
+
+        if cursor is None:
+            cursor = hub.last_seq
+        else:
+            # Replay what the client missed; live events it also receives
+            # from the hub are skipped by the cursor check below.
+            while True:
+                backlog = await sync_to_async(changefeed.events_after)(cursor)
+                for event in backlog:
+                    await send({'type': 'http.response.body', 'body': format_event(event), 'more_body': True})
+                    cursor = event.id
+                if len(backlog) < getattr(settings, 'REPORT_EVENT_BATCH_SIZE', 500):
+                    break
+
+        heartbeat = getattr(settings, 'REPORT_EVENT_HEARTBEAT', 15)
+        while not disconnected.is_set() and not subscription.overflowed:
+            getter = asyncio.ensure_future(subscription.queue.get())
+            done, _ = await asyncio.wait({getter, watcher}, timeout=heartbeat, return_when=asyncio.FIRST_COMPLETED)
+            if getter not in done:
+                getter.cancel()
+                if not disconnected.is_set():
+                    await send({'type': 'http.response.body', 'body': b': keep-alive\n\n', 'more_body': True})
+                continue
+            event = getter.result()
+            if event.id > cursor:
+                await send({'type': 'http.response.body', 'body': format_event(event), 'more_body': True})
+                cursor = event.id
+
+        if not disconnected.is_set():
+            await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        hub.unsubscribe(subscription)
+        watcher.cancel()
+
+
+def with_report_event_stream(application):
+    """Wrap the Django ASGI application so the stream path bypasses it."""
+    path = getattr(settings, 'REPORT_EVENT_STREAM_PATH', '/api/reports/events/stream/')
+
+    async def app(scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] == path:
+            await report_event_stream(scope, receive, send)
+        else:
+            await application(scope, receive, send)
+    return app
@@ -0,0 +1,170 @@
+import hashlib
+import logging
+import os
+import tempfile
+
+from django.core.files import locks
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+BLOB_PREFIX = 'blobs'
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that keeps every upload once, under its SHA-256 digest.
+
+    The name passed in by the field (e.g. ``reports/images/photo.jpg``) is only
+    used for its extension; the stored name is ``blobs/ab/cd/<digest>.jpg``.
+    Each successful save adds a reference to the matching ``MediaBlob`` row and
+    ``delete()`` only drops a reference. Unreferenced blobs are removed later by
+    the ``gc_media`` management command.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is derived from the content in _save(), so there is
+        # no need to probe the file system for a free name here.
+        return name
+
+    def blob_name(self, digest, name):
+        ext = os.path.splitext(name)[1].lower()
+        return f"{BLOB_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+    def _save(self, name, content):
+        digest = getattr(content, 'content_digest', None)
+        temp_path = None
+        if not digest:
+            temp_path, digest = self._spool(content)
+        try:
+            blob = self._add_reference(digest, self.blob_name(digest, name), content.size)
+            full_path = self.path(blob.name)
+            if not os.path.exists(full_path):
+                self._write_blob(full_path, content, temp_path)
+                temp_path = None
+            return blob.name
+        finally:
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _spool(self, content):
+        """Copy ``content`` to a temp file next to the blobs, hashing as it streams."""
+        blob_root = self.path(BLOB_PREFIX)
+        os.makedirs(blob_root, exist_ok=True)
+        hasher = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=blob_root, suffix='.upload')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks(chunk_size=HASH_CHUNK_SIZE):
+                    hasher.update(chunk)
+                    out.write(chunk)
+        except Exception:
+            os.remove(temp_path)
+            raise
+        return temp_path, hasher.hexdigest()
+
+    def _write_blob(self, full_path, content, temp_path):
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        if temp_path:
+            os.replace(temp_path, full_path)
+        elif hasattr(content, 'temporary_file_path'):
+            file_move_safe(content.temporary_file_path(), full_path, allow_overwrite=True)
+        else:
+            with open(full_path, 'wb') as out:
+                locks.lock(out, locks.LOCK_EX)
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks(chunk_size=HASH_CHUNK_SIZE):
+                    out.write(chunk)
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+
+    def _add_reference(self, digest, name, size):
+        from .models import MediaBlob
+
+        while True:
+            with transaction.atomic():
+                blob, created = MediaBlob.objects.get_or_create(
+                    digest=digest,
+                    defaults={'name': name, 'size': size or 0, 'ref_count': 1},
+                )
+                if created or MediaBlob.objects.filter(pk=blob.pk).update(
+                    ref_count=F('ref_count') + 1, updated_at=timezone.now()
+                ):
+                    return blob
+            # gc_media removed the row after we read it; its file is gone too
+
+    def delete(self, name):
+        self.release(name)
+
+    def release(self, name):
+        """
+        Drop one reference to ``name``. Returns True if the name was a tracked blob.
+
+        Files stored before content addressing was enabled have no ``MediaBlob``
+        row; those are removed immediately, as delete() used to do.
+        """
+        from .models import MediaBlob
+
+        if not name:
+            return False
+        updated = MediaBlob.objects.filter(name=name, ref_count__gt=0).update(
+            ref_count=F('ref_count') - 1, updated_at=timezone.now()
+        )
+        if updated:
+            return True
+        if not MediaBlob.objects.filter(name=name).exists():
+            super().delete(name)
+        return False
+
+    def purge(self, name):
+        """Remove the blob file itself. Only the GC sweep should call this."""
+        super().delete(name)
+
+
+def release_media(*names):
+    """
+    Release stored media files a model instance no longer references (see the
+    media receivers in api/signals.py).
+
+    Storage errors are logged and swallowed so they never fail the request.
+    """
+    for name in names:
+        if not name:
+            continue
+        try:
+            if hasattr(default_storage, 'release'):
+                default_storage.release(name)
+            elif default_storage.exists(name):
+                default_storage.delete(name)
+        except Exception:
+            logger.exception("Failed to release media file %s", name)
+
+
+def store_uploads(model, items, fields):
+    """
+    Store the uploaded files of ``items`` (validated data for ``model``) now,
+    replacing each by its stored name, so the row insert that follows does no
+    hashing or file moves (and holds no write lock or write-queue slot while
+    they run). Returns the stored names, to release if the insert fails.
+    """
+    stored = []
+    for data in items:
+        for field in fields:
+            upload = data.get(field)
+            if not upload or isinstance(upload, str):
+                continue
+            model_field = model._meta.get_field(field)
+            name = model_field.storage.save(
+                model_field.generate_filename(None, upload.name), upload, max_length=model_field.max_length
+            )
+            data[field] = name
+            stored.append(name)
+    return stored
@@ -0,0 +1,100 @@
+"""
+Merging t-digest (Dunning & Ertl): a streaming quantile sketch made of a few
+times ``compression`` weighted centroids, small near the tails so extreme
+quantiles stay accurate. Digests merge, so per-day sketches roll up into any
+date range. Stored as JSON in ResolutionRollup.digest.
+"""
+DEFAULT_COMPRESSION = 50
+
+
+class TDigest:
+    def __init__(self, centroids=(), minimum=None, maximum=None, compression=DEFAULT_COMPRESSION):
+        self.centroids = [[mean, weight] for mean, weight in centroids]
+        self.minimum = minimum
+        self.maximum = maximum
+        self.compression = compression
+        self._unmerged = []
+
+    @classmethod
+    def from_dict(cls, data, compression=DEFAULT_COMPRESSION):
+        data = data or {}
+        return cls(data.get('centroids', ()), data.get('min'), data.get('max'), compression)
+
+    def to_dict(self):
+        self.compress()
+        return {
+            'centroids': [[round(mean, 3), weight] for mean, weight in self.centroids],
+            'min': self.minimum,
+            'max': self.maximum,
+        }
+
+    @property
+    def count(self):
+        return sum(weight for _, weight in self.centroids) + sum(weight for _, weight in self._unmerged)
+
+    def add(self, value, weight=1):
+        self._unmerged.append([value, weight])
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+        if len(self._unmerged) > 5 * self.compression:
+            self.compress()
+
+    def merge(self, other):
+        if other.minimum is None:
+            return self
+        other.compress()
+        self._unmerged.extend([mean, weight] for mean, weight in other.centroids)
+        self.minimum = other.minimum if self.minimum is None else min(self.minimum, other.minimum)
+        self.maximum = other.maximum if self.maximum is None else max(self.maximum, other.maximum)
+        if len(self._unmerged) > 5 * self.compression:
+            self.compress()
+        return self
+
+    def compress(self):
+        if not self._unmerged:
+            return
+        points = sorted(self.centroids + self._unmerged)
+        self._unmerged = []
+        total = sum(weight for _, weight in points)
+        merged = []
+        mean, weight = points[0]
+        before = 0
+        for point_mean, point_weight in points[1:]:
+            # A centroid may hold at most 4 n q (1 - q) / compression points,
+            # where q is the quantile of its centre: tiny at the tails
+            q = (before + (weight + point_weight) / 2) / total
+            if weight + point_weight <= 4 * total * q * (1 - q) / self.compression:
+                weight += point_weight
+                mean += (point_mean - mean) * point_weight / weight
+            else:
+                merged.append([mean, weight])
+                before += weight
+                mean, weight = point_mean, point_weight
+        merged.append([mean, weight])
+        self.centroids = merged
+
+    def quantile(self, q):
+        """Estimated ``q``-quantile (0 <= q <= 1), or None for an empty digest."""
+        self.compress()
+        if not self.centroids:
+            return None
+        if len(self.centroids) == 1:
+            return self.centroids[0][0]
+        total = sum(weight for _, weight in self.centroids)
+        target = q * total
+        # Interpolate between centroid centres, pinned to min/max at the ends
+        previous_position, previous_value = 0, self.minimum
+        position = 0
+        for mean, weight in self.centroids:
+            centre = position + weight / 2
+            if target <= centre:
+                span = centre - previous_position
+                if span <= 0:
+                    return mean
+                return previous_value + (mean - previous_value) * (target - previous_position) / span
+            previous_position, previous_value = centre, mean
+            position += weight
+        span = total - previous_position
+        if span <= 0:
+            return self.maximum
+        return previous_value + (self.maximum - previous_value) * (target - previous_position) / span
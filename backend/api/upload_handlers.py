@@ -0,0 +1,188 @@
+"""
+Streaming upload handling for report media.
+
+``HashingUploadHandler`` replaces Django's memory/temporary-file handlers: every
+uploaded file is written to a temporary file in fixed-size chunks while its
+SHA-256 digest is computed and its leading bytes are sniffed. Oversized or
+mistyped files are dropped as soon as that is known, so memory use per upload
+stays constant regardless of the file size.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.http import QueryDict
+from django.utils.datastructures import MultiValueDict
+
+SNIFF_BYTES = 32
+
+IMAGE_TYPES = {'image/jpeg', 'image/png', 'image/gif', 'image/webp', 'image/bmp', 'image/tiff'}
+AUDIO_TYPES = {
+    'audio/mpeg', 'audio/wav', 'audio/ogg', 'audio/webm', 'audio/mp4',
+    'audio/flac', 'audio/aac', 'audio/amr',
+}
+
+# Which kind of media each upload field carries
+FIELD_KINDS = {
+    'image': 'image',
+    'aadhaar_card': 'image',
+    'audio': 'audio',
+}
+ALLOWED_TYPES = {
+    'image': IMAGE_TYPES,
+    'audio': AUDIO_TYPES,
+}
+
+DEFAULT_MAX_SIZES = {
+    'image': 10 * 1024 * 1024,
+    'audio': 25 * 1024 * 1024,
+    'default': 10 * 1024 * 1024,
+}
+
+
+def sniff_content_type(head):
+    """Guess a MIME type from the first bytes of a file, or None if unknown."""
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    if head.startswith(b'BM'):
+        return 'image/bmp'
+    if head[:4] in (b'II*\x00', b'MM\x00*'):
+        return 'image/tiff'
+    if head.startswith(b'RIFF') and head[8:12] == b'WEBP':
+        return 'image/webp'
+    if head.startswith(b'RIFF') and head[8:12] == b'WAVE':
+        return 'audio/wav'
+    if head.startswith(b'ID3') or head[:2] in (b'\xff\xfb', b'\xff\xf3', b'\xff\xf2'):
+        return 'audio/mpeg'
+    if head[:2] in (b'\xff\xf1', b'\xff\xf9'):
+        return 'audio/aac'
+    if head.startswith(b'OggS'):
+        return 'audio/ogg'
+    if head.startswith(b'fLaC'):
+        return 'audio/flac'
+    if head.startswith(b'#!AMR'):
+        return 'audio/amr'
+    if head.startswith(b'\x1a\x45\xdf\xa3'):
+        return 'audio/webm'
+    if head[4:8] == b'ftyp':
+        return 'audio/mp4'
+    return None
+
+
+def field_kind(field_name):
+    """Map an upload field name (``image``, ``audio_3``...) to its media kind."""
+    if field_name in FIELD_KINDS:
+        return FIELD_KINDS[field_name]
+    base, _, index = (field_name or '').rpartition('_')
+    if index.isdigit():
+        return FIELD_KINDS.get(base)
+    return None
+
+
+def max_upload_size(kind):
+    sizes = {**DEFAULT_MAX_SIZES, **getattr(settings, 'UPLOAD_MAX_SIZES', {})}
+    return sizes.get(kind) or sizes['default']
+
+
+def is_allowed_type(kind, content_type):
+    allowed = ALLOWED_TYPES.get(kind)
+    return allowed is None or content_type in allowed
+
+
+def sniff_file(file_object):
+    """Return the sniffed type of an uploaded file, reading only its header."""
+    sniffed = getattr(file_object, 'sniffed_type', None)
+    if sniffed:
+        return sniffed
+    position = file_object.tell() if hasattr(file_object, 'tell') else None
+    file_object.seek(0)
+    head = file_object.read(SNIFF_BYTES)
+    file_object.seek(position or 0)
+    return sniff_content_type(head)
+
+
+def record_upload_error(request, field_name, message):
+    if request is None:
+        return
+    if not hasattr(request, 'upload_errors'):
+        request.upload_errors = {}
+    request.upload_errors.setdefault(field_name, []).append(message)
+
+
+class HashingUploadHandler(FileUploadHandler):
+    """
+    Stream each uploaded file to a temporary file, hashing and sniffing on the fly.
+
+    The resulting ``TemporaryUploadedFile`` carries ``content_digest`` (SHA-256
+    hex) and ``sniffed_type`` so later stages (validation, the content-addressed
+    storage) never have to read the file again. Rejected files are skipped and
+    the reason is recorded in ``request.upload_errors``.
+    """
+    chunk_size = 64 * 1024
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        max_request = getattr(settings, 'UPLOAD_MAX_REQUEST_SIZE', None)
+        if max_request and content_length and content_length > max_request:
+            record_upload_error(
+                self.request, 'non_field_errors',
+                f'Upload is too large ({content_length} bytes, limit {max_request}).',
+            )
+            # Short-circuit parsing: nothing from this body is buffered.
+            return QueryDict(encoding=encoding), MultiValueDict()
+        return None
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        self.kind = field_kind(field_name)
+        self.limit = max_upload_size(self.kind)
+        self.hasher = hashlib.sha256()
+        self.head = b''
+        self.sniffed_type = None
+        self.received = 0
+        self.file = TemporaryUploadedFile(self.file_name, self.content_type, 0, self.charset, self.content_type_extra)
+        if content_length and content_length > self.limit:
+            self._reject(f'File is too large (limit {self.limit} bytes).')
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.limit:
+            self._reject(f'File is too large (limit {self.limit} bytes).')
+        if len(self.head) < SNIFF_BYTES:
+            self.head += raw_data[:SNIFF_BYTES - len(self.head)]
+            if len(self.head) >= SNIFF_BYTES and not self._check_type():
+                self._reject(f'Unsupported {self.kind} file type.')
+        self.hasher.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        if self.sniffed_type is None and not self._check_type():
+            # Files shorter than SNIFF_BYTES are only sniffed here, after the
+            # parser's SkipFile handling, so drop them by returning nothing.
+            record_upload_error(self.request, self.field_name, f'Unsupported {self.kind} file type.')
+            self.file.close()
+            return None
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.content_digest = self.hasher.hexdigest()
+        self.file.sniffed_type = self.sniffed_type
+        return self.file
+
+    def upload_interrupted(self):
+        if hasattr(self, 'file'):
+            self.file.close()
+
+    def _check_type(self):
+        self.sniffed_type = sniff_content_type(self.head) or ''
+        return not self.kind or is_allowed_type(self.kind, self.sniffed_type)
+
+    def _reject(self, message):
+        record_upload_error(self.request, self.field_name, message)
+        # Closing the temporary file deletes it; the parser drains the rest
+        # of this part without buffering it.
+        self.file.close()
+        raise SkipFile()
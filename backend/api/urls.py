@@ -12,15 +12,33 @@ urlpatterns = [
     path('auth/otp/generate/', views.generate_otp, name='generate-otp'),
     path('auth/otp/verify/', views.verify_otp, name='verify-otp'),
     path('reports/create/', views.create_report, name='create-report'),
+    path('reports/bulk/', views.bulk_create_reports, name='bulk-create-reports'),
     path('reports/', views.get_reports, name='get-reports'),
     path('reports/count/', views.get_report_count, name='get-report-count'),
     path('reports/all/', views.get_all_reports, name='get-all-reports'),
+    path('reports/events/', views.report_events, name='report-events'),
+    path('reports/changes/', views.report_changes, name='report-changes'),
+    path('reports/search/', views.search_reports, name='search-reports'),
+    path('reports/hot/', views.hot_reports, name='hot-reports'),
+    path('reports/<int:report_id>/upvote/', views.upvote_report, name='upvote-report'),
     path('reports/<int:report_id>/assign-team/', views.assign_team_to_report, name='assign-team-to-report'),
     path('reports/<int:report_id>/complete/', views.complete_report, name='complete-report'),
     path('reports/<int:report_id>/delete/', views.delete_report, name='delete-report'),
+    path('incidents/', views.list_incidents, name='list-incidents'),
+    path('incidents/<int:incident_id>/', views.get_incident, name='get-incident'),
+    path('incidents/<int:incident_id>/assign-team/', views.assign_team_to_incident, name='assign-team-to-incident'),
+    path('uploads/', views.create_upload_session, name='create-upload-session'),
+    path('uploads/<uuid:upload_id>/', views.upload_session, name='upload-session'),
+    path('uploads/<uuid:upload_id>/finalize/', views.finalize_upload, name='finalize-upload'),
     path('teams/', views.list_teams, name='list-teams'),
     path('teams/create/', views.create_team, name='create-team'),
+    path('dispatch/plan/', views.plan_dispatch, name='plan-dispatch'),
+    path('dispatch/apply/', views.apply_dispatch, name='apply-dispatch'),
+    path('analytics/resolution-times/', views.resolution_times, name='resolution-times'),
     path('debug/request/', views.debug_request, name='debug-request'),
+    path('debug/profiles/', views.list_request_profiles, name='list-request-profiles'),
+    path('debug/profiles/<str:profile_id>/', views.get_request_profile, name='get-request-profile'),
+    path('debug/slow-queries/', views.slow_queries, name='slow-queries'),
     path('chatbot/query/', views.chatbot_query, name='chatbot-query'),
     path('alerts/mass-email/', views.send_mass_alert_email, name='send-mass-alert-email'),
 ]
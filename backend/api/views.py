@@ -1,15 +1,17 @@
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.authtoken.models import Token
 from django.conf import settings
-from django.core.files.storage import default_storage
 from django.views.decorators.csrf import csrf_exempt
 from django.core.mail import send_mail
 from django.contrib.auth import get_user_model
 
-from .models import Admin, AdminToken, CitizenReport, OTP, ResponseTeam, CompletedTask
+from .models import (
+    Admin, AdminToken, CitizenReport, IncidentCluster, OTP, ReportTombstone, ResolutionRollup, ResponseTeam,
+    CompletedTask, TableVersion, UploadSession, UploadChunk,
+)
 from .serializers import (
     AdminSignupSerializer,
     CitizenSignupSerializer,
@@ -19,7 +21,23 @@ from .serializers import (
     CitizenReportSerializer,
     ResponseTeamSerializer,
     CompletedTaskSerializer,
+    IncidentClusterSerializer,
 )
+from .analytics import record_resolution, summarize
+from .changefeed import events_after, latest_seq, record_report_event, serialize_event
+from .conditional import conditional_list
+from .db import run_write
+from .dispatch import apply_plan, dispatch_inputs, plan_dispatch as plan_assignments
+from .ranking import add_upvote, remove_upvote
+from .ratelimit import ChatbotThrottle, OTPThrottle, OTPVerifyThrottle, PublicReadThrottle, PublicWriteThrottle, admission_limit
+from .profiling import list_profiles, load_profile
+from .routers import read_replica
+from .search import search_reports as full_text_search
+from .storage import release_media, store_uploads
+from .upload_handlers import max_upload_size
+from . import querylog, resumable
+from django.db import transaction
+from django.db.models import Case, Value, When
 from django.utils import timezone
 from datetime import timedelta
 import random
@@ -53,20 +71,129 @@ def debug_request(request):
     import logging
     logger = logging.getLogger(__name__)
     
-    logger.info(f"=== DEBUG REQUEST ===")
-    logger.info(f"Method: {request.method}")
-    logger.info(f"Content-Type: {request.content_type}")
-    logger.info(f"Headers: {dict(request.headers)}")
-    logger.info(f"Request.data type: {type(request.data)}")
-    logger.info(f"Request.data: {request.data}")
-    logger.info(f"Request.FILES: {request.FILES}")
-    logger.info(f"Raw body length: {len(request.body) if request.body else 0}")
+    # One record with the request as extra fields; credentials in the
+    # headers and data are redacted by the log formatter (api/logconfig.py)
+    logger.info("Debug request: %s %s", request.method, request.path, extra={
+        'content_type': request.content_type,
+        'headers': dict(request.headers),
+        'data': request.data,
+        'files': {name: upload.size for name, upload in request.FILES.items()},
+    })
     
     return Response({
         'debug': 'Check server logs for request details'
     }, status=status.HTTP_200_OK)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def list_request_profiles(request):
+    """
+    Stored request profiles (see api/profiling.py), newest first. Admin only.
+    """
+    try:
+        if not isinstance(request.user, Admin):
+            return Response({
+                'detail': 'Only admins can read request profiles'
+            }, status=status.HTTP_403_FORBIDDEN)
+        return Response({
+            'profiles': list_profiles()
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f"List request profiles error: {str(e)}")
+        return Response({
+            'detail': 'An error occurred while listing profiles.',
+            'error': str(e) if settings.DEBUG else None
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_request_profile(request, profile_id):
+    """
+    Download a stored profile: a pstats file (cprofile mode) or collapsed
+    stacks (sample mode). ``?output=text`` renders a pstats profile as the
+    top functions by cumulative time. Admin only.
+    """
+    import io
+    import os
+    import pstats
+    from django.http import FileResponse, HttpResponse
+
+    try:
+        if not isinstance(request.user, Admin):
+            return Response({
+                'detail': 'Only admins can read request profiles'
+            }, status=status.HTTP_403_FORBIDDEN)
+        found = load_profile(profile_id)
+        if found is None:
+            return Response({
+                'detail': 'Profile not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        metadata, path = found
+
+        if metadata['mode'] == 'cprofile' and request.query_params.get('output') == 'text':
+            output = io.StringIO()
+            pstats.Stats(path, stream=output).sort_stats('cumulative').print_stats(60)
+            return HttpResponse(output.getvalue(), content_type='text/plain; charset=utf-8')
+        content_type = 'application/octet-stream' if metadata['mode'] == 'cprofile' else 'text/plain; charset=utf-8'
+        return FileResponse(
+            open(path, 'rb'), as_attachment=True, filename=os.path.basename(path), content_type=content_type
+        )
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f"Get request profile error: {str(e)}")
+        return Response({
+            'detail': 'An error occurred while reading the profile.',
+            'error': str(e) if settings.DEBUG else None
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def slow_queries(request):
+    """
+    The slow query log (see api/querylog.py), grouped by statement with each
+    statement's query plan, plus the ``limit`` most recent slow queries.
+    DELETE clears the log. Admin only.
+    """
+    try:
+        if not isinstance(request.user, Admin):
+            return Response({
+                'detail': 'Only admins can read the slow query log'
+            }, status=status.HTTP_403_FORBIDDEN)
+        if request.method == 'DELETE':
+            querylog.clear()
+            return Response({
+                'message': 'Slow query log cleared'
+            }, status=status.HTTP_200_OK)
+
+        try:
+            limit = max(0, min(int(request.query_params.get('limit', 50)), 500))
+        except ValueError:
+            return Response({
+                'detail': "'limit' must be an integer"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        records = querylog.entries()
+        return Response({
+            'threshold_ms': settings.SLOW_QUERY_THRESHOLD_MS,
+            'recorded': len(records),
+            'statements': querylog.summary(records),
+            'recent': records[:limit]
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f"Slow queries error: {str(e)}")
+        return Response({
+            'detail': 'An error occurred while reading the slow query log.',
+            'error': str(e) if settings.DEBUG else None
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def admin_signup(request):
@@ -85,6 +212,14 @@ def admin_signup(request):
         # Handle file uploads - aadhaar card
         if 'aadhaar_card' in request.FILES:
             signup_data['aadhaar_card'] = request.FILES['aadhaar_card']
+
+        # Files rejected while streaming (too large / wrong type) never reach the serializer
+        upload_errors = getattr(request, 'upload_errors', None)
+        if upload_errors:
+            return Response({
+                'detail': 'Validation failed',
+                'errors': upload_errors
+            }, status=status.HTTP_400_BAD_REQUEST)
         
         serializer = AdminSignupSerializer(data=signup_data)
         if serializer.is_valid():
@@ -132,6 +267,8 @@ def admin_signup(request):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@throttle_classes([PublicReadThrottle])
+@read_replica
 def get_report_count(request):
     """
     Return total number of citizen reports (all entries in CitizenReport table).
@@ -161,9 +298,7 @@ def citizen_signup(request):
     logger = logging.getLogger(__name__)
     
     try:
-        logger.info(f"Citizen signup request received")
-        logger.info(f"Request data type: {type(request.data)}")
-        logger.info(f"Request data keys: {list(request.data.keys()) if hasattr(request.data, 'keys') else 'N/A'}")
+        logger.debug("Citizen signup request received")
         
         # Prepare data - handle both JSON and FormData
         from django.http import QueryDict
@@ -175,9 +310,16 @@ def citizen_signup(request):
         # Handle file uploads - aadhaar card
         if 'aadhaar_card' in request.FILES:
             signup_data['aadhaar_card'] = request.FILES['aadhaar_card']
+
+        # Files rejected while streaming (too large / wrong type) never reach the serializer
+        upload_errors = getattr(request, 'upload_errors', None)
+        if upload_errors:
+            return Response({
+                'detail': 'Validation failed',
+                'errors': upload_errors
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        logger.info(f"Signup data keys: {list(signup_data.keys())}")
-        logger.info(f"Signup data: {signup_data}")
+        logger.debug("Citizen signup fields: %s", sorted(signup_data))
         
         serializer = CitizenSignupSerializer(data=signup_data)
         if serializer.is_valid():
@@ -185,7 +327,7 @@ def citizen_signup(request):
             # Delete any existing token for this user and create a new one
             Token.objects.filter(user=user).delete()
             token = Token.objects.create(user=user)
-            logger.info(f"Citizen signup successful for user: {user.username}")
+            logger.info("Citizen signup successful for user: %s", user.username)
             return Response({
                 'message': 'Citizen account created successfully',
                 'user': {
@@ -225,8 +367,7 @@ def user_login(request):
     import logging
     logger = logging.getLogger(__name__)
     
-    logger.info(f"Login request received")
-    logger.info(f"Request data: {request.data}")
+    logger.debug("Login request received")
     
     serializer = LoginSerializer(data=request.data)
     if serializer.is_valid():
@@ -246,7 +387,7 @@ def user_login(request):
             admin.last_login = timezone.now()
             admin.save()
             
-            logger.info(f"Admin login successful: {admin.username}")
+            logger.info("Admin login successful: %s", admin.username)
             return Response({
                 'message': 'Login successful',
                 'user': {
@@ -276,7 +417,7 @@ def user_login(request):
             if hasattr(user, 'profile') and user.profile.user_type:
                 user_type = user.profile.user_type
             
-            logger.info(f"Citizen login successful: {user.username}")
+            logger.info("Citizen login successful: %s", user.username)
             return Response({
                 'message': 'Login successful',
                 'user': {
@@ -449,6 +590,24 @@ def change_password(request):
     return Response({'detail': 'Validation failed', 'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
 
 
+def _reporter_identity(user):
+    """Name and email recorded on reports filed by an Admin or a citizen User"""
+    reporter_name = f"{user.first_name} {user.last_name}".strip() or user.username
+    return reporter_name, user.email
+
+
+def _created_report_payload(report):
+    return {
+        'id': report.id,
+        'location': report.location,
+        'description': report.description,
+        'status': report.status,
+        'created_at': report.created_at,
+        'image': report.image.url if report.image else None,
+        'audio': report.audio.url if report.audio else None,
+    }
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def create_report(request):
@@ -460,22 +619,10 @@ def create_report(request):
     logger = logging.getLogger(__name__)
     
     try:
-        # Get user information for the report
-        user = request.user
+        # Get user information for the report (admins can also create reports)
+        reporter_name, reporter_email = _reporter_identity(request.user)
         
-        # Check if it's an admin (admins can also create reports)
-        if isinstance(user, Admin):
-            reporter_name = f"{user.first_name} {user.last_name}".strip() or user.username
-            reporter_email = user.email
-        else:
-            # Regular user
-            reporter_name = f"{user.first_name} {user.last_name}".strip() or user.username
-            reporter_email = user.email
-        
-        # Log incoming request data for debugging
-        logger.info(f"Create report request received from {reporter_email}")
-        logger.info(f"Request data type: {type(request.data)}")
-        logger.info(f"Request content type: {request.content_type}")
+        logger.debug("Create report request received from %s (%s)", reporter_email, request.content_type)
         
         # Prepare data with user info
         # For FormData requests, we need to handle QueryDict specially
@@ -500,25 +647,29 @@ def create_report(request):
             report_data['image'] = request.FILES['image']
         if 'audio' in request.FILES:
             report_data['audio'] = request.FILES['audio']
+
+        # Files rejected while streaming (too large / wrong type) never reach the serializer
+        upload_errors = getattr(request, 'upload_errors', None)
+        if upload_errors:
+            return Response({
+                'detail': 'Validation failed',
+                'errors': upload_errors
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        logger.info(f"Final report_data keys: {list(report_data.keys())}")
-        logger.info(f"Report data: location={report_data.get('location')}, description={report_data.get('description')}")
+        logger.debug("Report fields: %s", sorted(report_data))
         
         serializer = CitizenReportSerializer(data=report_data)
         if serializer.is_valid():
-            report = serializer.save()
-            logger.info(f"Report created successfully with ID {report.id}")
+            stored = store_uploads(CitizenReport, [serializer.validated_data], ('image', 'audio'))
+            try:
+                report = run_write(serializer.save)
+            except Exception:
+                release_media(*stored)
+                raise
+            logger.info("Report created successfully with ID %s", report.id)
             return Response({
                 'message': 'Report submitted successfully',
-                'report': {
-                    'id': report.id,
-                    'location': report.location,
-                    'description': report.description,
-                    'status': report.status,
-                    'created_at': report.created_at,
-                    'image': report.image.url if report.image else None,
-                    'audio': report.audio.url if report.audio else None,
-                }
+                'report': _created_report_payload(report)
             }, status=status.HTTP_201_CREATED)
         
         # Log validation errors
@@ -538,28 +689,183 @@ def create_report(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_create_reports(request):
+    """
+    Create many citizen reports in one request (offline sync from field teams).
+
+    JSON body: {"reports": [{...}, ...]} (or a bare list). Multipart: a
+    "reports" field holding the same JSON list, plus files named
+    image_<index> / audio_<index>. Valid reports are inserted with a single
+    bulk INSERT; the response has one result per submitted item. Pass
+    "atomic": true to insert nothing unless every item is valid.
+    """
+    import json
+    import logging
+    logger = logging.getLogger(__name__)
+
+    try:
+        payload = request.data
+        if isinstance(payload, list):
+            items, atomic = payload, False
+        else:
+            items = payload.get('reports')
+            atomic = str(payload.get('atomic', '')).lower() in ('1', 'true', 'yes')
+            if isinstance(items, str):
+                try:
+                    items = json.loads(items)
+                except ValueError:
+                    items = None
+
+        if not isinstance(items, list) or not items:
+            return Response({
+                'detail': "'reports' must be a non-empty list"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        max_items = getattr(settings, 'REPORT_BULK_MAX_ITEMS', 1000)
+        if len(items) > max_items:
+            return Response({
+                'detail': f'At most {max_items} reports can be submitted at once'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        upload_errors = getattr(request, 'upload_errors', None)
+        if upload_errors:
+            return Response({
+                'detail': 'Validation failed',
+                'errors': upload_errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        reporter_name, reporter_email = _reporter_identity(request.user)
+        report_data = []
+        for index, item in enumerate(items):
+            data = {
+                key: value for key, value in (item.items() if isinstance(item, dict) else [])
+                if key not in ('image', 'audio')
+            }
+            data['reporter_name'] = reporter_name
+            data['reporter_email'] = reporter_email
+            for field in ('image', 'audio'):
+                upload = request.FILES.get(f'{field}_{index}')
+                if upload is not None:
+                    data[field] = upload
+            report_data.append(data)
+
+        serializer = CitizenReportSerializer(data=report_data, many=True)
+        if serializer.is_valid():
+            errors = [{} for _ in report_data]
+        else:
+            errors = serializer.errors
+            if isinstance(errors, dict):
+                # Newer DRF reports list errors as {index: errors} for the failing items only
+                errors = [errors.get(index, {}) for index in range(len(report_data))]
+            serializer = None
+            accepted = [data for data, item_errors in zip(report_data, errors) if not item_errors]
+            if accepted and not atomic:
+                # Re-validate only the good items so they can still be inserted in one batch
+                serializer = CitizenReportSerializer(data=accepted, many=True)
+                if not serializer.is_valid():
+                    serializer = None
+
+        reports = []
+        if serializer is not None:
+            stored = store_uploads(CitizenReport, serializer.validated_data, ('image', 'audio'))
+            try:
+                reports = run_write(serializer.save)
+            except Exception:
+                release_media(*stored)
+                raise
+        reports = iter(reports)
+        results = []
+        for index, item_errors in enumerate(errors):
+            if item_errors:
+                results.append({'index': index, 'status': 'error', 'errors': item_errors})
+            elif serializer is None:
+                results.append({'index': index, 'status': 'error', 'errors': {
+                    'non_field_errors': ['Not created because other reports in the batch are invalid.']
+                }})
+            else:
+                results.append({'index': index, 'status': 'created', 'id': next(reports).id})
+
+        created = sum(1 for result in results if result['status'] == 'created')
+        logger.info("Bulk report ingestion: %d created, %d failed", created, len(results) - created)
+        if created == len(results):
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({
+            'created': created,
+            'failed': len(results) - created,
+            'results': results
+        }, status=response_status)
+    except Exception as e:
+        import traceback
+        logger.error(f"Bulk report creation error: {str(e)}")
+        logger.error(traceback.format_exc())
+        return Response({
+            'detail': 'An error occurred while submitting the reports. Please try again.',
+            'error': str(e) if settings.DEBUG else None
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _mark_assigned_reports_reviewed(reports):
+    """
+    Auto-update status for reports with assigned teams but still pending.
+
+    ``reports`` is a queryset; its matching rows are selected and updated on
+    the primary in one UPDATE instead of a save per report, and the UPDATE
+    keeps its ``status='pending'`` guard, so a report resolved meanwhile is
+    left alone. Returns how many reports changed. The list views run it
+    through ``conditional_list(prepare=...)`` when a poll's ETag does not
+    match; a report only becomes eligible through a write, which bumps the
+    reports version and so changes the ETag.
+    """
+    primary = reports.using('default').filter(status='pending', assigned_team__isnull=False)
+    ids = list(primary.order_by('id').values_list('id', flat=True))
+    if not ids:
+        return 0
+    with transaction.atomic(using='default'):
+        last_seq = TableVersion.allocate(CitizenReport.CHANGE_SEQ_COUNTER, count=len(ids))
+        seqs = zip(ids, range(last_seq - len(ids) + 1, last_seq + 1))
+        updated = primary.filter(id__in=ids).update(
+            status='reviewed',
+            updated_at=timezone.now(),
+            change_seq=Case(*[When(id=report_id, then=Value(seq)) for report_id, seq in seqs]),
+        )
+        TableVersion.bump('reports')
+    return updated
+
+
+def _visible_reports(user):
+    if isinstance(user, Admin):
+        return CitizenReport.objects.all()
+    return CitizenReport.objects.filter(reporter_email=user.email)
+
+
+def _review_visible_reports(request):
+    return _mark_assigned_reports_reviewed(_visible_reports(request.user))
+
+
+def _review_all_reports(request):
+    return _mark_assigned_reports_reviewed(CitizenReport.objects.all())
+
+
+def _report_list_scope(request):
+    # Admins see every report, citizens only their own
+    return 'admin' if isinstance(request.user, Admin) else f'citizen:{request.user.email}'
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_list('reports', 'teams', 'completed_tasks', scope=_report_list_scope, prepare=_review_visible_reports)
 def get_reports(request):
     """
     Get reports for the authenticated user
     """
     try:
-        user = request.user
-        # Admins can view all citizen reports
-        if isinstance(user, Admin):
-            reports = CitizenReport.objects.all().order_by('-created_at')
-        else:
-            # Regular users only see their own reports
-            user_email = user.email
-            reports = CitizenReport.objects.filter(reporter_email=user_email).order_by('-created_at')
-        
-        # Auto-update status for reports with assigned teams but still pending
-        for report in reports:
-            if report.assigned_team and report.status == 'pending':
-                report.status = 'reviewed'
-                report.save()
-        
+        reports = _visible_reports(request.user).order_by('-created_at')
         serializer = CitizenReportSerializer(reports, many=True)
         
         return Response({
@@ -575,8 +881,211 @@ def get_reports(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def report_changes(request):
+    """
+    Delta sync: reports created or updated, and ids of reports deleted, since
+    ``?since=<cursor>`` (0 or omitted for a full sync), oldest change first.
+
+    Pass the returned ``cursor`` as ``since`` next time; keep fetching while
+    ``has_more`` is true. Citizens see their own reports, admins all of them.
+    """
+    try:
+        try:
+            since = int(request.query_params.get('since') or 0)
+            limit = int(request.query_params.get('limit', 200))
+        except ValueError:
+            return Response({
+                'detail': "'since' and 'limit' must be integers"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, getattr(settings, 'REPORT_CHANGES_MAX_LIMIT', 1000)))
+
+        user = request.user
+        reports = CitizenReport.objects.filter(change_seq__gt=since).select_related(
+            'assigned_team', 'completed_task'
+        )
+        tombstones = ReportTombstone.objects.filter(change_seq__gt=since)
+        if not isinstance(user, Admin):
+            reports = reports.filter(reporter_email=user.email)
+            tombstones = tombstones.filter(reporter_email=user.email)
+
+        # Merge both streams by sequence number; one extra row tells whether more remain
+        changes = [(report.change_seq, report) for report in reports.order_by('change_seq')[:limit + 1]]
+        if since:
+            # A client starting from scratch has nothing to delete
+            changes += [(tombstone.change_seq, tombstone) for tombstone in tombstones.order_by('change_seq')[:limit + 1]]
+        changes.sort(key=lambda change: change[0])
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+
+        updated = [change for _, change in changes if isinstance(change, CitizenReport)]
+        deleted = [change.report_id for _, change in changes if isinstance(change, ReportTombstone)]
+        return Response({
+            'reports': CitizenReportSerializer(updated, many=True).data,
+            'deleted': deleted,
+            'cursor': changes[-1][0] if changes else since,
+            'has_more': has_more
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f"Report changes error: {str(e)}")
+        return Response({
+            'detail': 'An error occurred while fetching report changes.',
+            'error': str(e) if settings.DEBUG else None
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@read_replica
+def search_reports(request):
+    """
+    Full-text search over report locations, descriptions and reporter names.
+
+    Query params: q (required; every word matches as a prefix), status, team
+    (team id), from / to (ISO dates or datetimes on created_at), limit, offset.
+    Results are ranked best match first. Citizens only search their own reports.
+    """
+    from django.utils.dateparse import parse_date, parse_datetime
+
+    try:
+        params = request.query_params
+        text = params.get('q', '').strip()
+        if not text:
+            return Response({
+                'detail': "'q' is required"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = max(1, min(int(params.get('limit', 50)), 200))
+            offset = max(0, int(params.get('offset', 0)))
+            team_id = int(params['team']) if params.get('team') else None
+        except ValueError:
+            return Response({
+                'detail': "'limit', 'offset' and 'team' must be integers"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        reports = CitizenReport.objects.select_related('assigned_team', 'completed_task')
+        if not isinstance(request.user, Admin):
+            reports = reports.filter(reporter_email=request.user.email)
+        if params.get('status'):
+            reports = reports.filter(status=params['status'])
+        if team_id is not None:
+            reports = reports.filter(assigned_team_id=team_id)
+        for param, lookup in (('from', 'created_at__gte'), ('to', 'created_at__lte')):
+            value = params.get(param)
+            if not value:
+                continue
+            try:
+                day = parse_date(value)
+                moment = None if day else parse_datetime(value)
+            except ValueError:
+                day = moment = None
+            if day is not None:
+                # A bare 'to' date includes that whole day
+                lookup = 'created_at__date__gte' if param == 'from' else 'created_at__date__lte'
+                moment = day
+            elif moment is None:
+                return Response({
+                    'detail': f"'{param}' must be an ISO date or datetime"
+                }, status=status.HTTP_400_BAD_REQUEST)
+            elif timezone.is_naive(moment):
+                moment = timezone.make_aware(moment)
+            reports = reports.filter(**{lookup: moment})
+
+        page = list(full_text_search(reports, text)[offset:offset + limit + 1])
+        return Response({
+            'reports': CitizenReportSerializer(page[:limit], many=True).data,
+            'has_more': len(page) > limit
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f"Search reports error: {str(e)}")
+        return Response({
+            'detail': 'An error occurred while searching reports.',
+            'error': str(e) if settings.DEBUG else None
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def upvote_report(request, report_id):
+    """
+    POST upvotes a report as the requesting citizen, DELETE withdraws the
+    upvote. Both are idempotent and return the report's new upvote count.
+    """
+    try:
+        if isinstance(request.user, Admin):
+            return Response({
+                'detail': 'Only citizens can upvote reports'
+            }, status=status.HTTP_403_FORBIDDEN)
+        try:
+            report = CitizenReport.objects.get(id=report_id)
+        except CitizenReport.DoesNotExist:
+            return Response({
+                'detail': 'Report not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        change = add_upvote if request.method == 'POST' else remove_upvote
+        changed = run_write(change, report, request.user)
+        return Response({
+            'report_id': report.id,
+            'upvoted': request.method == 'POST',
+            'changed': changed,
+            'upvote_count': report.upvote_count
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f"Upvote report error: {str(e)}")
+        return Response({
+            'detail': 'An error occurred while updating the upvote.',
+            'error': str(e) if settings.DEBUG else None
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@read_replica
+@conditional_list('reports', 'teams', 'completed_tasks')
+def hot_reports(request):
+    """
+    Reports ranked by hot_score: upvotes, decayed by age (see api/ranking.py).
+
+    Query params: limit (default 20, max 100), status (optional). Read
+    straight off the hot_score index, without touching the upvote table.
+    """
+    try:
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), 100))
+        except ValueError:
+            return Response({
+                'detail': "'limit' must be an integer"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        reports = CitizenReport.objects.select_related('assigned_team', 'completed_task')
+        if request.query_params.get('status'):
+            reports = reports.filter(status=request.query_params['status'])
+        reports = reports.order_by('-hot_score')[:limit]
+        return Response({
+            'reports': CitizenReportSerializer(reports, many=True).data
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f"Hot reports error: {str(e)}")
+        return Response({
+            'detail': 'An error occurred while ranking reports.',
+            'error': str(e) if settings.DEBUG else None
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@read_replica
+@conditional_list('reports', 'teams', 'completed_tasks', prepare=_review_all_reports)
 def get_all_reports(request):
     """
     Return all citizen reports regardless of requester auth.
@@ -584,13 +1093,6 @@ def get_all_reports(request):
     """
     try:
         reports = CitizenReport.objects.all().order_by('-created_at')
-        
-        # Auto-update status for reports with assigned teams but still pending
-        for report in reports:
-            if report.assigned_team and report.status == 'pending':
-                report.status = 'reviewed'
-                report.save()
-        
         serializer = CitizenReportSerializer(reports, many=True)
         return Response({'reports': serializer.data}, status=status.HTTP_200_OK)
     except Exception as e:
@@ -606,6 +1108,7 @@ def get_all_reports(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([OTPThrottle])
 def generate_otp(request):
     """
     Generate OTP for email verification
@@ -658,6 +1161,7 @@ def generate_otp(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([OTPVerifyThrottle])
 def verify_otp(request):
     """
     Verify OTP code
@@ -712,6 +1216,8 @@ def verify_otp(request):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@read_replica
+@conditional_list('teams')
 def list_teams(request):
     """
     Get all response teams
@@ -734,6 +1240,7 @@ def list_teams(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([PublicWriteThrottle])
 def create_team(request):
     """
     Create a new response team
@@ -763,6 +1270,7 @@ def create_team(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([PublicWriteThrottle])
 def assign_team_to_report(request, report_id):
     """
     Assign a team to a report
@@ -792,7 +1300,9 @@ def assign_team_to_report(request, report_id):
         report.assigned_team = team
         # Change status to 'reviewed' (in-progress) when team is assigned
         report.status = 'reviewed'
-        report.save()
+        with transaction.atomic():
+            report.save()
+            record_report_event('assigned', report)
         
         serializer = CitizenReportSerializer(report)
         return Response({
@@ -810,6 +1320,249 @@ def assign_team_to_report(request, report_id):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _incident_payloads(clusters):
+    """Serialize clusters with a per-status count of their reports (one query)"""
+    from django.db.models import Count
+
+    by_status = {}
+    rows = (
+        CitizenReport.objects.filter(cluster__in=clusters)
+        .order_by().values('cluster_id', 'status').annotate(total=Count('id'))
+    )
+    for row in rows:
+        by_status.setdefault(row['cluster_id'], {})[row['status']] = row['total']
+    payloads = IncidentClusterSerializer(clusters, many=True).data
+    for payload in payloads:
+        payload['status_counts'] = by_status.get(payload['id'], {})
+    return payloads
+
+
+def _incident_list_scope(request):
+    # Clusters age out of the ``hours`` window without any write, so the
+    # validators also change every minute
+    return f"{request.query_params.get('hours', '')}\0{timezone.now():%Y-%m-%dT%H:%M}"
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@read_replica
+@conditional_list('incidents', 'reports', scope=_incident_list_scope)
+def list_incidents(request):
+    """
+    Incidents (clusters of near-duplicate reports) active in the last
+    ``?hours=`` (default 24) with at least ``?min_reports=`` reports, most
+    recently reported first.
+    """
+    try:
+        try:
+            hours = float(request.query_params.get('hours', 24))
+            min_reports = int(request.query_params.get('min_reports', 1))
+        except ValueError:
+            return Response({
+                'detail': "'hours' and 'min_reports' must be numbers"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        clusters = list(
+            IncidentCluster.objects.filter(
+                last_reported_at__gte=timezone.now() - timedelta(hours=hours),
+                report_count__gte=min_reports,
+            ).order_by('-last_reported_at')[:getattr(settings, 'INCIDENT_LIST_LIMIT', 500)]
+        )
+        return Response({'incidents': _incident_payloads(clusters)}, status=status.HTTP_200_OK)
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f"List incidents error: {str(e)}")
+        return Response({
+            'detail': 'An error occurred while fetching incidents.',
+            'error': str(e) if settings.DEBUG else None
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@read_replica
+def get_incident(request, incident_id):
+    """
+    One incident with all of its reports
+    """
+    try:
+        try:
+            cluster = IncidentCluster.objects.get(id=incident_id)
+        except IncidentCluster.DoesNotExist:
+            return Response({
+                'detail': 'Incident not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        reports = cluster.reports.select_related('assigned_team', 'completed_task').order_by('created_at')
+        return Response({
+            'incident': _incident_payloads([cluster])[0],
+            'reports': CitizenReportSerializer(reports, many=True).data
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f"Get incident error: {str(e)}")
+        return Response({
+            'detail': 'An error occurred while fetching the incident.',
+            'error': str(e) if settings.DEBUG else None
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@throttle_classes([PublicWriteThrottle])
+def assign_team_to_incident(request, incident_id):
+    """
+    Assign a response team to every unresolved report of an incident at once.
+    Admins only.
+    """
+    try:
+        if not isinstance(request.user, Admin):
+            return Response({'detail': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        team_id = request.data.get('team_id')
+        if not team_id:
+            return Response({
+                'detail': 'team_id is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            cluster = IncidentCluster.objects.get(id=incident_id)
+        except IncidentCluster.DoesNotExist:
+            return Response({
+                'detail': 'Incident not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            team = ResponseTeam.objects.get(id=team_id)
+        except ResponseTeam.DoesNotExist:
+            return Response({
+                'detail': 'Team not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        with transaction.atomic():
+            reports = list(cluster.reports.exclude(status='resolved'))
+            for report in reports:
+                report.assigned_team = team
+                report.status = 'reviewed'
+                report.save()
+                record_report_event('assigned', report)
+
+        return Response({
+            'message': f'Team assigned to {len(reports)} report(s)',
+            'incident': _incident_payloads([cluster])[0],
+            'report_ids': [report.id for report in reports]
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f"Assign team to incident error: {str(e)}")
+        return Response({
+            'detail': 'An error occurred while assigning team.',
+            'error': str(e) if settings.DEBUG else None
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _dispatch_plan(data):
+    """
+    Plan dispatch for the open unassigned reports. Returns (plan, error
+    response); optional body fields: candidates, max_distance_km, team_ids.
+    """
+    try:
+        candidates = int(data['candidates']) if data.get('candidates') else None
+        max_distance_km = float(data['max_distance_km']) if data.get('max_distance_km') else None
+        team_ids = [int(team_id) for team_id in data.get('team_ids') or []]
+    except (TypeError, ValueError):
+        return None, Response({
+            'detail': "'candidates' and 'team_ids' must be integers and 'max_distance_km' a number"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if (candidates is not None and candidates < 1) or (max_distance_km is not None and max_distance_km <= 0):
+        return None, Response({
+            'detail': "'candidates' and 'max_distance_km' must be positive"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    # The team search grows with both; unbounded values would let one request burn the CPU
+    candidates_limit = settings.DISPATCH_CANDIDATE_TEAMS_LIMIT
+    distance_limit = settings.DISPATCH_MAX_DISTANCE_LIMIT_KM
+    if (candidates is not None and candidates > candidates_limit) or (
+            max_distance_km is not None and not max_distance_km <= distance_limit):
+        return None, Response({
+            'detail': f"'candidates' must be at most {candidates_limit} and 'max_distance_km' at most {distance_limit}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    reports, teams = dispatch_inputs(team_ids)
+    plan = plan_assignments(reports, teams, candidates=candidates, max_distance_km=max_distance_km)
+    plan['teams'] = len(teams)
+    return plan, None
+
+
+def _dispatch_payload(plan):
+    return {
+        'assignments': [
+            {'report_id': report_id, 'team_id': team_id, 'distance_km': round(meters / 1000, 3)}
+            for report_id, team_id, meters in plan['assignments']
+        ],
+        'unassigned_report_ids': plan['unassigned'],
+        'total_distance_km': round(plan['total_meters'] / 1000, 3),
+        'teams_considered': plan['teams'],
+    }
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def plan_dispatch(request):
+    """
+    Dry run of automatic dispatch: the team each open unassigned report would
+    get, minimising total travel distance from team bases within team
+    capacity. Nothing is saved. Admins only.
+    """
+    try:
+        if not isinstance(request.user, Admin):
+            return Response({'detail': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        plan, error = _dispatch_plan(request.data)
+        if error:
+            return error
+        return Response(_dispatch_payload(plan), status=status.HTTP_200_OK)
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f"Plan dispatch error: {str(e)}")
+        return Response({
+            'detail': 'An error occurred while planning dispatch.',
+            'error': str(e) if settings.DEBUG else None
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def apply_dispatch(request):
+    """
+    Plan automatic dispatch (same body as the dry run) and assign the teams.
+    Reports assigned or closed while planning are left alone. Admins only.
+    """
+    try:
+        if not isinstance(request.user, Admin):
+            return Response({'detail': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        plan, error = _dispatch_plan(request.data)
+        if error:
+            return error
+        reports = run_write(apply_plan, plan['assignments'])
+        applied = {report.id for report in reports}
+        plan['assignments'] = [assignment for assignment in plan['assignments'] if assignment[0] in applied]
+        payload = _dispatch_payload(plan)
+        return Response({
+            'message': f'Teams assigned to {len(applied)} report(s)',
+            **payload
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f"Apply dispatch error: {str(e)}")
+        return Response({
+            'detail': 'An error occurred while dispatching teams.',
+            'error': str(e) if settings.DEBUG else None
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def complete_report(request, report_id):
@@ -827,12 +1580,16 @@ def complete_report(request, report_id):
             }, status=status.HTTP_404_NOT_FOUND)
 
         report.status = 'resolved'
-        report.save()
-
-        completed_task, _ = CompletedTask.objects.update_or_create(
-            report=report,
-            defaults={'notes': notes}
-        )
+        with transaction.atomic():
+            report.save()
+            completed_task, created = CompletedTask.objects.update_or_create(
+                report=report,
+                defaults={'notes': notes}
+            )
+            if created:
+                # Re-completing only updates the notes; count each report once
+                record_resolution(report, completed_task.completed_at)
+            record_report_event('completed', report)
 
         serializer = CitizenReportSerializer(report)
 
@@ -851,6 +1608,121 @@ def complete_report(request, report_id):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _resolution_times_scope(request):
+    # The default window ends today, so it moves at midnight without a write
+    return f'{timezone.localdate():%Y-%m-%d}'
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@read_replica
+@conditional_list('resolution_rollups', scope=_resolution_times_scope)
+def resolution_times(request):
+    """
+    Time from report creation to completion: count, mean and p50/p90/p99 in
+    seconds, from the per-team/per-day rollups.
+
+    Query params: from / to (ISO dates of completion, default the last 30
+    days), team (team id, or 'none' for reports completed without a team),
+    group_by ('team' or 'day') for a breakdown next to the overall figures.
+    """
+    from django.utils.dateparse import parse_date
+
+    try:
+        params = request.query_params
+        try:
+            end = parse_date(params['to']) if params.get('to') else timezone.localdate()
+            start = parse_date(params['from']) if params.get('from') else end - timedelta(days=29)
+        except ValueError:
+            start = end = None
+        if start is None or end is None:
+            return Response({
+                'detail': "'from' and 'to' must be ISO dates"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        group_by = params.get('group_by')
+        if group_by not in (None, '', 'team', 'day'):
+            return Response({
+                'detail': "'group_by' must be 'team' or 'day'"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        rollups = ResolutionRollup.objects.filter(day__gte=start, day__lte=end)
+        team = params.get('team')
+        if team == 'none':
+            rollups = rollups.filter(team__isnull=True)
+        elif team:
+            try:
+                rollups = rollups.filter(team_id=int(team))
+            except ValueError:
+                return Response({
+                    'detail': "'team' must be a team id or 'none'"
+                }, status=status.HTTP_400_BAD_REQUEST)
+        rollups = list(rollups.order_by('day', 'team_id'))
+
+        payload = {
+            'from': start,
+            'to': end,
+            'overall': summarize(rollups)
+        }
+        if group_by:
+            groups = {}
+            for rollup in rollups:
+                groups.setdefault(rollup.team_id if group_by == 'team' else rollup.day, []).append(rollup)
+            payload['groups'] = [
+                {group_by: key, **summarize(members)} for key, members in groups.items()
+            ]
+        return Response(payload, status=status.HTTP_200_OK)
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f"Resolution times error: {str(e)}")
+        return Response({
+            'detail': 'An error occurred while computing resolution times.',
+            'error': str(e) if settings.DEBUG else None
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def report_events(request):
+    """
+    Report change feed for admins, oldest first: events after ``?after=<seq>``.
+
+    Without ``after`` only the current sequence number is returned, to start
+    following from. The live SSE stream is served by the ASGI app at
+    settings.REPORT_EVENT_STREAM_PATH.
+    """
+    try:
+        if not isinstance(request.user, Admin):
+            return Response({
+                'detail': 'Only admins can read the report change feed'
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        after = request.query_params.get('after')
+        if after is None:
+            return Response({'events': [], 'last_seq': latest_seq()}, status=status.HTTP_200_OK)
+        try:
+            after = int(after)
+            limit = min(int(request.query_params.get('limit', 100)), getattr(settings, 'REPORT_EVENT_BATCH_SIZE', 500))
+        except ValueError:
+            return Response({
+                'detail': "'after' and 'limit' must be integers"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        events = events_after(after, max(limit, 1))
+        return Response({
+            'events': [serialize_event(event) for event in events],
+            'last_seq': events[-1].id if events else after
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f"Report events error: {str(e)}")
+        return Response({
+            'detail': 'An error occurred while fetching report events.',
+            'error': str(e) if settings.DEBUG else None
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['DELETE'])
 @permission_classes([AllowAny])
 def delete_report(request, report_id):
@@ -865,19 +1737,11 @@ def delete_report(request, report_id):
                 'detail': 'Report not found'
             }, status=status.HTTP_404_NOT_FOUND)
 
-        image_name = report.image.name if report.image else None
-        audio_name = report.audio.name if report.audio else None
-
-        report.delete()
-
-        for file_name in (image_name, audio_name):
-            if file_name:
-                try:
-                    if default_storage.exists(file_name):
-                        default_storage.delete(file_name)
-                except Exception:
-                    # Ignore storage deletion errors to avoid failing the request
-                    pass
+        # Its media references are released by api/signals.py; the blobs may be
+        # shared with other reports, so gc_media removes the files later
+        with transaction.atomic():
+            record_report_event('deleted', report)
+            report.delete()
 
         return Response({
             'message': 'Report deleted successfully'
@@ -893,8 +1757,234 @@ def delete_report(request, report_id):
 
 
 
+def _upload_owner(user):
+    return f"admin:{user.id}" if isinstance(user, Admin) else f"user:{user.id}"
+
+
+def _get_upload_session(request, upload_id):
+    session = UploadSession.objects.filter(id=upload_id, owner=_upload_owner(request.user)).first()
+    if session is None or session.is_expired():
+        return None
+    return session
+
+
+def _upload_status_payload(session):
+    chunks = list(session.chunks.values_list('offset', 'size'))
+    missing = resumable.missing_ranges(session, chunks)
+    return {
+        'upload_id': str(session.id),
+        'field': session.field,
+        'size': session.total_size,
+        'received': session.total_size - sum(end - start for start, end in missing),
+        'missing': [[start, end] for start, end in missing],
+        'complete': not missing,
+        'expires_at': session.expires_at,
+    }
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_upload_session(request):
+    """
+    Start a resumable upload of a report image or audio file.
+
+    Expects JSON body: {"field": "image"|"audio", "file_name": "...", "size": <bytes>}
+    Chunks are then sent with PATCH /api/uploads/<upload_id>/ (raw body,
+    'Upload-Offset' header), in any order and in parallel, and the file is
+    attached to a report with POST /api/uploads/<upload_id>/finalize/.
+    """
+    try:
+        field = request.data.get('field')
+        file_name = (request.data.get('file_name') or '').strip()
+        try:
+            total_size = int(request.data.get('size'))
+        except (TypeError, ValueError):
+            total_size = 0
+
+        if field not in dict(UploadSession.FIELD_CHOICES):
+            return Response({
+                'detail': "field must be 'image' or 'audio'"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if not file_name or total_size <= 0:
+            return Response({
+                'detail': 'file_name and a positive size are required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        limit = max_upload_size(field)
+        if total_size > limit:
+            return Response({
+                'detail': 'Validation failed',
+                'errors': {field: [f'File is too large (limit {limit} bytes).']}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        session = UploadSession.objects.create(
+            owner=_upload_owner(request.user),
+            field=field,
+            file_name=file_name[:255],
+            content_type=(request.data.get('content_type') or '')[:100],
+            total_size=total_size,
+            expires_at=resumable.expiry_from_now(),
+        )
+        resumable.allocate(session)
+
+        return Response({
+            'message': 'Upload started',
+            'chunk_size': resumable.chunk_size(),
+            'max_chunk_size': resumable.max_chunk_size(),
+            **_upload_status_payload(session),
+        }, status=status.HTTP_201_CREATED)
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f"Create upload session error: {str(e)}")
+        return Response({
+            'detail': 'An error occurred while starting the upload.',
+            'error': str(e) if settings.DEBUG else None
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET', 'PATCH', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def upload_session(request, upload_id):
+    """
+    GET: received and missing byte ranges, so an interrupted client can resume.
+    PATCH: store one chunk; the raw body is written at the 'Upload-Offset' header.
+    DELETE: abort the upload and discard the received data.
+    """
+    try:
+        session = _get_upload_session(request, upload_id)
+        if session is None:
+            return Response({
+                'detail': 'Upload not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        if request.method == 'DELETE':
+            resumable.discard(session)
+            session.delete()
+            return Response({
+                'message': 'Upload cancelled'
+            }, status=status.HTTP_200_OK)
+
+        if request.method == 'PATCH':
+            try:
+                offset = int(request.headers.get('Upload-Offset', ''))
+                length = int(request.META.get('CONTENT_LENGTH') or 0)
+            except ValueError:
+                return Response({
+                    'detail': 'A numeric Upload-Offset header is required'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                resumable.write_chunk(session, offset, request, length)
+            except resumable.ChunkError as e:
+                return Response({
+                    'detail': str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            UploadChunk.objects.update_or_create(
+                session=session, offset=offset, defaults={'size': length}
+            )
+            UploadSession.objects.filter(pk=session.pk).update(
+                expires_at=resumable.expiry_from_now(), updated_at=timezone.now()
+            )
+            session.refresh_from_db()
+
+        return Response(_upload_status_payload(session), status=status.HTTP_200_OK)
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f"Upload session error: {str(e)}")
+        return Response({
+            'detail': 'An error occurred while processing the upload.',
+            'error': str(e) if settings.DEBUG else None
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def finalize_upload(request, upload_id):
+    """
+    Attach a completed resumable upload to a report.
+
+    With report fields (location, description, latitude, longitude) a new
+    report is created, exactly as /api/reports/create/ would; with
+    {"report_id": <id>} the file is attached to one of the caller's reports.
+    """
+    try:
+        session = _get_upload_session(request, upload_id)
+        if session is None:
+            return Response({
+                'detail': 'Upload not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        upload_status = _upload_status_payload(session)
+        if not upload_status['complete']:
+            return Response({
+                'detail': 'Upload is incomplete',
+                'missing': upload_status['missing']
+            }, status=status.HTTP_409_CONFLICT)
+
+        try:
+            upload = resumable.assemble(session)
+        except resumable.ChunkError as e:
+            resumable.discard(session)
+            session.delete()
+            return Response({
+                'detail': 'Validation failed',
+                'errors': {session.field: [str(e)]}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        reporter_name, reporter_email = _reporter_identity(request.user)
+        report_id = request.data.get('report_id')
+        try:
+            if report_id:
+                report = CitizenReport.objects.filter(id=report_id, reporter_email=reporter_email).first()
+                if report is None:
+                    return Response({
+                        'detail': 'Report not found'
+                    }, status=status.HTTP_404_NOT_FOUND)
+                serializer = CitizenReportSerializer(report, data={session.field: upload}, partial=True)
+            else:
+                report_data = {
+                    key: value for key, value in request.data.items()
+                    if key not in ('image', 'audio', 'report_id')
+                }
+                report_data['reporter_name'] = reporter_name
+                report_data['reporter_email'] = reporter_email
+                report_data[session.field] = upload
+                serializer = CitizenReportSerializer(data=report_data)
+
+            if not serializer.is_valid():
+                # Keep the upload so the client can retry with corrected fields
+                return Response({
+                    'detail': 'Validation failed',
+                    'errors': serializer.errors
+                }, status=status.HTTP_400_BAD_REQUEST)
+            report = serializer.save()
+        finally:
+            upload.close()
+
+        resumable.discard(session)
+        session.delete()
+
+        return Response({
+            'message': 'Report updated successfully' if report_id else 'Report submitted successfully',
+            'report': _created_report_payload(report)
+        }, status=status.HTTP_200_OK if report_id else status.HTTP_201_CREATED)
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f"Finalize upload error: {str(e)}")
+        return Response({
+            'detail': 'An error occurred while finalizing the upload.',
+            'error': str(e) if settings.DEBUG else None
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([ChatbotThrottle])
+@admission_limit('chatbot')
 def chatbot_query(request):
     """Simple endpoint to proxy chat queries to BlueGuard chatbot.
 
@@ -918,31 +2008,21 @@ def chatbot_query(request):
 
         answer = blueguard_response(text)
 
-        # If weather engine returned an opaque error, attempt a direct fetch
-        # to provide a fallback response (better UX) and capture diagnostics.
+        # The weather engine already fell back to its last good forecast;
+        # fetching again here would only wait out the same timeouts. Report
+        # the state of the weather client instead.
         if isinstance(answer, str) and answer.startswith("Unable to fetch weather data"):
             import logging
             logger = logging.getLogger(__name__)
-            logger.warning("Chatbot returned weather fetch error; attempting direct weather engine call for diagnostics.")
             try:
-                # Try importing the weather engine to call the fetcher directly
-                try:
-                    from chatbot.weather_engine import get_final_risk_and_score_for_location
-                except Exception:
-                    from backend.chatbot.weather_engine import get_final_risk_and_score_for_location
-
-                res = get_final_risk_and_score_for_location()
-                logger.info(f"Direct weather engine result: {res}")
-                if isinstance(res, dict) and 'final_risk' in res:
-                    # Return the risk directly to the client instead of the generic error
-                    return Response({'answer': f"Flood Risk: {res['final_risk']}"}, status=status.HTTP_200_OK)
-                else:
-                    # Include debug info when available
-                    debug_msg = res.get('error') if isinstance(res, dict) else str(res)
-                    if hasattr(settings, 'DEBUG') and settings.DEBUG:
-                        return Response({'answer': f"Unable to fetch weather data: {debug_msg}"}, status=status.HTTP_200_OK)
-            except Exception as e:
-                logger.exception("Direct weather engine diagnostic failed.")
+                from chatbot.weather_engine import weather_status
+            except Exception:
+                from backend.chatbot.weather_engine import weather_status
+
+            weather = weather_status()
+            logger.warning("Chatbot could not fetch weather data: %s", weather)
+            if hasattr(settings, 'DEBUG') and settings.DEBUG:
+                return Response({'answer': f"Unable to fetch weather data: {weather}"}, status=status.HTTP_200_OK)
 
         return Response({'answer': answer}, status=status.HTTP_200_OK)
     except Exception as e:
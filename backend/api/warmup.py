@@ -0,0 +1,34 @@
+"""
+Preload what the first requests of a worker would otherwise pay for.
+
+Django imports the URLconf, and with it every view module, on the first
+request, and the chatbot imports requests and the Ollama client on its first
+query. ``warm_up()`` does that up front: wsgi.py calls it when
+``BLUEGUARD_WARM_UP`` is set, which under gunicorn happens in each worker
+after the fork (or once in the master with ``--preload``, shared by the
+workers). It opens no database connections, which must not cross a fork.
+"""
+import logging
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up():
+    """Import the URLconf and ``WARM_UP_IMPORTS``; returns the seconds it took."""
+    start = time.perf_counter()
+    # Builds the reverse lookup tables too, which imports every view
+    get_resolver().reverse_dict
+    for name in getattr(settings, 'WARM_UP_IMPORTS', ()):
+        try:
+            import_module(name)
+        except ImportError as e:
+            # Optional dependencies (ollama) may not be installed
+            logger.info("Warm-up skipped %s: %s", name, e)
+    elapsed = time.perf_counter() - start
+    logger.info("Warm-up took %.3f s", elapsed)
+    return elapsed
@@ -0,0 +1,67 @@
+"""
+Compare N single POST /api/reports/create/ calls against one POST /api/reports/bulk/.
+
+    python benchmarks/bench_bulk_reports.py --count 1000
+"""
+import argparse
+import random
+
+from harness import citizen_client, print_results, setup_django, teardown_django, timed
+
+
+def make_reports(count):
+    rng = random.Random(42)
+    return [
+        {
+            'location': f'Ward {rng.randint(1, 200)}',
+            'description': f'Water logging near market, about {rng.randint(10, 120)} cm deep',
+            'latitude': round(28.5 + rng.random(), 6),
+            'longitude': round(77.0 + rng.random(), 6),
+        }
+        for _ in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_django()
+    try:
+        from api.models import CitizenReport
+
+        client = citizen_client()
+        reports = make_reports(args.count)
+
+        def post_singles():
+            for report in reports:
+                response = client.post('/api/reports/create/', report, format='json')
+                assert response.status_code == 201, response.content
+
+        def post_batch():
+            response = client.post('/api/reports/bulk/', {'reports': reports}, format='json')
+            assert response.status_code == 201, response.content
+
+        single_seconds, _ = timed(post_singles)
+        batch_seconds, _ = timed(post_batch)
+        assert CitizenReport.objects.count() == 2 * args.count
+
+        print_results({
+            'reports': args.count,
+            'single_posts': {
+                'total_s': round(single_seconds, 3),
+                'per_report_ms': round(single_seconds * 1000 / args.count, 3),
+            },
+            'one_batch': {
+                'total_s': round(batch_seconds, 3),
+                'per_report_ms': round(batch_seconds * 1000 / args.count, 3),
+            },
+            'speedup': round(single_seconds / batch_seconds, 1),
+        })
+    finally:
+        teardown_django()
+
+
+if __name__ == '__main__':
+    main()
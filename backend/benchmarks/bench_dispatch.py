@@ -0,0 +1,102 @@
+"""
+Plan and apply automatic dispatch for a synthetic city: open reports and
+response teams scattered over a ~45 km square. Compares the optimal plan
+with greedy nearest-free-team assignment.
+
+    python benchmarks/bench_dispatch.py --reports 10000 --teams 200
+"""
+import argparse
+import random
+
+from harness import print_results, setup_django, teardown_django, timed
+
+SOUTH, WEST, SPAN = 28.40, 76.90, 0.40
+
+
+def populate(report_count, team_count, capacity, seed=11):
+    from api.models import CitizenReport, ResponseTeam
+
+    rng = random.Random(seed)
+    ResponseTeam.objects.bulk_create([
+        ResponseTeam(
+            name=f'Team {i}',
+            status=rng.choice(['Active', 'Active', 'Standby']),
+            base_latitude=round(SOUTH + rng.random() * SPAN, 6),
+            base_longitude=round(WEST + rng.random() * SPAN, 6),
+            capacity=rng.randint(capacity // 2, capacity * 3 // 2),
+        )
+        for i in range(team_count)
+    ])
+    # Reports bunch up around a few flooded areas
+    hotspots = [(SOUTH + rng.random() * SPAN, WEST + rng.random() * SPAN) for _ in range(25)]
+    for start in range(0, report_count, 5000):
+        batch = []
+        for _ in range(min(5000, report_count - start)):
+            lat, lon = rng.choice(hotspots)
+            batch.append(CitizenReport(
+                reporter_name='Bench', reporter_email='bench@example.com',
+                location='Bench', description='water logging',
+                latitude=round(lat + rng.gauss(0, 0.03), 6), longitude=round(lon + rng.gauss(0, 0.03), 6),
+            ))
+        CitizenReport.objects.bulk_create(batch)
+
+
+def greedy(reports, teams, candidates, max_distance_km):
+    """Each report, oldest first, takes its nearest candidate team with room left."""
+    from api.dispatch import TeamIndex
+
+    index = TeamIndex([(float(lat), float(lon)) for _, lat, lon, _ in teams])
+    room = [team[3] for team in teams]
+    total = served = 0
+    for _, lat, lon in reports:
+        for distance, team in index.nearest(float(lat), float(lon), candidates, max_distance_km * 1000):
+            if room[team]:
+                room[team] -= 1
+                total += round(distance)
+                served += 1
+                break
+    return served, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--reports', type=int, default=10000)
+    parser.add_argument('--teams', type=int, default=200)
+    parser.add_argument('--capacity', type=int, default=60, help='Mean team capacity.')
+    parser.add_argument('--candidates', type=int, default=8)
+    parser.add_argument('--max-distance-km', type=float, default=25)
+    args = parser.parse_args()
+
+    setup_django()
+    try:
+        from api.dispatch import apply_plan, dispatch_inputs, plan_dispatch
+
+        populate(args.reports, args.teams, args.capacity)
+        load_seconds, (reports, teams) = timed(dispatch_inputs)
+        plan_seconds, plan = timed(plan_dispatch, reports, teams, args.candidates, args.max_distance_km)
+        greedy_seconds, (greedy_served, greedy_meters) = timed(
+            greedy, reports, teams, args.candidates, args.max_distance_km
+        )
+        apply_seconds, applied = timed(apply_plan, plan['assignments'])
+
+        served = len(plan['assignments'])
+        print_results({
+            'reports': len(reports),
+            'teams': len(teams),
+            'capacity': sum(team[3] for team in teams),
+            'load_s': round(load_seconds, 3),
+            'plan_s': round(plan_seconds, 3),
+            'apply_s': round(apply_seconds, 3),
+            'greedy_s': round(greedy_seconds, 3),
+            'served': served,
+            'applied': len(applied),
+            'mean_km': round(plan['total_meters'] / max(served, 1) / 1000, 3),
+            'greedy_served': greedy_served,
+            'greedy_mean_km': round(greedy_meters / max(greedy_served, 1) / 1000, 3),
+        })
+    finally:
+        teardown_django()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Request overhead of logging: POST /api/debug/request/ (which logs the request
+with its headers and data) and POST /api/reports/create/, with the ``api``
+logger at DEBUG and its records going nowhere ("off"), to a file through a
+plain StreamHandler ("sync"), through the background queue handler from
+api/logconfig.py ("background"), or through it with the ``api`` logger
+sampled at one in ten ("background+sampled").
+
+``--sink-delay-ms`` makes every write to the log stall, as a stderr pipe does
+when the log shipper reading it falls behind; that stall is what the
+background handler keeps off the request thread.
+
+    python benchmarks/bench_logging.py --requests 2000 --sink-delay-ms 1
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from harness import citizen_client, percentiles, print_results, setup_django, teardown_django
+
+MODES = ('off', 'sync', 'background', 'background+sampled')
+
+
+class SlowStream:
+    """A file whose writes take ``delay`` seconds longer."""
+
+    def __init__(self, path, delay):
+        self.file = open(path, 'w')
+        self.delay = delay
+
+    def write(self, data):
+        if self.delay:
+            time.sleep(self.delay)
+        return self.file.write(data)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def configure(mode, path, delay):
+    """Point the ``api`` logger at a fresh handler for ``mode``; returns (handler, stream)."""
+    from api.logconfig import BackgroundHandler, JsonFormatter, SamplingFilter
+
+    logger = logging.getLogger('api')
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logging.disable(logging.CRITICAL if mode == 'off' else logging.NOTSET)
+    if mode == 'off':
+        return None, None
+    stream = SlowStream(path, delay)
+    handler = logging.StreamHandler(stream) if mode == 'sync' else BackgroundHandler(stream)
+    handler.setFormatter(JsonFormatter())
+    if mode == 'background+sampled':
+        handler.addFilter(SamplingFilter({'api': 10}))
+    logger.addHandler(handler)
+    return handler, stream
+
+
+def run(mode, client, count, path, delay=0):
+    handler, stream = configure(mode, path, delay)
+    results = {}
+    for name, url, payload in (
+        ('debug_request', '/api/debug/request/', {'username': 'bench', 'password': 'benchpass123', 'notes': 'x' * 500}),
+        ('create_report', '/api/reports/create/', {'location': 'Ward 12', 'description': 'Water logging near the market'}),
+    ):
+        latencies = []
+        for _ in range(count):
+            start = time.perf_counter()
+            response = client.post(url, payload, format='json')
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code in (200, 201), response.content
+        results[name] = percentiles(latencies)
+        results[name]['mean_ms'] = round(sum(latencies) * 1000 / count, 3)
+
+    if handler is not None:
+        # For the background modes, the time the writer needed to catch up
+        start = time.perf_counter()
+        logging.getLogger('api').removeHandler(handler)
+        handler.close()
+        stream.close()
+        results['drain_ms'] = round((time.perf_counter() - start) * 1000, 3)
+        with open(path) as log:
+            lines = log.readlines()
+        results['log_lines'] = len(lines)
+        results['password_in_log'] = any('benchpass123' in line for line in lines)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--sink-delay-ms', type=float, default=0)
+    args = parser.parse_args()
+
+    setup_django()
+    log_dir = tempfile.mkdtemp(prefix='blueguard-bench-logs-')
+    try:
+        client = citizen_client()
+        # Warm up URL resolution, serializers and the auth token cache
+        run('off', client, 20, None)
+        results = {'requests_per_endpoint': args.requests, 'sink_delay_ms': args.sink_delay_ms}
+        for mode in MODES:
+            path = os.path.join(log_dir, f'{mode}.log')
+            results[mode] = run(mode, client, args.requests, path, args.sink_delay_ms / 1000)
+        logging.disable(logging.NOTSET)
+        print_results(results)
+    finally:
+        teardown_django()
+
+
+if __name__ == '__main__':
+    main()
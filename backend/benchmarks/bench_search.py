@@ -0,0 +1,81 @@
+"""
+Compare LIKE '%term%' scans (the old admin search) with the FTS5 index for
+report search, on a synthetic table of reports.
+
+    python benchmarks/bench_search.py --count 1000000
+"""
+import argparse
+import random
+
+from harness import percentiles, print_results, setup_django, teardown_django, timed
+
+AREAS = [
+    'Yamuna Bank', 'Connaught Place', 'Rohini Sector', 'Dwarka Mor', 'Lajpat Nagar',
+    'Karol Bagh', 'Mayur Vihar', 'Saket', 'Janakpuri', 'Okhla Phase',
+]
+PHRASES = [
+    'water logging near the market', 'drain overflowing onto the road', 'basement flooded after rain',
+    'underpass submerged, traffic stopped', 'sewage backflow into houses', 'river level rising quickly',
+    'car stuck in knee deep water', 'school ground waterlogged', 'power cut due to flooding',
+    'embankment leaking near the bridge',
+]
+QUERIES = ['flood', 'embankment bridge', 'underpass', 'sewage houses', 'karol', 'waterlog']
+
+
+def populate(count, batch_size=10000):
+    from api.models import CitizenReport
+
+    rng = random.Random(7)
+    for start in range(0, count, batch_size):
+        CitizenReport.objects.bulk_create([
+            CitizenReport(
+                reporter_name=f'Citizen {rng.randint(1, 50000)}',
+                reporter_email=f'citizen{rng.randint(1, 50000)}@example.com',
+                location=f'{rng.choice(AREAS)} {rng.randint(1, 40)}',
+                description=f'{rng.choice(PHRASES)}; {rng.choice(PHRASES)} (ref {rng.randint(1, 10 ** 6)})',
+                status=rng.choice(['pending', 'reviewed', 'resolved']),
+            )
+            for _ in range(min(batch_size, count - start))
+        ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--limit', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    try:
+        from django.db.models import Q
+
+        from api.models import CitizenReport
+        from api.search import search_reports
+
+        populate_seconds, _ = timed(populate, args.count)
+
+        def like_search(text):
+            condition = Q()
+            for word in text.split():
+                condition &= Q(location__icontains=word) | Q(description__icontains=word)
+            return list(CitizenReport.objects.filter(condition).order_by('-created_at')[:args.limit])
+
+        def fts_search(text):
+            return list(search_reports(CitizenReport.objects.all(), text)[:args.limit])
+
+        results = {'reports': args.count, 'populate_s': round(populate_seconds, 2)}
+        for name, search in (('like', like_search), ('fts5', fts_search)):
+            samples = []
+            for _ in range(args.repeat):
+                for text in QUERIES:
+                    seconds, _ = timed(search, text)
+                    samples.append(seconds)
+            results[name] = percentiles(samples)
+        print_results(results)
+    finally:
+        teardown_django()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Write throughput of POST /api/reports/create/ from many threads at once, with
+the stock SQLite setup, the production profile (WAL + pragmas) and the
+production profile plus the single-writer queue.
+
+    python benchmarks/bench_sqlite_writes.py --threads 16 --per-thread 50
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from harness import citizen_client, percentiles, print_results, setup_django, teardown_django
+
+PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 30000,
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+def configure(profile):
+    import django
+    from django.conf import settings
+    from django.db import connection
+
+    options = {}
+    if profile == 'stock':
+        # Python's sqlite3 default; rollback journal
+        settings.SQLITE_PRAGMAS = {'journal_mode': 'DELETE'}
+    else:
+        settings.SQLITE_PRAGMAS = PRODUCTION_PRAGMAS
+        options['timeout'] = 30
+        if django.VERSION >= (5, 1):
+            options['transaction_mode'] = 'IMMEDIATE'
+    settings.SQLITE_WRITE_QUEUE = profile == 'production+queue'
+    connection.settings_dict['OPTIONS'] = options
+    connection.close()
+
+
+def run(profile, clients, per_thread):
+    from django.db import connection
+
+    configure(profile)
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(len(clients))
+
+    def worker(index, client):
+        samples, errors = [], []
+        barrier.wait()
+        for n in range(per_thread):
+            start = time.perf_counter()
+            response = client.post('/api/reports/create/', {
+                'location': f'Ward {index}',
+                'description': f'Report {n} from worker {index}',
+            }, format='json')
+            samples.append(time.perf_counter() - start)
+            if response.status_code != 201:
+                errors.append(response.status_code)
+        connection.close()
+        with lock:
+            latencies.extend(samples)
+            failures.extend(errors)
+
+    threads = [threading.Thread(target=worker, args=(i, c)) for i, c in enumerate(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    attempted = len(clients) * per_thread
+    return {
+        'requests': attempted,
+        'failed': len(failures),
+        'total_s': round(elapsed, 3),
+        'writes_per_s': round((attempted - len(failures)) / elapsed, 1),
+        **percentiles(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--per-thread', type=int, default=50)
+    args = parser.parse_args()
+
+    # Threads need to share one database, so use a real file.
+    db_file = os.path.join(tempfile.mkdtemp(prefix='blueguard-bench-db-'), 'bench.sqlite3')
+    setup_django(db_file=db_file)
+    try:
+        clients = [citizen_client(f'bench_writer_{i}') for i in range(args.threads)]
+        results = {'threads': args.threads, 'per_thread': args.per_thread}
+        for profile in ('stock', 'production', 'production+queue'):
+            results[profile] = run(profile, clients, args.per_thread)
+        print_results(results)
+    finally:
+        teardown_django()
+
+
+if __name__ == '__main__':
+    main()
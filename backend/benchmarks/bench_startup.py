@@ -0,0 +1,120 @@
+"""
+Process start to first request, with and without the warm-up hook
+(api/warmup.py), in fresh interpreters run with ``python -X importtime``.
+
+Each run spawns a process that loads the WSGI application, then serves
+GET /api/reports/count/ and a flood-risk chatbot query (answered by
+benchmarks/upstream_stubs.py) through it. Reported times are
+from the spawn, so they include interpreter startup; ``imports`` lists the
+modules with the largest cumulative import time.
+
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from harness import BACKEND_DIR, print_results
+from upstream_stubs import start_stubs
+
+CHILD = r'''
+import io, json, sys, time
+marks = {}
+sys.path.insert(0, %(backend)r)
+from blueguard_backend.wsgi import application
+marks['app_loaded'] = time.time()
+
+def call(method, path, body=b''):
+    environ = {
+        'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': '', 'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80', 'REMOTE_ADDR': '127.0.0.1', 'HTTP_HOST': 'localhost',
+        'CONTENT_TYPE': 'application/json', 'CONTENT_LENGTH': str(len(body)), 'wsgi.input': io.BytesIO(body),
+        'wsgi.url_scheme': 'http', 'wsgi.errors': sys.stderr, 'wsgi.multithread': True,
+        'wsgi.multiprocess': False, 'wsgi.run_once': False, 'wsgi.version': (1, 0),
+    }
+    status = []
+    b''.join(application(environ, lambda s, h, e=None: status.append(s)))
+    return status[0]
+
+marks['first_request_status'] = call('GET', '/api/reports/count/')
+marks['first_request'] = time.time()
+marks['first_chatbot_status'] = call('POST', '/api/chatbot/query/', b'{"text": "Is there a flood risk today?"}')
+marks['first_chatbot'] = time.time()
+print(json.dumps(marks))
+'''
+
+
+def parse_importtime(stderr, top):
+    """Total import time and the ``top`` slowest top-level imports by cumulative time (ms)."""
+    total, roots = 0, []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        total += int(self_us)
+        # Nested imports are indented under the module that imported them
+        if not name[1:].startswith(' '):
+            roots.append((int(cumulative_us), name.strip()))
+    roots.sort(reverse=True)
+    return round(total / 1000, 1), {name: round(us / 1000, 1) for us, name in roots[:top]}
+
+
+def run_once(env):
+    spawned = time.time()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHILD % {'backend': BACKEND_DIR}],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    marks = json.loads(result.stdout.strip().splitlines()[-1])
+    return {
+        'app_loaded_ms': (marks['app_loaded'] - spawned) * 1000,
+        'first_request_ms': (marks['first_request'] - spawned) * 1000,
+        'first_chatbot_ms': (marks['first_chatbot'] - spawned) * 1000,
+        'statuses': [marks['first_request_status'], marks['first_chatbot_status']],
+    }, result.stderr
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='How many of the slowest imports to list.')
+    args = parser.parse_args()
+
+    stubs = start_stubs()
+    work_dir = tempfile.mkdtemp(prefix='blueguard-bench-startup-')
+    base_env = {
+        **os.environ,
+        **stubs.environment(),
+        'DJANGO_SETTINGS_MODULE': 'blueguard_backend.settings',
+        'BLUEGUARD_DB_PATH': os.path.join(work_dir, 'startup.sqlite3'),
+        'BLUEGUARD_LOG_LEVEL': 'WARNING',
+    }
+    subprocess.run([sys.executable, 'manage.py', 'migrate', '--noinput'], cwd=BACKEND_DIR, env=base_env,
+                   check=True, stdout=subprocess.DEVNULL)
+
+    results = {'runs': args.runs}
+    for scenario, warm in (('cold', ''), ('warm_up', '1')):
+        env = {**base_env, 'BLUEGUARD_WARM_UP': warm}
+        runs, stderr = [], ''
+        for _ in range(args.runs):
+            timings, stderr = run_once(env)
+            runs.append(timings)
+        import_ms, imports = parse_importtime(stderr, args.top)
+        results[scenario] = {
+            **{key: round(statistics.median(run[key] for run in runs), 1)
+               for key in ('app_loaded_ms', 'first_request_ms', 'first_chatbot_ms')},
+            'statuses': runs[-1]['statuses'],
+            'import_ms': import_ms,
+            'imports': imports,
+        }
+    stubs.shutdown()
+    print_results(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Memory held per cached location-month: the raw WeatherAPI JSON the weather
+engine used to keep (the whole forecast response, and the full
+``forecastday`` of each of 30 history days) against the parsed
+``DayWeather`` records it keeps now.
+
+Payloads are synthetic but shaped like WeatherAPI's, with 24 hourly entries
+and astronomy data per day. Memory is measured with tracemalloc as the bytes
+still allocated once the responses have been decoded and reduced to what the
+cache retains.
+
+    python benchmarks/bench_weather_memory.py --locations 200
+"""
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from harness import print_results
+
+from chatbot.weather_engine import DayWeather, parse_forecast_days
+
+FORECAST_DAYS = 10
+HISTORY_DAYS = 30
+
+
+def condition(rng):
+    return {'text': rng.choice(['Patchy rain nearby', 'Moderate rain', 'Sunny', 'Overcast']),
+            'icon': f'//cdn.weatherapi.com/weather/64x64/day/{rng.randint(100, 399)}.png',
+            'code': rng.randint(1000, 1300)}
+
+
+def hour(day, index, rng):
+    return {
+        'time_epoch': 1700000000 + index * 3600, 'time': f'{day} {index:02d}:00',
+        'temp_c': round(rng.uniform(20, 35), 1), 'temp_f': round(rng.uniform(68, 95), 1),
+        'is_day': int(6 <= index < 18), 'condition': condition(rng),
+        'wind_mph': round(rng.uniform(0, 20), 1), 'wind_kph': round(rng.uniform(0, 32), 1),
+        'wind_degree': rng.randint(0, 359), 'wind_dir': rng.choice(['N', 'NE', 'SW', 'WSW']),
+        'pressure_mb': float(rng.randint(995, 1015)), 'pressure_in': round(rng.uniform(29.4, 30), 2),
+        'precip_mm': round(rng.uniform(0, 5), 2), 'precip_in': round(rng.uniform(0, 0.2), 2),
+        'snow_cm': 0.0, 'humidity': rng.randint(50, 99), 'cloud': rng.randint(0, 100),
+        'feelslike_c': round(rng.uniform(20, 40), 1), 'feelslike_f': round(rng.uniform(68, 104), 1),
+        'windchill_c': round(rng.uniform(20, 35), 1), 'windchill_f': round(rng.uniform(68, 95), 1),
+        'heatindex_c': round(rng.uniform(20, 40), 1), 'heatindex_f': round(rng.uniform(68, 104), 1),
+        'dewpoint_c': round(rng.uniform(15, 27), 1), 'dewpoint_f': round(rng.uniform(59, 81), 1),
+        'will_it_rain': rng.randint(0, 1), 'chance_of_rain': rng.randint(0, 100),
+        'will_it_snow': 0, 'chance_of_snow': 0, 'vis_km': 10.0, 'vis_miles': 6.0,
+        'gust_mph': round(rng.uniform(0, 30), 1), 'gust_kph': round(rng.uniform(0, 48), 1), 'uv': rng.randint(0, 11),
+    }
+
+
+def forecastday(day, rng):
+    return {
+        'date': day.isoformat(),
+        'date_epoch': 1700000000,
+        'day': {
+            'maxtemp_c': round(rng.uniform(28, 36), 1), 'maxtemp_f': round(rng.uniform(82, 97), 1),
+            'mintemp_c': round(rng.uniform(20, 27), 1), 'mintemp_f': round(rng.uniform(68, 81), 1),
+            'avgtemp_c': round(rng.uniform(24, 30), 1), 'avgtemp_f': round(rng.uniform(75, 86), 1),
+            'maxwind_mph': round(rng.uniform(5, 30), 1), 'maxwind_kph': round(rng.uniform(8, 48), 1),
+            'totalprecip_mm': round(rng.expovariate(1 / 25), 1), 'totalprecip_in': round(rng.uniform(0, 4), 2),
+            'totalsnow_cm': 0.0, 'avgvis_km': 9.5, 'avgvis_miles': 5.0, 'avghumidity': rng.randint(50, 98),
+            'daily_will_it_rain': rng.randint(0, 1), 'daily_chance_of_rain': rng.randint(0, 100),
+            'daily_will_it_snow': 0, 'daily_chance_of_snow': 0, 'condition': condition(rng), 'uv': 7.0,
+        },
+        'astro': {'sunrise': '06:12 AM', 'sunset': '06:48 PM', 'moonrise': '10:01 AM', 'moonset': '09:40 PM',
+                  'moon_phase': 'Waxing Crescent', 'moon_illumination': 21, 'is_moon_up': 0, 'is_sun_up': 0},
+        'hour': [hour(day.isoformat(), index, rng) for index in range(24)],
+    }
+
+
+def location_payloads(index):
+    """Encoded forecast and history responses for one location, as they come off the wire."""
+    rng = random.Random(index)
+    today = date(2024, 7, 1)
+    envelope = {
+        'location': {'name': f'City {index}', 'region': 'Maharashtra', 'country': 'India',
+                     'lat': 19.08, 'lon': 72.88, 'tz_id': 'Asia/Kolkata', 'localtime': '2024-07-01 09:30'},
+        'current': {'temp_c': 29.0, 'condition': condition(rng), 'humidity': 84, 'precip_mm': 1.2},
+    }
+    forecast = json.dumps({
+        **envelope, 'alerts': {'alert': []},
+        'forecast': {'forecastday': [forecastday(today + timedelta(days=i), rng) for i in range(FORECAST_DAYS)]},
+    }).encode()
+    history = [
+        json.dumps({**envelope, 'forecast': {'forecastday': [forecastday(today - timedelta(days=i), rng)]}}).encode()
+        for i in range(1, HISTORY_DAYS + 1)
+    ]
+    return forecast, history
+
+
+def retain_raw(forecast, history):
+    return json.loads(forecast), [json.loads(body)['forecast']['forecastday'][0] for body in history]
+
+
+def retain_parsed(forecast, history):
+    return (
+        parse_forecast_days(json.loads(forecast)),
+        [DayWeather.from_api(json.loads(body)['forecast']['forecastday'][0]) for body in history],
+    )
+
+
+def measure(payloads, retain):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    cache = [retain(forecast, history) for forecast, history in payloads]
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del cache
+    return {
+        'bytes_per_location_month': round(retained / len(payloads)),
+        'peak_mb': round(peak / 2**20, 1),
+        'decode_ms_per_location': round(elapsed * 1000 / len(payloads), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--locations', type=int, default=200)
+    args = parser.parse_args()
+
+    payloads = [location_payloads(index) for index in range(args.locations)]
+    wire = sum(len(forecast) + sum(map(len, history)) for forecast, history in payloads)
+    raw = measure(payloads, retain_raw)
+    parsed = measure(payloads, retain_parsed)
+    print_results({
+        'locations': args.locations,
+        'wire_bytes_per_location_month': round(wire / args.locations),
+        'raw_json': raw,
+        'parsed_records': parsed,
+        'reduction': round(raw['bytes_per_location_month'] / parsed['bytes_per_location_month'], 1),
+    })
+
+
+if __name__ == '__main__':
+    main()
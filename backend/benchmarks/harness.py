@@ -0,0 +1,89 @@
+"""
+Shared setup for the benchmark scripts in this folder.
+
+Each script runs against a throwaway test database (and a temporary MEDIA_ROOT)
+so it never touches db.sqlite3. Run them from the backend folder, e.g.:
+
+    python benchmarks/bench_bulk_reports.py --count 1000
+"""
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blueguard_backend.settings')
+
+
+def setup_django(db_file=None):
+    """
+    Configure Django and create a fresh test database.
+
+    SQLite test databases live in memory by default; pass ``db_file`` to use a
+    real file instead (needed when several threads must share the database).
+    """
+    import django
+    from django.conf import settings
+
+    django.setup()
+    settings.MEDIA_ROOT = tempfile.mkdtemp(prefix='blueguard-bench-media-')
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    if db_file:
+        connection.settings_dict['TEST']['NAME'] = db_file
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+
+def teardown_django():
+    from django.db import connection
+
+    connection.creation.destroy_test_db(connection.settings_dict['NAME'], verbosity=0)
+
+
+def citizen_client(username='bench_citizen'):
+    """Create a citizen with an auth token and return an API client logged in as them."""
+    from django.contrib.auth.models import User
+    from rest_framework.authtoken.models import Token
+    from rest_framework.test import APIClient
+
+    from api.models import UserProfile
+
+    user = User.objects.create_user(username, f'{username}@example.com', 'benchpass123', first_name='Bench')
+    UserProfile.objects.create(user=user, user_type='citizen')
+    token = Token.objects.create(user=user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+def timed(func, *args, **kwargs):
+    """Return (seconds, result) for one call of ``func``."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def percentiles(samples):
+    """p50/p95/p99 (in milliseconds) of a list of durations in seconds."""
+    if not samples:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None}
+    if len(samples) == 1:
+        cuts = [samples[0]] * 99
+    else:
+        cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {
+        'p50_ms': round(cuts[49] * 1000, 3),
+        'p95_ms': round(cuts[94] * 1000, 3),
+        'p99_ms': round(cuts[98] * 1000, 3),
+    }
+
+
+def print_results(results):
+    print(json.dumps(results, indent=2, default=str))
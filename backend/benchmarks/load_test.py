@@ -0,0 +1,248 @@
+"""
+End-to-end load test. Seeds a throwaway database (seed_benchmark_data),
+starts the upstream stubs and a server on it, then drives a weighted mix of
+login, create_report, get_reports, get_all_reports and chatbot_query from
+many worker threads and prints throughput and p50/p95/p99 latency per
+endpoint as JSON, tagged with the git revision, for comparing versions.
+
+    python benchmarks/load_test.py --workers 16 --duration 30
+    python benchmarks/load_test.py --server-cmd "gunicorn blueguard_backend.wsgi -w 4 --threads 8 -b 127.0.0.1:{port}"
+
+With ``--base-url`` it drives an already running server instead, which must
+have been seeded with the same ``--prefix``/``--password`` and started with
+the environment printed by benchmarks/upstream_stubs.py.
+"""
+import argparse
+import json
+import os
+import random
+import shlex
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from harness import BACKEND_DIR, percentiles, print_results
+from upstream_stubs import start_stubs
+
+DEFAULT_MIX = 'login=1,create_report=4,get_reports=6,get_all_reports=1,chatbot_query=1'
+CHAT_QUESTIONS = [
+    'Is there a flood risk today?',
+    'Give me details of the rain forecast',
+    'How do I prepare an emergency kit?',
+    'What should I do if water enters my house?',
+]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def manage(env, *args):
+    subprocess.run([sys.executable, 'manage.py', *args], cwd=BACKEND_DIR, env=env, check=True, stdout=subprocess.DEVNULL)
+
+
+def wait_until_up(base_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f'{base_url}/api/reports/count/', timeout=2)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Server at {base_url} did not come up within {timeout}s')
+
+
+class Worker(threading.Thread):
+    def __init__(self, index, args, mix, start_at, warm_until, stop_at):
+        super().__init__(name=f'load-worker-{index}', daemon=True)
+        self.rng = random.Random(index)
+        self.base_url = args.base_url
+        self.username = f'{args.prefix}_citizen_{index % args.users}'
+        self.password = args.password
+        self.operations, self.weights = zip(*mix.items())
+        self.start_at, self.warm_until, self.stop_at = start_at, warm_until, stop_at
+        self.samples = []  # (operation, seconds, status code or None)
+        self.session = requests.Session()
+
+    def login(self):
+        response = self.session.post(f'{self.base_url}/api/auth/login/', json={
+            'username': self.username, 'password': self.password,
+        }, timeout=30)
+        if response.status_code == 200:
+            self.session.headers['Authorization'] = f"Token {response.json()['token']}"
+        return response
+
+    def create_report(self):
+        return self.session.post(f'{self.base_url}/api/reports/create/', json={
+            'location': f'Ward {self.rng.randint(1, 200)}, Mumbai',
+            'description': f'Water logging about {self.rng.randint(10, 120)} cm deep near the market',
+            'latitude': round(19.0 + self.rng.random() * 0.2, 6),
+            'longitude': round(72.8 + self.rng.random() * 0.2, 6),
+        }, timeout=30)
+
+    def get_reports(self):
+        return self.session.get(f'{self.base_url}/api/reports/', timeout=30)
+
+    def get_all_reports(self):
+        return self.session.get(f'{self.base_url}/api/reports/all/', timeout=60)
+
+    def chatbot_query(self):
+        return self.session.post(f'{self.base_url}/api/chatbot/query/', json={
+            'text': self.rng.choice(CHAT_QUESTIONS),
+        }, timeout=60)
+
+    def run(self):
+        self.login()
+        while time.monotonic() < self.start_at:
+            time.sleep(0.001)
+        while time.monotonic() < self.stop_at:
+            operation = self.rng.choices(self.operations, self.weights)[0]
+            started = time.monotonic()
+            try:
+                status = getattr(self, operation)().status_code
+            except requests.RequestException:
+                status = None
+            if started >= self.warm_until:
+                self.samples.append((operation, time.monotonic() - started, status))
+
+
+def summarize(samples, seconds):
+    results = {}
+    for operation in sorted({sample[0] for sample in samples}):
+        rows = [sample for sample in samples if sample[0] == operation]
+        statuses = {}
+        for _, _, status in rows:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        ok = [latency for _, latency, status in rows if status is not None and status < 400]
+        results[operation] = {
+            'requests': len(rows),
+            'ok': len(ok),
+            'throttled': statuses.get('429', 0),
+            'errors': len(rows) - len(ok) - statuses.get('429', 0),
+            'per_s': round(len(rows) / seconds, 2),
+            **percentiles(ok),
+            'statuses': statuses,
+        }
+    ok = [latency for _, latency, status in samples if status is not None and status < 400]
+    results['total'] = {
+        'requests': len(samples),
+        'ok': len(ok),
+        'per_s': round(len(samples) / seconds, 2),
+        **percentiles(ok),
+    }
+    return results
+
+
+def drive(args, mix):
+    now = time.monotonic()
+    # Give every worker time to log in before the clock starts
+    start_at = now + 2
+    warm_until = start_at + args.warmup
+    stop_at = warm_until + args.duration
+    workers = [Worker(index, args, mix, start_at, warm_until, stop_at) for index in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return summarize([sample for worker in workers for sample in worker.samples], args.duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=30, help='Measured seconds.')
+    parser.add_argument('--warmup', type=float, default=3, help='Seconds run before measuring.')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='Operation weights, e.g. "get_reports=6,login=1".')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--reports', type=int, default=5000)
+    parser.add_argument('--upstream-latency-ms', type=float, default=20)
+    parser.add_argument('--prefix', default='loadtest')
+    parser.add_argument('--password', default='loadtest123')
+    parser.add_argument('--base-url', help='Drive this running server instead of starting one.')
+    parser.add_argument('--server-cmd', help='Command that starts the server; {port} is replaced. Default: runserver.')
+    parser.add_argument('--output', help='Also write the results to this file.')
+    args = parser.parse_args()
+
+    mix = {}
+    for item in args.mix.split(','):
+        operation, _, weight = item.partition('=')
+        if not hasattr(Worker, operation.strip()):
+            parser.error(f'Unknown operation in --mix: {operation}')
+        mix[operation.strip()] = float(weight or 1)
+
+    results = {
+        'revision': git_revision(),
+        'workers': args.workers,
+        'duration_s': args.duration,
+        'mix': mix,
+    }
+    server = stubs = log = None
+    try:
+        if not args.base_url:
+            stubs = start_stubs(args.upstream_latency_ms)
+            work_dir = tempfile.mkdtemp(prefix='blueguard-load-')
+            env = {
+                **os.environ,
+                **stubs.environment(),
+                'BLUEGUARD_DB_PATH': os.path.join(work_dir, 'load.sqlite3'),
+                'BLUEGUARD_PROFILE_DIR': os.path.join(work_dir, 'profiles'),
+                # WAL and a busy timeout; the development profile fails concurrent writers
+                'BLUEGUARD_DB_PROFILE': os.environ.get('BLUEGUARD_DB_PROFILE', 'production'),
+                # Every worker calls from 127.0.0.1
+                'BLUEGUARD_RATE_LIMITS': 'off',
+                'BLUEGUARD_LOG_LEVEL': 'WARNING',
+            }
+            manage(env, 'migrate', '--noinput')
+            manage(env, 'seed_benchmark_data', '--users', str(args.users), '--reports', str(args.reports),
+                   '--prefix', args.prefix, '--password', args.password)
+            port = free_port()
+            command = (
+                shlex.split(args.server_cmd.format(port=port)) if args.server_cmd
+                else [sys.executable, 'manage.py', 'runserver', '--noreload', f'127.0.0.1:{port}']
+            )
+            log = open(os.path.join(work_dir, 'server.log'), 'w')
+            server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+            args.base_url = f'http://127.0.0.1:{port}'
+            results.update({
+                'server': args.server_cmd or 'runserver',
+                'seeded_reports': args.reports,
+                'upstream_latency_ms': args.upstream_latency_ms,
+                'server_log': log.name,
+            })
+        wait_until_up(args.base_url)
+        results['endpoints'] = drive(args, mix)
+        if stubs is not None:
+            results['upstream_calls'] = dict(stubs.calls)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if log is not None:
+            log.close()
+        if stubs is not None:
+            stubs.shutdown()
+
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(results, handle, indent=2, default=str)
+
+
+if __name__ == '__main__':
+    main()
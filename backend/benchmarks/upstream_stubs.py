@@ -0,0 +1,134 @@
+"""
+Local stand-ins for the services the chatbot calls, for load tests: an
+ipinfo-style location lookup, WeatherAPI forecast/history and Ollama's chat
+API, each answering after ``--latency-ms``.
+
+Start the server under test with the environment this prints, e.g.:
+
+    python benchmarks/upstream_stubs.py --port 8099 --latency-ms 20
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+LOCATION = {'city': 'Mumbai', 'region': 'Maharashtra', 'country': 'IN', 'loc': '19.0760,72.8777'}
+
+
+def weather_day(day, rng):
+    return {
+        'date': day.isoformat(),
+        'day': {
+            'totalprecip_mm': round(rng.expovariate(1 / 25), 1),
+            'daily_chance_of_rain': rng.randint(0, 100),
+            'maxwind_kph': round(rng.uniform(5, 60), 1),
+            'avghumidity': rng.randint(50, 98),
+        },
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def delay(self):
+        latency = self.server.latency
+        if latency:
+            time.sleep(latency * random.uniform(0.5, 1.5))
+        self.server.count(self.path.split('?')[0])
+
+    def do_GET(self):
+        self.delay()
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == '/location/json':
+            return self.send_json(LOCATION)
+        if url.path == '/weather/forecast.json':
+            rng = random.Random(query.get('q', [''])[0])
+            today = date.today()
+            days = int(query.get('days', ['10'])[0])
+            return self.send_json({'forecast': {'forecastday': [
+                weather_day(today + timedelta(days=i), rng) for i in range(days)
+            ]}})
+        if url.path == '/weather/history.json':
+            day = date.fromisoformat(query.get('dt', [date.today().isoformat()])[0])
+            rng = random.Random(f"{query.get('q', [''])[0]}{day}")
+            return self.send_json({'forecast': {'forecastday': [weather_day(day, rng)]}})
+        self.send_json({'error': 'not found'}, status=404)
+
+    def do_POST(self):
+        self.delay()
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if urlparse(self.path).path == '/api/chat':
+            request = json.loads(body or b'{}')
+            return self.send_json({
+                'model': request.get('model', 'phi3:mini'),
+                'created_at': '2024-01-01T00:00:00Z',
+                'message': {'role': 'assistant', 'content': 'Stay indoors and away from flooded roads.'},
+                'done': True,
+            })
+        self.send_json({'error': 'not found'}, status=404)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms=0):
+        super().__init__(address, StubHandler)
+        self.latency = latency_ms / 1000
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def count(self, path):
+        with self.lock:
+            self.calls[path] = self.calls.get(path, 0) + 1
+
+    def environment(self):
+        """Environment variables that point the backend at this server."""
+        base = f'http://{self.server_address[0]}:{self.server_address[1]}'
+        return {
+            'BLUEGUARD_LOCATION_URLS': f'{base}/location/json',
+            'BLUEGUARD_WEATHER_API_URL': f'{base}/weather',
+            'OLLAMA_HOST': base,
+        }
+
+
+def start_stubs(latency_ms=0, host='127.0.0.1', port=0):
+    """Serve the stubs from a background thread; returns the server."""
+    server = StubServer((host, port), latency_ms)
+    threading.Thread(target=server.serve_forever, name='upstream-stubs', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency-ms', type=float, default=20)
+    args = parser.parse_args()
+
+    server = StubServer((args.host, args.port), args.latency_ms)
+    for name, value in server.environment().items():
+        print(f'export {name}={value}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -13,7 +13,13 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blueguard_backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# The report change feed (Server-Sent Events) is served outside Django's
+# request cycle, so long-lived streams do not each hold a worker thread.
+from api.sse import with_report_event_stream  # noqa: E402
+
+application = with_report_event_stream(django_application)
 
 
 
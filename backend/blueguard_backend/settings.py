@@ -34,6 +34,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -42,6 +44,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.ReplicaStickinessMiddleware',
+    'api.middleware.IdempotencyMiddleware',
 ]
 
 # CSRF settings - DRF handles CSRF for API endpoints, but we ensure it doesn't block API requests
@@ -79,10 +83,187 @@ WSGI_APPLICATION = 'blueguard_backend.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('BLUEGUARD_DB_PATH', BASE_DIR / 'db.sqlite3'),
     }
 }
 
+# BLUEGUARD_DB_PROFILE=production tunes SQLite for concurrent writers: WAL
+# journaling, a busy timeout instead of immediate "database is locked" errors,
+# a larger page cache and mmap, and persistent connections.
+DB_PROFILE = os.environ.get('BLUEGUARD_DB_PROFILE', 'development')
+
+# PRAGMAs run on every new connection (api/db.py)
+SQLITE_PRAGMAS = {}
+
+# Route writes through one background writer thread that batches them into
+# shared transactions (api.db.run_write)
+SQLITE_WRITE_QUEUE = os.environ.get('BLUEGUARD_DB_WRITE_QUEUE', '').lower() in ('1', 'true', 'yes')
+SQLITE_WRITE_QUEUE_MAX_BATCH = 64
+SQLITE_WRITE_QUEUE_MAX_DELAY = 0.002  # seconds to wait for a batch to fill
+
+if DB_PROFILE == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': int(os.environ.get('BLUEGUARD_DB_CONN_MAX_AGE', '600')),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'timeout': 30},
+    })
+    import django
+    if django.VERSION >= (5, 1):
+        # Take the write lock when a transaction starts, so two readers never
+        # deadlock trying to upgrade to writers.
+        DATABASES['default']['OPTIONS']['transaction_mode'] = 'IMMEDIATE'
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 30000,
+        'cache_size': -64000,  # KiB
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+    }
+
+# Read replica for the dashboard list endpoints (api/routers.py). Point
+# BLUEGUARD_REPLICA_DB_PATH at a copy of the database kept up to date by
+# replication, or by `python manage.py sync_replica --interval 2` locally.
+REPLICA_DATABASE = 'replica'
+REPLICA_STICKY_SECONDS = 5  # keep a caller on the primary this long after a write
+if os.environ.get('BLUEGUARD_REPLICA_DB_PATH'):
+    DATABASES[REPLICA_DATABASE] = {
+        **DATABASES['default'],
+        'NAME': os.environ['BLUEGUARD_REPLICA_DB_PATH'],
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['api.routers.PrimaryReplicaRouter']
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Responses stored for Idempotency-Key replays (api/middleware.py). This is
+    # per process; point it at a shared backend when running several workers.
+    'idempotency': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'idempotency',
+        'TIMEOUT': 24 * 60 * 60,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+IDEMPOTENCY_CACHE_ALIAS = 'idempotency'
+# How long a duplicate request waits for the original to finish (seconds)
+IDEMPOTENCY_LOCK_TIMEOUT = 60
+IDEMPOTENCY_MAX_RESPONSE_BYTES = 1024 * 1024
+
+
+# Full-text report search (api/search.py): searches matching more reports than
+# this (after their status/team/date/reporter filters) return the newest this
+# many, ranked. None ranks every match.
+REPORT_SEARCH_RANK_WINDOW = 5000
+
+# Near-duplicate report clustering (api/dedup.py): a new report joins an
+# incident within this distance and time window whose description is at
+# least this similar (estimated Jaccard similarity of shingles).
+INCIDENT_CELL_DEGREES = 0.005  # grid cell size, about 550 m of latitude
+INCIDENT_RADIUS_METERS = 500
+INCIDENT_WINDOW_HOURS = 6
+INCIDENT_SIMILARITY = 0.3
+INCIDENT_MINHASH_PERMUTATIONS = 64
+
+# Hot report ranking (api/ranking.py): this many seconds of recency weigh as
+# much as ten times the upvotes. Run `manage.py reconcile_upvotes --rescore`
+# after changing it.
+REPORT_HOT_DECAY_SECONDS = 45000
+
+# Automatic dispatch (api/dispatch.py): each report is only considered for its
+# nearest teams within this distance of the team's base.
+DISPATCH_CANDIDATE_TEAMS = 8
+DISPATCH_MAX_DISTANCE_KM = 25
+DISPATCH_CELL_DEGREES = 0.05  # grid cell size for the team base index
+# Largest 'candidates' and 'max_distance_km' a caller may ask for
+DISPATCH_CANDIDATE_TEAMS_LIMIT = 50
+DISPATCH_MAX_DISTANCE_LIMIT_KM = 200
+
+# Report change feed (api/changefeed.py, api/sse.py)
+REPORT_EVENT_STREAM_PATH = '/api/reports/events/stream/'
+REPORT_EVENT_POLL_INTERVAL = 1.0  # seconds between hub polls of ReportEvent
+REPORT_EVENT_BATCH_SIZE = 500
+REPORT_EVENT_MAX_PENDING = 1000  # per client; slower clients are disconnected and resume
+REPORT_EVENT_HEARTBEAT = 15  # seconds
+
+# Prometheus metrics (api/metrics.py) at /metrics. When set, scrapers must
+# send "Authorization: Bearer <token>".
+METRICS_TOKEN = os.environ.get('BLUEGUARD_METRICS_TOKEN', '')
+
+# Request profiling (api/profiling.py). Admins can always ask for a profile;
+# PROFILE_SAMPLE_RATE = N also profiles one in N requests (0 disables).
+PROFILE_DIR = os.environ.get('BLUEGUARD_PROFILE_DIR', str(BASE_DIR / 'profiles'))
+PROFILE_KEEP = 200  # newest profiles kept on disk
+PROFILE_SAMPLE_RATE = int(os.environ.get('BLUEGUARD_PROFILE_SAMPLE_RATE', '0'))
+PROFILE_SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+
+# Slow query log (api/querylog.py): queries at least this slow are kept, with
+# their query plan, in a per-process buffer of the last SLOW_QUERY_LOG_SIZE.
+# BLUEGUARD_SLOW_QUERY_MS=0 turns the log off.
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('BLUEGUARD_SLOW_QUERY_MS', '100') or 0) or None
+SLOW_QUERY_LOG_SIZE = 500
+
+# Rate limits (api/ratelimit.py): a token bucket per client (user, or IP for
+# anonymous callers) and scope, as (tokens per second, burst). Buckets live
+# in each process unless RATE_LIMIT_CACHE_ALIAS names a cache shared by the
+# workers.
+RATE_LIMITS = {
+    'chatbot': (0.2, 5),
+    'otp': (1 / 120, 5),
+    'otp_verify': (1 / 30, 5),
+    'public_writes': (1, 10),
+    'public_reads': (5, 30),
+}
+if os.environ.get('BLUEGUARD_RATE_LIMITS', '').lower() == 'off':
+    # Load tests drive many requests from one address
+    RATE_LIMITS = {}
+RATE_LIMIT_CACHE_ALIAS = None
+RATE_LIMIT_MAX_KEYS = 100000
+# Concurrent requests per process for expensive views; the rest get a 429
+ADMISSION_LIMITS = {'chatbot': 4}
+ADMISSION_RETRY_AFTER = 2  # seconds
+
+# Modules imported by api.warmup.warm_up() (BLUEGUARD_WARM_UP=1) instead of on
+# the first chatbot query; missing optional ones are skipped
+WARM_UP_IMPORTS = ['chatbot', 'requests', 'ollama']
+
+# Logging (api/logconfig.py): JSON lines on stderr, formatted and written by a
+# background thread, with passwords, tokens and OTPs redacted.
+# LOG_SAMPLE_RATES = {'logger': N} keeps one in N of that logger's records
+# below WARNING.
+LOG_LEVEL = os.environ.get('BLUEGUARD_LOG_LEVEL', 'INFO')
+LOG_SAMPLE_RATES = {}
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'sampling': {'()': 'api.logconfig.SamplingFilter', 'rates': LOG_SAMPLE_RATES},
+    },
+    'formatters': {
+        'json': {'()': 'api.logconfig.JsonFormatter'},
+    },
+    'handlers': {
+        'background': {
+            '()': 'api.logconfig.BackgroundHandler',
+            'formatter': 'json',
+            'filters': ['sampling'],
+        },
+    },
+    'root': {'handlers': ['background'], 'level': 'WARNING'},
+    'loggers': {
+        'django': {'handlers': ['background'], 'level': 'INFO', 'propagate': False},
+        'api': {'level': LOG_LEVEL},
+        'chatbot': {'level': LOG_LEVEL},
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -124,6 +305,38 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads are streamed to temporary files in 64 KiB chunks, hashed and
+# sniffed on the fly (see api/upload_handlers.py). Sizes are in bytes.
+FILE_UPLOAD_HANDLERS = [
+    'api.upload_handlers.HashingUploadHandler',
+]
+UPLOAD_MAX_SIZES = {
+    'image': 10 * 1024 * 1024,
+    'audio': 25 * 1024 * 1024,
+    'default': 10 * 1024 * 1024,
+}
+UPLOAD_MAX_REQUEST_SIZE = 40 * 1024 * 1024
+
+# Maximum number of reports accepted by /api/reports/bulk/ in one request
+REPORT_BULK_MAX_ITEMS = 1000
+
+# Resumable (chunked) uploads are assembled here before being stored
+RESUMABLE_UPLOAD_ROOT = BASE_DIR / 'resumable_uploads'
+RESUMABLE_UPLOAD_TTL_HOURS = 24
+RESUMABLE_UPLOAD_CHUNK_SIZE = 1024 * 1024
+RESUMABLE_UPLOAD_MAX_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Uploaded media is stored once per unique content (see api/storage.py);
+# unreferenced blobs are removed by `python manage.py gc_media`.
+STORAGES = {
+    'default': {
+        'BACKEND': 'api.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -153,6 +366,10 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'upload-offset',
+    'idempotency-key',
+    'last-event-id',
+    'x-profile',
 ]
 
 CORS_ALLOW_METHODS = [
@@ -165,7 +382,7 @@ CORS_ALLOW_METHODS = [
 ]
 
 # Allow credentials
-CORS_EXPOSE_HEADERS = ['content-type', 'authorization']
+CORS_EXPOSE_HEADERS = ['content-type', 'authorization', 'idempotent-replayed', 'x-profile-id', 'x-profile-mode']
 
 # REST Framework settings
 REST_FRAMEWORK = {
@@ -177,6 +394,10 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # Reverse proxies in front of the app. Anonymous rate limits key on the
+    # address this many hops back in X-Forwarded-For; with 0 the header is
+    # ignored and REMOTE_ADDR is used, so callers cannot pick their own key.
+    'NUM_PROXIES': int(os.environ.get('BLUEGUARD_NUM_PROXIES', '0')),
     # Ensure CSRF is not enforced for API endpoints (DRF handles this automatically)
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
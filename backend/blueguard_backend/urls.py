@@ -7,10 +7,13 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import RedirectView
 
+from api.metrics import metrics_view
+
 urlpatterns = [
     path('', RedirectView.as_view(pattern_name='api-root', permanent=False)),
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 # Serve media files in development
@@ -15,6 +15,12 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blueguard_backend.settings')
 
 application = get_wsgi_application()
 
+if os.environ.get('BLUEGUARD_WARM_UP', '').lower() in ('1', 'true', 'yes'):
+    # Preload the views and chatbot dependencies (api/warmup.py)
+    from api.warmup import warm_up
+
+    warm_up()
+
 
 
 
@@ -1,8 +1,4 @@
-try:
-    import ollama
-    OLLAMA_AVAILABLE = True
-except Exception:
-    OLLAMA_AVAILABLE = False
+from api.metrics import track_upstream
 
 from .weather_engine import get_final_risk_and_score_for_location, get_detailed_forecast_summary
 
@@ -24,6 +20,21 @@ FLOOD_KEYWORDS = [
 ]
 DETAIL_KEYWORDS = ["detail", "explain", "show", "forecast", "why", "how bad", "give details"]
 
+_ollama = None
+
+
+def load_ollama():
+    """Import the Ollama client on first use (it pulls in httpx and pydantic); None if not installed."""
+    global _ollama
+    if _ollama is None:
+        try:
+            import ollama
+        except Exception:
+            ollama = False
+        _ollama = ollama
+    return _ollama or None
+
+
 def is_flood_query(text: str) -> bool:
     t = text.lower()
     return any(k in t for k in FLOOD_KEYWORDS)
@@ -48,6 +59,9 @@ def blueguard_response(user_input: str) -> str:
         if "error" in res:
             return "Unable to fetch weather data."
         risk = res["final_risk"]
+        if res.get("stale"):
+            # Last good forecast, served while the weather service is down or being re-fetched
+            risk = f"{risk} (as of {res['as_of'][:16].replace('T', ' ')} UTC)"
         if wants_details(user_input):
             details = get_detailed_forecast_summary()
             return f"Flood Risk: {risk}\n\nDetails:\n{details}"
@@ -58,8 +72,10 @@ def blueguard_response(user_input: str) -> str:
         {"role": "system", "content": SYSTEM_PROMPT},
         {"role": "user", "content": user_input}
     ]
-    if not OLLAMA_AVAILABLE:
+    ollama = load_ollama()
+    if ollama is None:
         return "LLM backend unavailable. Please configure Ollama or ask for weather-related queries."
 
-    reply = ollama.chat(model="phi3:mini", messages=messages)
+    with track_upstream("ollama"):
+        reply = ollama.chat(model="phi3:mini", messages=messages)
     return reply["message"]["content"].strip()
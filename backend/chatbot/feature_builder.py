@@ -1,11 +1,45 @@
-import pandas as pd
-from .weather_engine import get_user_location, build_daily_features_from_history
+"""
+Daily weather features for training the flood model.
+
+``build_and_save`` writes the last 30 days at the detected location to a CSV.
+``build_dataset`` builds a multi-location, multi-year set: the history days of
+each location-month are fetched concurrently (each day once per run),
+rolling-window features are computed on the whole month at once, and the
+month is written as soon as it is done, as Hive-style partitioned Parquet
+that pandas and pyarrow read back as one dataset:
+
+    <out_dir>/location=<name>/month=<YYYY-MM>/part.parquet
+
+A month with days that could not be fetched is still written, with those
+dates listed in ``_missing.json`` next to it (readers skip files starting
+with ``_``). Complete months already written are skipped, so an interrupted
+build picks up where it stopped, and months with missing days are fetched
+again. From the backend folder:
+
+    python -m chatbot.feature_builder --locations Mumbai:19.076,72.878 Delhi:28.704,77.103 \\
+        --start 2023-01-01 --end 2024-12-31
+    python -m chatbot.feature_builder --grid 18.9,19.3,72.8,73.0,0.1 --start 2024-06-01 --end 2024-09-30
+"""
+from .weather_engine import (
+    CircuitOpen, SCORE_BANDS, RISK_BANDS, fetch_history_day, get_user_location, build_daily_features_from_history,
+)
+import json
 import os
-os.makedirs("data", exist_ok=True)
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from datetime import date, timedelta
 
 OUT_CSV = "data/daily_features.csv"
+OUT_DIR = "data/features"
+# Longest rolling window (days): each month is fetched with this many days of lead-in
+ROLLING_DAYS = 7
 
 def build_and_save(days_history: int = 30):
+    # pandas is only needed here, and takes most of a second to import
+    import pandas as pd
+
+    os.makedirs(os.path.dirname(OUT_CSV), exist_ok=True)
     loc = get_user_location()
     city, lat, lon = loc["city"], loc["lat"], loc["lon"]
     features = build_daily_features_from_history(lat, lon, days_history)
@@ -16,6 +50,151 @@ def build_and_save(days_history: int = 30):
     df.to_csv(OUT_CSV, index=False)
     return df
 
+
+def grid_locations(lat_min: float, lat_max: float, lon_min: float, lon_max: float, step: float):
+    """(name, lat, lon) for every point of a lat/lon grid, ends included."""
+    rows = int(round((lat_max - lat_min) / step)) + 1
+    cols = int(round((lon_max - lon_min) / step)) + 1
+    return [
+        (f"{lat:.3f}_{lon:.3f}", lat, lon)
+        for lat in (round(lat_min + i * step, 6) for i in range(rows))
+        for lon in (round(lon_min + j * step, 6) for j in range(cols))
+    ]
+
+
+def _months(start: date, end: date):
+    """(first, last) day of each calendar month overlapping start..end, clipped to it."""
+    first = start
+    while first <= end:
+        next_month = (first.replace(day=1) + timedelta(days=32)).replace(day=1)
+        yield first, min(next_month - timedelta(days=1), end)
+        first = next_month
+
+
+def daily_features(df):
+    """Rolling-window features and flood score for one location's days, vectorised.
+
+    ``df`` has a datetime64 ``date`` column and the ``DayWeather`` fields.
+    Windows are by calendar day and end on the row's day, so missing days
+    are not replaced by older ones. The score matches ``compute_flood_index``
+    over the day and the two before it.
+    """
+    import numpy as np
+
+    df = df.sort_values("date").reset_index(drop=True)
+    df["three_day_rain_mm"] = df.rolling("3D", on="date")["totalprecip_mm"].sum()
+    df["seven_day_rain_mm"] = df.rolling(f"{ROLLING_DAYS}D", on="date")["totalprecip_mm"].sum()
+    score = 0
+    for column, (bands, below) in SCORE_BANDS.items():
+        score = score + np.select([df[column] >= at_least for at_least, _ in bands], [p for _, p in bands], below)
+    df["flood_score"] = score.astype("int64")
+    bands, below = RISK_BANDS
+    df["flood_risk"] = np.select([df["flood_score"] >= at_least for at_least, _ in bands], [l for _, l in bands], below)
+    return df
+
+
+def _partition_name(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_") or "location"
+
+
+def build_dataset(locations, start: date, end: date, out_dir: str = OUT_DIR, workers: int = 8) -> dict:
+    """Write features for ``locations`` ((name, lat, lon) tuples) from ``start`` to ``end``.
+
+    ``end`` is clipped to yesterday, the last day WeatherAPI has history for.
+    Returns counts of months written, skipped and written with missing days,
+    and of days fetched and missing.
+    """
+    import pandas as pd
+
+    end = min(end, date.today() - timedelta(days=1))
+    stats = {"months_written": 0, "months_skipped": 0, "months_incomplete": 0, "days_fetched": 0, "days_missing": 0}
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="feature-fetch") as pool:
+        for name, lat, lon in locations:
+            # Days fetched for this location, reused as the next month's lead-in
+            days = {}
+            for first, last in _months(start, end):
+                month = f"{first:%Y-%m}"
+                partition = os.path.join(out_dir, f"location={_partition_name(name)}", f"month={month}")
+                path = os.path.join(partition, "part.parquet")
+                missing_path = os.path.join(partition, "_missing.json")
+                # A month clipped by ``end`` or missing days is rebuilt on the next run
+                complete = first.day == 1 and (last + timedelta(days=1)).day == 1
+                if complete and os.path.exists(path) and not os.path.exists(missing_path):
+                    stats["months_skipped"] += 1
+                    continue
+
+                window = [first - timedelta(days=n) for n in range(ROLLING_DAYS - 1, 0, -1)]
+                window += [first + timedelta(days=n) for n in range((last - first).days + 1)]
+                # Lead-in days that failed for the previous month are tried again
+                wanted = [d for d in window if days.get(d) is None]
+                try:
+                    for d, day in zip(wanted, pool.map(lambda d: fetch_history_day(lat, lon, d), wanted)):
+                        days[d] = day
+                except CircuitOpen:
+                    raise RuntimeError(
+                        f"WeatherAPI is failing; stopped at {name} {month}. Run again to resume."
+                    ) from None
+                stats["days_fetched"] += len(wanted)
+                stats["days_missing"] += sum(days[d] is None for d in wanted)
+
+                rows = [asdict(days[d]) for d in window if days[d] is not None]
+                missing = [d.isoformat() for d in window if days[d] is None]
+                if rows:
+                    df = pd.DataFrame(rows)
+                    df["date"] = pd.to_datetime(df["date"])
+                    df = daily_features(df)
+                    df = df[df["date"] >= pd.Timestamp(first)]
+                    df.insert(1, "lat", lat)
+                    df.insert(2, "lon", lon)
+                    os.makedirs(partition, exist_ok=True)
+                    # Readers never see a half-written file (temp names start
+                    # with "_", which dataset readers skip), and the month is
+                    # never complete on disk before its missing days are recorded
+                    if missing:
+                        with open(f"{missing_path}.tmp", "w") as f:
+                            json.dump(missing, f)
+                        os.replace(f"{missing_path}.tmp", missing_path)
+                    temp_path = os.path.join(partition, "_part.parquet.tmp")
+                    df.to_parquet(temp_path, index=False)
+                    os.replace(temp_path, path)
+                    if not missing and os.path.exists(missing_path):
+                        os.remove(missing_path)
+                    stats["months_written"] += 1
+                if missing:
+                    stats["months_incomplete"] += 1
+
+                # Only the lead-in of the next month is needed again
+                days = {d: day for d, day in days.items() if d > last - timedelta(days=ROLLING_DAYS)}
+    return stats
+
+
+def _parse_location(value: str):
+    name, _, coords = value.rpartition(":")
+    lat, lon = map(float, coords.split(","))
+    return name or f"{lat:.3f}_{lon:.3f}", lat, lon
+
+
 if __name__ == "__main__":
-    df = build_and_save()
-    print("Saved features to", OUT_CSV, "rows:", len(df))
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--locations", nargs="+", type=_parse_location, default=[], metavar="NAME:LAT,LON")
+    parser.add_argument("--grid", metavar="LAT_MIN,LAT_MAX,LON_MIN,LON_MAX,STEP")
+    parser.add_argument("--start", type=date.fromisoformat)
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today() - timedelta(days=1))
+    parser.add_argument("--out", default=OUT_DIR)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    locations = list(args.locations)
+    if args.grid:
+        locations += grid_locations(*map(float, args.grid.split(",")))
+    if not locations:
+        # No locations given: the 30-day CSV for the detected location
+        df = build_and_save()
+        print("Saved features to", OUT_CSV, "rows:", len(df))
+    else:
+        if args.start is None:
+            parser.error("--start is required with --locations or --grid")
+        print(json.dumps(build_dataset(locations, args.start, args.end, args.out, args.workers)))
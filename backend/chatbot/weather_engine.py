@@ -1,11 +1,42 @@
-import requests
 import unicodedata
 import logging
 import os
 import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import Dict, List, Optional
 
-API_KEY = "66424017c3a14f8ba5b150703251311"
+from api.circuit import CircuitBreaker, CircuitOpen, StaleWhileRevalidate
+from api.metrics import track_upstream
+
+API_KEY = os.environ.get("WEATHERAPI_KEY", "66424017c3a14f8ba5b150703251311")
+# Overridable so load tests can point the engine at local stubs
+# (benchmarks/upstream_stubs.py)
+WEATHER_API_URL = os.environ.get("BLUEGUARD_WEATHER_API_URL", "http://api.weatherapi.com/v1")
+LOCATION_SERVICES = os.environ.get(
+    "BLUEGUARD_LOCATION_URLS", "https://ipinfo.io/json,https://ipapi.co/json/,https://ipwho.is/"
+).split(",")
+
+# WeatherAPI calls go through a circuit breaker: after WEATHER_BREAKER_FAILURES
+# consecutive failures they fail fast for WEATHER_BREAKER_RESET seconds.
+# Forecasts are reused for WEATHER_FRESH_SECONDS, then served marked stale
+# (and refreshed in the background) for up to WEATHER_MAX_STALE_SECONDS.
+WEATHER_BREAKER_FAILURES = int(os.environ.get("BLUEGUARD_WEATHER_BREAKER_FAILURES", "3"))
+WEATHER_BREAKER_RESET = float(os.environ.get("BLUEGUARD_WEATHER_BREAKER_RESET", "30"))
+WEATHER_FRESH_SECONDS = float(os.environ.get("BLUEGUARD_WEATHER_FRESH_SECONDS", "600"))
+WEATHER_MAX_STALE_SECONDS = float(os.environ.get("BLUEGUARD_WEATHER_MAX_STALE_SECONDS", "21600"))
+
+weather_breaker = CircuitBreaker("weatherapi", WEATHER_BREAKER_FAILURES, WEATHER_BREAKER_RESET)
+forecast_cache = StaleWhileRevalidate("forecast", WEATHER_FRESH_SECONDS, WEATHER_MAX_STALE_SECONDS)
+# Past days do not change; only the newest one is added each day
+history_cache = StaleWhileRevalidate("history", 6 * 3600, 48 * 3600)
+HISTORY_DAYS = 30
+# Days already fetched for locations whose month is not complete yet, so a
+# retry only fetches the missing ones; least recently used locations go first
+HISTORY_DAY_LOCATIONS = 1024
+_history_days = OrderedDict()
+_history_days_lock = threading.Lock()
 
 
 # =====================================================
@@ -18,11 +49,11 @@ def _clean_city_name(city: str) -> str:
 
 def get_user_location() -> Dict:
     """Try multiple services, fallback to Delhi."""
-    services = [
-        "https://ipinfo.io/json",
-        "https://ipapi.co/json/",
-        "https://ipwho.is/"
-    ]
+    # Imported on first use: requests (urllib3, certifi...) costs ~100 ms of
+    # startup, and most processes never call out
+    import requests
+
+    services = LOCATION_SERVICES
     headers = {"User-Agent": "Mozilla/5.0"}
 
     # configure logger based on env var
@@ -34,7 +65,8 @@ def get_user_location() -> Dict:
     for url in services:
         try:
             logger.debug(f"Trying location service: {url}")
-            r = requests.get(url, headers=headers, timeout=6)
+            with track_upstream("location"):
+                r = requests.get(url, headers=headers, timeout=6)
             logger.debug(f"Response status for {url}: {r.status_code}")
             if r.status_code == 200:
                 try:
@@ -71,114 +103,202 @@ def get_user_location() -> Dict:
 
 
 # =====================================================
-#   FLOOD RISK ENGINE (Scientific Scoring)
+#   PARSING — Compact daily records
 # =====================================================
-def compute_flood_index(day: Dict, next3: List[Dict]) -> int:
-    rain = day["day"].get("totalprecip_mm", 0)
-    chance = day["day"].get("daily_chance_of_rain", 0)
-    wind = day["day"].get("maxwind_kph", 0)
-    humidity = day["day"].get("avghumidity", 0)
-    three_day_rain = sum(d["day"].get("totalprecip_mm", 0) for d in next3)
+@dataclass(frozen=True, slots=True)
+class DayWeather:
+    """The fields of one WeatherAPI ``forecastday`` that the risk engine reads.
 
-    score = 0
+    Raw responses carry 24 hourly entries and astronomy data per day; parsing
+    right after download means caches hold ~200 bytes a day instead of ~50 KB
+    (benchmarks/bench_weather_memory.py).
+    """
+    date: str
+    totalprecip_mm: float
+    daily_chance_of_rain: int
+    maxwind_kph: float
+    avghumidity: int
+
+    @classmethod
+    def from_api(cls, forecastday: Dict) -> "DayWeather":
+        d = forecastday.get("day") or {}
+        return cls(
+            date=forecastday.get("date"),
+            totalprecip_mm=float(d.get("totalprecip_mm") or 0),
+            daily_chance_of_rain=int(float(d.get("daily_chance_of_rain") or 0)),
+            maxwind_kph=float(d.get("maxwind_kph") or 0),
+            avghumidity=int(float(d.get("avghumidity") or 0)),
+        )
 
-    # Rain intensity
-    if rain >= 100: score += 40
-    elif rain >= 70: score += 30
-    elif rain >= 50: score += 20
-    elif rain >= 20: score += 10
-    else: score += 2
 
-    # Accumulation
-    if three_day_rain >= 150: score += 30
-    elif three_day_rain >= 100: score += 20
-    elif three_day_rain >= 50: score += 10
+def parse_forecast_days(data: Dict) -> List[DayWeather]:
+    """``DayWeather`` records for every day of a forecast or history response."""
+    return [DayWeather.from_api(day) for day in data["forecast"]["forecastday"]]
 
-    # Chance of rain
-    if chance >= 80: score += 15
-    elif chance >= 60: score += 10
-    elif chance >= 40: score += 5
 
+# =====================================================
+#   FLOOD RISK ENGINE (Scientific Scoring)
+# =====================================================
+# Points per component: (at least, points) bands, highest first, and the
+# points below the lowest band. Keyed by feature column so feature_builder
+# can score whole DataFrames with the same table.
+SCORE_BANDS = {
+    # Rain intensity
+    "totalprecip_mm": (((100, 40), (70, 30), (50, 20), (20, 10)), 2),
+    # Accumulation over the 3-day window
+    "three_day_rain_mm": (((150, 30), (100, 20), (50, 10)), 0),
+    # Chance of rain
+    "daily_chance_of_rain": (((80, 15), (60, 10), (40, 5)), 0),
     # Humidity
-    if humidity >= 90: score += 7
-    elif humidity >= 80: score += 4
-
+    "avghumidity": (((90, 7), (80, 4)), 0),
     # Wind
-    if wind >= 60: score += 10
-    elif wind >= 40: score += 5
+    "maxwind_kph": (((60, 10), (40, 5)), 0),
+}
+RISK_BANDS = (((60, "HIGH"), (35, "MEDIUM")), "LOW")
+
+
+def _band(value, bands, below):
+    for at_least, points in bands:
+        if value >= at_least:
+            return points
+    return below
+
 
-    return score
+def compute_flood_index(day: DayWeather, next3: List[DayWeather]) -> int:
+    values = {
+        "totalprecip_mm": day.totalprecip_mm,
+        "three_day_rain_mm": sum(d.totalprecip_mm for d in next3),
+        "daily_chance_of_rain": day.daily_chance_of_rain,
+        "avghumidity": day.avghumidity,
+        "maxwind_kph": day.maxwind_kph,
+    }
+    return sum(_band(values[name], bands, below) for name, (bands, below) in SCORE_BANDS.items())
 
 
 def risk_label(score: int) -> str:
-    if score >= 60: return "HIGH"
-    if score >= 35: return "MEDIUM"
-    return "LOW"
+    return _band(score, *RISK_BANDS)
 
 
 # =====================================================
 #   WEATHER FETCH — Forecast + Historical (30 days)
 # =====================================================
-def fetch_forecast(lat: float, lon: float) -> Optional[Dict]:
-    url = f"http://api.weatherapi.com/v1/forecast.json?key={API_KEY}&q={lat},{lon}&days=10&aqi=no&alerts=yes"
+def fetch_forecast(lat: float, lon: float) -> Optional[List[DayWeather]]:
+    """The next 10 days, or None if the forecast could not be fetched."""
+    import requests
+
+    url = f"{WEATHER_API_URL}/forecast.json?key={API_KEY}&q={lat},{lon}&days=10&aqi=no&alerts=yes"
     try:
-        r = requests.get(url, timeout=8)
+        with weather_breaker.guard(), track_upstream("weatherapi"):
+            r = requests.get(url, timeout=8)
+            if r.status_code >= 500:
+                r.raise_for_status()
+        data = r.json()
+        if "forecast" in data:
+            return parse_forecast_days(data) or None
+    except:
+        pass
+    return None
+
+
+def fetch_history_day(lat: float, lon: float, day) -> Optional[DayWeather]:
+    """One past day (a ``date``), or None if it could not be fetched.
+
+    Raises CircuitOpen while the breaker is open, so loops can stop early.
+    """
+    import requests
+
+    url = f"{WEATHER_API_URL}/history.json?key={API_KEY}&q={lat},{lon}&dt={day:%Y-%m-%d}"
+    try:
+        with weather_breaker.guard(), track_upstream("weatherapi"):
+            r = requests.get(url, timeout=8)
+            if r.status_code >= 500:
+                r.raise_for_status()
         data = r.json()
         if "forecast" in data:
-            return data
+            return DayWeather.from_api(data["forecast"]["forecastday"][0])
+    except CircuitOpen:
+        raise
     except:
         pass
     return None
 
 
-def fetch_month_history(lat: float, lon: float) -> List[Dict]:
-    """Fetch past 30 days (WeatherAPI supports this via history)"""
+def fetch_month_history(lat: float, lon: float, known: Optional[Dict[str, DayWeather]] = None) -> List[DayWeather]:
+    """Fetch past 30 days (WeatherAPI supports this via history), newest first
+
+    Days found in ``known`` (by ISO date) are reused instead of fetched.
+    """
     from datetime import datetime, timedelta
 
     today = datetime.utcnow()
+    known = known or {}
     days = []
 
-    for i in range(1, 31):
-        d = today - timedelta(days=i)
-        date_str = d.strftime("%Y-%m-%d")
-        url = f"http://api.weatherapi.com/v1/history.json?key={API_KEY}&q={lat},{lon}&dt={date_str}"
-
-        try:
-            r = requests.get(url, timeout=8)
-            data = r.json()
-            if "forecast" in data:
-                days.append(data["forecast"]["forecastday"][0])
-        except:
-            continue
+    for i in range(1, HISTORY_DAYS + 1):
+        date = today - timedelta(days=i)
+        day = known.get(f"{date:%Y-%m-%d}")
+        if day is None:
+            try:
+                day = fetch_history_day(lat, lon, date)
+            except CircuitOpen:
+                # Upstream is down: don't wait out the remaining days one by one
+                break
+        if day is not None:
+            days.append(day)
 
     return days
 
 
 # =====================================================
-#   FINAL OUTPUT — For Chatbot
+#   CACHED FETCH — Last good data per location
 # =====================================================
-def get_final_risk_summary() -> str:
-    loc = get_user_location()
-    city, lat, lon = loc["city"], loc["lat"], loc["lon"]
+def _location_key(lat: float, lon: float):
+    # ~1 km: nearby callers share one cached forecast
+    return round(lat, 2), round(lon, 2)
 
-    forecast_data = fetch_forecast(lat, lon)
-    if not forecast_data:
-        return "UNKNOWN"
 
-    forecast = forecast_data["forecast"]["forecastday"]
+def get_cached_forecast(lat: float, lon: float):
+    """Forecast for the location as ``Cached(value, fetched_at, stale)``, or None."""
+    return forecast_cache.get(_location_key(lat, lon), lambda: fetch_forecast(lat, lon))
 
-    # DAILY + 3-DAY WINDOW RISK
-    today_score = compute_flood_index(forecast[0], forecast[:3])
 
-    # MONTH RISK (from 30 days history)
-    history = fetch_month_history(lat, lon)
-    month_scores = [compute_flood_index(d, history[i:i+3]) for i, d in enumerate(history)]
-    month_score = max(month_scores) if month_scores else today_score
+def get_cached_history(lat: float, lon: float):
+    """The last 30 days for the location as ``Cached(value, fetched_at, stale)``, or None."""
+    key = _location_key(lat, lon)
 
-    final_score = max(today_score, month_score)
-    final_risk = risk_label(final_score)
+    def load():
+        with _history_days_lock:
+            known = _history_days.pop(key, {})
+        days = fetch_month_history(lat, lon, known)
+        if len(days) < HISTORY_DAYS:
+            # Days failed or the breaker opened: keep the good ones for the
+            # next call to fill in, instead of caching a month with gaps
+            with _history_days_lock:
+                _history_days[key] = {day.date: day for day in days}
+                if len(_history_days) > HISTORY_DAY_LOCATIONS:
+                    _history_days.popitem(last=False)
+        return days or None
 
-    return final_risk
+    return history_cache.get(key, load, keep=lambda days: len(days) == HISTORY_DAYS)
+
+
+def _format_as_of(fetched_at: float) -> str:
+    from datetime import datetime, timezone
+
+    return datetime.fromtimestamp(fetched_at, timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+
+
+def weather_status() -> Dict:
+    """Breaker state of the weather client, for diagnostics."""
+    return weather_breaker.status()
+
+
+# =====================================================
+#   FINAL OUTPUT — For Chatbot
+# =====================================================
+def get_final_risk_summary() -> str:
+    res = get_final_risk_and_score_for_location()
+    return res.get("final_risk", "UNKNOWN")
 
 
 # -----------------------------------------------------
@@ -187,21 +307,27 @@ def get_final_risk_summary() -> str:
 def get_final_risk_and_score_for_location() -> dict:
     """Return final risk and numeric score for the current detected location.
 
-    Returns a dict: {"final_risk": "HIGH|MEDIUM|LOW", "final_score": int, "city": str, "lat": float, "lon": float}
+    Returns a dict: {"final_risk": "HIGH|MEDIUM|LOW", "final_score": int, "city": str, "lat": float, "lon": float,
+    "stale": bool, "as_of": ISO timestamp of the forecast used}
+    "stale" is True when the forecast or history is older than WEATHER_FRESH_SECONDS (the upstream
+    is down or a refresh is in progress).
     If data cannot be fetched returns {"error": "..."}
     """
+    from datetime import datetime, timezone
+
     loc = get_user_location()
     city, lat, lon = loc["city"], loc["lat"], loc["lon"]
 
-    forecast_data = fetch_forecast(lat, lon)
-    if not forecast_data:
+    cached = get_cached_forecast(lat, lon)
+    if not cached:
         return {"error": "no_forecast_data"}
 
-    forecast = forecast_data["forecast"]["forecastday"]
+    forecast = cached.value
 
     today_score = compute_flood_index(forecast[0], forecast[:3])
 
-    history = fetch_month_history(lat, lon)
+    cached_history = get_cached_history(lat, lon)
+    history = cached_history.value if cached_history else []
     month_scores = [compute_flood_index(d, history[i:i+3]) for i, d in enumerate(history)]
     month_score = max(month_scores) if month_scores else today_score
 
@@ -214,6 +340,8 @@ def get_final_risk_and_score_for_location() -> dict:
         "city": city,
         "lat": lat,
         "lon": lon,
+        "stale": cached.stale or bool(cached_history and cached_history.stale),
+        "as_of": datetime.fromtimestamp(cached.fetched_at, timezone.utc).isoformat(),
     }
 
 
@@ -225,25 +353,21 @@ def get_detailed_forecast_summary(days: int = 3) -> str:
     loc = get_user_location()
     city, lat, lon = loc["city"], loc["lat"], loc["lon"]
 
-    forecast_data = fetch_forecast(lat, lon)
-    if not forecast_data:
+    cached = get_cached_forecast(lat, lon)
+    if not cached:
         return "No detailed forecast available."
 
-    forecast = forecast_data["forecast"]["forecastday"]
+    forecast = cached.value
     parts = [f"Location: {city} ({lat:.4f},{lon:.4f})"]
+    if cached.stale:
+        parts.append(f"(Forecast from {_format_as_of(cached.fetched_at)}; live data is unavailable)")
 
     for i, day in enumerate(forecast[:days]):
         score = compute_flood_index(day, forecast[i:i+3])
         label = risk_label(score)
-        date = day.get("date")
-        d = day["day"]
-        rain = d.get("totalprecip_mm", 0)
-        chance = d.get("daily_chance_of_rain", 0)
-        wind = d.get("maxwind_kph", 0)
-        humidity = d.get("avghumidity", 0)
-
         parts.append(
-            f"Date: {date} — Risk: {label} (Score: {score}) | Rain: {rain} mm | Chance: {chance}% | Wind: {wind} km/h | Humidity: {humidity}%"
+            f"Date: {day.date} — Risk: {label} (Score: {score}) | Rain: {day.totalprecip_mm} mm | "
+            f"Chance: {day.daily_chance_of_rain}% | Wind: {day.maxwind_kph} km/h | Humidity: {day.avghumidity}%"
         )
 
     return "\n".join(parts)
@@ -256,15 +380,15 @@ def build_daily_features_from_history(lat: float, lon: float, days: int = 30) ->
     """
     history = fetch_month_history(lat, lon)
     features = []
-    for day in history[:days]:
-        d = day.get("day", {})
+    # Newest first: history[i:i+3] is the day and the two before it
+    for i, day in enumerate(history[:days]):
         row = {
-            "date": day.get("date"),
-            "totalprecip_mm": d.get("totalprecip_mm", 0),
-            "daily_chance_of_rain": d.get("daily_chance_of_rain", 0),
-            "maxwind_kph": d.get("maxwind_kph", 0),
-            "avghumidity": d.get("avghumidity", 0),
-            "flood_score": compute_flood_index(day, history[:3])
+            "date": day.date,
+            "totalprecip_mm": day.totalprecip_mm,
+            "daily_chance_of_rain": day.daily_chance_of_rain,
+            "maxwind_kph": day.maxwind_kph,
+            "avghumidity": day.avghumidity,
+            "flood_score": compute_flood_index(day, history[i:i+3])
         }
         features.append(row)
     return features
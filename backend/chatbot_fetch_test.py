@@ -2,8 +2,6 @@
 Quick diagnostic: try fetching forecast from WeatherAPI using chatbot.weather_engine.
 Run from the `backend` folder with the same Python you run the Django server with.
 """
-import json
-import sys
 
 def main():
     try:
@@ -24,15 +22,7 @@ def main():
         return
 
     # Print a compact summary
-    try:
-        forecast = data.get('forecast')
-        if not forecast:
-            print("NO_FORECAST_KEY", json.dumps(data)[:1000])
-            return
-        days = forecast.get('forecastday', [])
-        print("OK", {"days_returned": len(days), "keys": list(data.keys())})
-    except Exception as e:
-        print("PARSE_ERROR", str(e))
+    print("OK", {"days_returned": len(data), "first_day": data[0]})
 
 if __name__ == '__main__':
     main()
@@ -1,22 +1,86 @@
 """
-Script to check database structure
+Script to check database structure and audit the indexes behind the hot queries
+
+Usage: python check_database.py [--explain-only]
 """
 import os
+import sys
 import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blueguard_backend.settings')
 django.setup()
 
 from django.db import connection
-from api.models import CitizenReport, Admin, AdminToken, UserProfile
+from rest_framework.authtoken.models import Token
+from api.models import CitizenReport, Admin, AdminToken, OTP, UserProfile
+from api.querylog import is_full_scan
+
+# Tables whose lookups sit on every request (auth) or every report page
+AUDITED_TABLES = ['api_citizenreport', 'api_otp', 'api_admintoken', 'authtoken_token']
+
+
+def hot_queries():
+    """(description, queryset) for the lookups the views issue most."""
+    email = 'citizen@example.com'
+    return [
+        ("OTP: latest unverified code for an email",
+         OTP.objects.filter(email=email, is_verified=False).order_by('-created_at')[:1]),
+        ("OTP: code check for an email",
+         OTP.objects.filter(email=email, otp_code='123456')),
+        ("AdminToken: authenticate by key",
+         AdminToken.objects.select_related('admin').filter(key='0' * 40)),
+        ("Token: authenticate by key",
+         Token.objects.select_related('user').filter(key='0' * 40)),
+        ("CitizenReport: a citizen's reports, newest first",
+         CitizenReport.objects.filter(reporter_email=email).order_by('-created_at')),
+        ("CitizenReport: all reports, newest first",
+         CitizenReport.objects.order_by('-created_at')),
+        ("CitizenReport: reports by status",
+         CitizenReport.objects.filter(status='pending')),
+        ("CitizenReport: changes since a sequence number",
+         CitizenReport.objects.filter(change_seq__gt=0).order_by('change_seq')),
+    ]
+
+
+def audit_indexes(cursor):
+    """Print the indexes of the audited tables and the plans of the hot queries."""
+    print("\nIndexes:")
+    for table in AUDITED_TABLES:
+        cursor.execute(f"PRAGMA index_list({table})")
+        print(f"  {table}:")
+        for index in cursor.fetchall():
+            cursor.execute(f"PRAGMA index_info({index[1]})")
+            columns = ", ".join(row[2] for row in cursor.fetchall())
+            unique = " UNIQUE" if index[2] else ""
+            print(f"    - {index[1]}{unique} ({columns})")
 
-def check_database():
+    print("\nQuery Plans:")
+    full_scans = 0
+    for description, queryset in hot_queries():
+        sql, params = queryset.query.sql_with_params()
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+        plan = [row[-1] for row in cursor.fetchall()]
+        marker = "[FULL SCAN]" if is_full_scan(plan) else "[OK]"
+        full_scans += marker != "[OK]"
+        print(f"  {marker} {description}")
+        for step in plan:
+            print(f"      {step}")
+    return full_scans
+
+def check_database(explain_only=False):
     print("=" * 60)
     print("DATABASE STRUCTURE CHECK")
     print("=" * 60)
     
-    # Check all tables
     cursor = connection.cursor()
+    if explain_only:
+        full_scans = audit_indexes(cursor)
+        print("\n" + "=" * 60)
+        print(f"[{'WARNING' if full_scans else 'SUCCESS'}] {full_scans} hot queries scan a whole table")
+        print("=" * 60)
+        return full_scans
+
+    # Check all tables
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
     tables = [row[0] for row in cursor.fetchall()]
     
@@ -51,11 +115,19 @@ def check_database():
     print(f"  - Admins: {Admin.objects.count()}")
     print(f"  - Admin Tokens: {AdminToken.objects.count()}")
     print(f"  - User Profiles: {UserProfile.objects.count()}")
+    print(f"  - OTPs: {OTP.objects.count()}")
+    print(f"  - Auth Tokens: {Token.objects.count()}")
+    
+    full_scans = audit_indexes(cursor)
     
     print("\n" + "=" * 60)
-    print("[SUCCESS] Database is ready!")
+    if full_scans:
+        print(f"[WARNING] Database is ready, but {full_scans} hot queries scan a whole table")
+    else:
+        print("[SUCCESS] Database is ready!")
     print("=" * 60)
+    return full_scans
 
 if __name__ == "__main__":
-    check_database()
+    sys.exit(1 if check_database(explain_only='--explain-only' in sys.argv) else 0)
 